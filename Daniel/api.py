@@ -1,5 +1,11 @@
-import requests
+import sys
 import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.transport import get_transport
+from shared.endpoints import api_host
+from shared.metrics import decode_json
 
 class TraydnerAPI:
     """
@@ -7,33 +13,39 @@ class TraydnerAPI:
     Handles price fetching, candles, trades, balance, and market status.
     """
 
-    BASE_URL = "https://traydner-186649552655.us-central1.run.app/api/remote"
+    API_PATH = "/api/remote"
 
-    def __init__(self, api_key, timeout = 15):
+    def __init__(self, api_key, timeout = None, transport = None, base_url = None):
         """
         Initialize the client.
 
         :param api_key: Your Traydner API key (Bearer token)
-        :param timeout: HTTP timeout for all requests
+        :param timeout: HTTP timeout for all requests; None uses the per-endpoint
+                        defaults (shared.endpoints.ENDPOINT_TIMEOUTS)
+        :param transport: optional PooledTransport; defaults to the shared keep-alive pool
+        :param base_url: API host override (e.g. a local mock server); defaults to
+                         $TRAYDNER_BASE_URL, then the live API
         """
         self.api_key = api_key
+        self.base_url = api_host(base_url) + self.API_PATH
         self.timeout = timeout
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
+        self.transport = transport or get_transport()
 
     # ----------------------------
     # Internal request helper
     # ----------------------------
     def _get(self, endpoint, params=None):
-        url = f"{self.BASE_URL}/{endpoint}"
-        r = requests.get(url, headers=self.headers, params=params, timeout=self.timeout)
+        url = f"{self.base_url}/{endpoint}"
+        r = self.transport.get(url, headers=self.headers, params=params, timeout=self.timeout)
         r.raise_for_status()
-        return r.json()
+        return decode_json(r, self.transport.metrics)
 
     def _post(self, endpoint, params=None):
-        url = f"{self.BASE_URL}/{endpoint}"
-        r = requests.post(url, headers=self.headers, params=params, timeout=self.timeout)
+        url = f"{self.base_url}/{endpoint}"
+        r = self.transport.post(url, headers=self.headers, params=params, timeout=self.timeout)
         r.raise_for_status()
-        return r.json()
+        return decode_json(r, self.transport.metrics)
 
     # ----------------------------
     # Public API Methods
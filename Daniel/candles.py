@@ -1,67 +1,128 @@
+import sys
 import time
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.candle_arrays import decode_history
+from shared.ring_buffer import RingBuffer
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+class Candles:
+    """
+    Read-only view of a builder's bars, oldest first.
+
+    ``candles["close"]`` is a NumPy view into the ring buffer (no copy), and
+    ``len(candles)`` is the number of bars, so strategies can use it the way
+    they used the DataFrame. Call ``to_frame()`` for a real (copied) DataFrame.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def __getitem__(self, field):
+        return self._buffer.column(field)
+
+    @property
+    def columns(self):
+        return self._buffer.fields
+
+    def to_frame(self):
+        return pd.DataFrame(self._buffer.columns())
+
+
 class BuildCandles:
+    """
+    Aggregates price ticks into OHLCV bars of `interval_sec` seconds.
+
+    Bars live in a preallocated ring buffer of `history_limit` rows, so adding
+    a tick is O(1) and never allocates; polling the price many times per bar
+    gives real highs and lows.
+    """
+
     def __init__(self, api_client, symbol, interval_sec=20, history_limit=100):
         self.api = api_client
         self.symbol = symbol
         self.interval_sec = interval_sec
-        self.candles = []
         self.history_limit = history_limit
+        self.bars = RingBuffer(history_limit, FIELDS, dtypes={"timestamp": np.int64})
 
-    def fetch_latest_candle(self):
-        """Fetch current price from Traydner and make it a candle."""
-        data = self.api.get_price(self.symbol)
-        price = data["price"]
-        ts = int(time.time())
-
-        candle = {
-            "open": price,
-            "high": price,
-            "low": price,
-            "close": price,
-            "timestamp": ts
-        }
-        self.candles.append(candle)
+    def add_tick(self, price, ts=None, volume=0.0):
+        """
+        Fold one trade/price into the bar covering `ts`.
 
-        if len(self.candles) > self.history_limit:
-            self.candles = self.candles[-self.history_limit:]
+        :param price: traded or quoted price
+        :param ts: UNIX seconds; now if omitted
+        :param volume: traded volume, if known
+        :return: True if the tick opened a new bar
+        """
+        ts = time.time() if ts is None else ts
+        start = int(ts // self.interval_sec * self.interval_sec)
+        bars = self.bars
+        if len(bars):
+            last_start = bars.last("timestamp")
+            if start < last_start:
+                return False  # late tick for a bar that is already closed
+            if start == last_start:
+                bars.update_last(high=max(bars.last("high"), price),
+                                 low=min(bars.last("low"), price),
+                                 close=price,
+                                 volume=bars.last("volume") + volume)
+                return False
+        bars.append(timestamp=start, open=price, high=price, low=price, close=price, volume=volume)
+        return True
 
-        return pd.DataFrame(self.candles)
+    def poll(self):
+        """Fetch the current price from Traydner and add it as a tick."""
+        data = self.api.get_price(self.symbol)
+        return self.add_tick(data["price"])
+
+    def fetch_latest_candle(self):
+        """Poll the price once and return the candles."""
+        self.poll()
+        return self.get_candles()
 
     def get_candles(self):
-        """Return current candles without adding new one."""
-        return pd.DataFrame(self.candles)
+        """Return current candles without adding a tick."""
+        return Candles(self.bars)
 
     def preload_history(self, api_client, symbol, limit=200):
         """
-        Preload history using 1-minute candles, then break them into 20-second candles.
+        Preload history using 1-minute candles, then break each into `interval_sec` candles
+        whose opens and closes walk from the minute's open to its close.
         """
         print(f"Preloading {limit} 1-minute candles...")
 
         history = api_client.get_history(symbol, resolution="1m", limit=limit)
-
-        if not history or "candles" not in history:
+        rows = (history or {}).get("history") or (history or {}).get("candles")
+        if not rows:
             print("No historical data returned!")
             return
 
-        one_min = history["candles"]
+        one_min = decode_history(rows)
+        split = max(60 // self.interval_sec, 1)
+        opens, closes = one_min["open"], one_min["close"]
 
-        for c in one_min:
-            ts = c["timestamp"]
-
-            opens  = [c["open"],  (c["open"]+c["close"])/2, c["close"]]
-            closes = [(c["open"]+c["close"])/2, c["close"], c["close"]]
-            highs  = [c["high"]]*3
-            lows   = [c["low"]]*3
-
-            for i in range(3):
-                self.candles.append({
-                    "timestamp": ts + i * 20000,
-                    "open": opens[i],
-                    "high": highs[i],
-                    "low":  lows[i],
-                    "close": closes[i]
-                })
+        # one row per minute, one column per sub-candle
+        path = opens[:, None] + (closes - opens)[:, None] * np.linspace(0, 1, split)
+        columns = {
+            "timestamp": (one_min["timestamp"][:, None] + np.arange(split) * self.interval_sec).ravel(),
+            "open": path.ravel(),
+            "close": np.concatenate([path[:, 1:], closes[:, None]], axis=1).ravel(),
+            "high": np.repeat(one_min["high"], split),
+            "low": np.repeat(one_min["low"], split),
+            "volume": np.repeat(np.nan_to_num(one_min["volume"]) / split, split),
+        }
+        # the last minute is usually still forming; its future sub-candles would
+        # hold made-up prices and make add_tick reject real ticks as late
+        started = columns["timestamp"] <= time.time()
+        self.bars.extend({f: column[started] for f, column in columns.items()})
 
-        print(f"Preload complete: {len(self.candles)} candles (20s resolution).")
\ No newline at end of file
+        print(f"Preload complete: {len(self.bars)} candles ({self.interval_sec}s resolution).")
@@ -1,82 +1,186 @@
+import sys
 import time
-import os
+from pathlib import Path
+import numpy as np
 from colorama import init, Fore, Style
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.history import History
+
 init(autoreset=True)
 
+CANDLE_FIELDS = ("timestamp", "open", "high", "low", "close")
+
+# Cell kinds in a frame; a cell's id is kind * 3 + direction (0 down, 1 flat, 2 up)
+BLANK, BODY, WICK, BUY, SELL = range(5)
+_DIRECTION_COLORS = (Fore.RED, Fore.YELLOW, Fore.GREEN)
+
+
+def _glyphs():
+    table = []
+    for kind in range(5):
+        for color in _DIRECTION_COLORS:
+            if kind == BLANK:
+                table.append(" ")
+            elif kind in (BODY, WICK):
+                table.append(color + ("█" if kind == BODY else "│") + Style.RESET_ALL)
+            else:
+                table.append(Fore.CYAN + ("B" if kind == BUY else "S") + Style.RESET_ALL)
+    return table
+
+
+GLYPHS = _glyphs()
+
+
+def _move(row, col):
+    return f"\x1b[{row};{col}H"
+
+
 class ConsoleDisplay:
-    def __init__(self, max_candles=20, height=10):
-        self.candles = []      
-        self.trades = []       
-        self.history = []      
-        self.history_trades = []  
+    """
+    Live candle chart drawn in place with ANSI escapes.
+
+    Each frame is kept as an array of cell ids; the next frame only rewrites
+    the cells that changed (runs of them, one cursor move each), and frames
+    arriving faster than `max_fps` are skipped. Anything else printed into
+    the chart's rows is overwritten only where the chart changes, so call
+    `invalidate()` after printing over it.
+
+    Candles and trades are kept in bounded `History` containers: the newest
+    `history_limit` in memory, older ones spilled to `spill_path` (or dropped).
+    """
+
+    def __init__(self, max_candles=20, height=10, max_fps=10, top=1, history_limit=5000, spill_path=None):
+        """
+        :param max_candles: candles shown (columns)
+        :param height: chart rows
+        :param max_fps: most frames drawn per second; render() calls beyond that are dropped
+        :param top: terminal row of the chart's first line, so several charts can be stacked
+        :param history_limit: candles (and trades) kept in memory
+        :param spill_path: file older candles are moved to; trades go to `spill_path`.trades
+        """
+        self.history = History(max(history_limit, max_candles), CANDLE_FIELDS,
+                               dtypes={"timestamp": np.int64}, spill_path=spill_path)
+        self.history_trades = History(history_limit, ("index", "side"),
+                                      dtypes={"index": np.int64, "side": np.int8},
+                                      spill_path=f"{spill_path}.trades" if spill_path else None)
         self.max_candles = max_candles
         self.height = height
+        self.min_frame_interval = 1.0 / max_fps if max_fps else 0.0
+        self.top = top
+        self._prev = None          # cell ids of the last frame drawn
+        self._prev_status = None
+        self._last_frame = 0.0
 
     def add_candle(self, candle):
-        self.history.append(candle)
-        self.candles.append(candle)
-        print("Candle added to builder:", candle)
-        if len(self.candles) > self.max_candles:
-            self.candles.pop(0)
+        self.history.append(**{f: candle.get(f, 0) for f in CANDLE_FIELDS})
+
+    def update_candle(self, candle):
+        """Replace the newest candle (e.g. while its bar is still forming)."""
+        self.history.update_last(**{f: candle[f] for f in CANDLE_FIELDS if f in candle})
 
     def add_trade(self, index, side):
-        trade = {"index": index, "side": side}
-        self.history_trades.append(trade)
-        if index >= len(self.history) - self.max_candles:
-            display_index = index - (len(self.history) - self.max_candles)
-            self.trades.append({"index": display_index, "side": side})
+        """Mark a trade on the candle with global index `index` (trades must come in index order)."""
+        self.history_trades.append(index=index, side=1 if side == "buy" else -1)
+
+    def _recent_trades(self, start, stop):
+        """(index, side) arrays of in-memory trades with start <= index < stop."""
+        index = self.history_trades.column("index")
+        lo, hi = np.searchsorted(index, [start, stop])
+        return index[lo:hi], self.history_trades.column("side")[lo:hi]
+
+    def trades_at(self, index):
+        """Sides of the trades marked on candle `index`."""
+        _, sides = self._recent_trades(index, index + 1)
+        return ["buy" if s > 0 else "sell" for s in sides]
+
+    @property
+    def trades(self):
+        """Trade markers in the visible window, by column."""
+        start = len(self.history) - len(self.history.column("close", self.max_candles))
+        index, sides = self._recent_trades(start, len(self.history))
+        return [{"index": int(i) - start, "side": "buy" if s > 0 else "sell"} for i, s in zip(index, sides)]
 
     def _get_scaled_heights(self):
-        closes = [c["close"] for c in self.candles]
-        highs = [c["high"] for c in self.candles]
-        lows = [c["low"] for c in self.candles]
-        max_price = max(highs)
-        min_price = min(lows)
+        """Chart rows of each visible candle's open/close/high/low, as arrays, plus its direction (-1, 0, 1)."""
+        n = self.max_candles
+        opens, highs = self.history.column("open", n), self.history.column("high", n)
+        lows, closes = self.history.column("low", n), self.history.column("close", n)
+        max_price = highs.max()
+        min_price = lows.min()
         scale = max_price - min_price if max_price != min_price else 1
+        to_row = lambda prices: ((prices - min_price) / scale * (self.height - 1)).astype(int)
+        return {
+            "open_row": to_row(opens),
+            "high_row": to_row(highs),
+            "low_row": to_row(lows),
+            "close_row": to_row(closes),
+            "direction": np.sign(closes - opens).astype(int),
+        }
 
-        heights = []
-        for c in self.candles:
-            open_row = int((c["open"] - min_price) / scale * (self.height - 1))
-            close_row = int((c["close"] - min_price) / scale * (self.height - 1))
-            high_row = int((c["high"] - min_price) / scale * (self.height - 1))
-            low_row = int((c["low"] - min_price) / scale * (self.height - 1))
-            heights.append({
-                "open_row": open_row,
-                "close_row": close_row,
-                "high_row": high_row,
-                "low_row": low_row,
-                "color": Fore.GREEN if c["close"] > c["open"] else Fore.RED if c["close"] < c["open"] else Fore.YELLOW
-            })
-        return heights
-
-    def render(self):
-        os.system('cls' if os.name == 'nt' else 'clear')
-
-        heights = self._get_scaled_heights()
-        rows = [[" "]*len(heights) for _ in range(self.height)]
-
-        for col, h in enumerate(heights):
-            top = max(h["open_row"], h["close_row"])
-            bottom = min(h["open_row"], h["close_row"])
-            for row in range(bottom, top+1):
-                rows[self.height - 1 - row][col] = h["color"] + "█" + Style.RESET_ALL
-            for row in range(top+1, h["high_row"]+1):
-                rows[self.height - 1 - row][col] = h["color"] + "│" + Style.RESET_ALL
-            for row in range(h["low_row"], bottom):
-                rows[self.height - 1 - row][col] = h["color"] + "│" + Style.RESET_ALL
-
-        for t in self.trades:
-            if 0 <= t["index"] < len(heights):
-                col = t["index"]
-                rows[0][col] = Fore.CYAN + ("B" if t["side"]=="buy" else "S") + Style.RESET_ALL
+    def _frame(self):
+        """Cell ids, top row first."""
+        h = self._get_scaled_heights()
+        top = np.maximum(h["open_row"], h["close_row"])
+        bottom = np.minimum(h["open_row"], h["close_row"])
+        row = np.arange(self.height - 1, -1, -1)[:, None]   # chart row of each screen line
 
-        for row in rows:
-            print("".join(row))
+        kind = np.full((self.height, len(top)), BLANK)
+        kind[((row > top) & (row <= h["high_row"])) | ((row >= h["low_row"]) & (row < bottom))] = WICK
+        kind[(row >= bottom) & (row <= top)] = BODY
+        frame = kind * 3 + (h["direction"] + 1)
 
-        closes = [str(c["close"]) for c in self.candles]
-        print("Closes:", " ".join(closes))
-        print("-"*40)
+        for t in self.trades:
+            if 0 <= t["index"] < frame.shape[1]:
+                frame[0, t["index"]] = (BUY if t["side"] == "buy" else SELL) * 3
+        return frame
+
+    def render(self, force=False):
+        """
+        Draw the chart, rewriting only cells that changed since the last frame.
+
+        :param force: draw even if the frame-rate cap says to skip
+        :return: False if the frame was skipped
+        """
+        now = time.monotonic()
+        if not len(self.history) or (not force and now - self._last_frame < self.min_frame_interval):
+            return False
+        self._last_frame = now
+
+        frame = self._frame()
+        out = []
+        if self._prev is None or self._prev.shape != frame.shape:
+            for r, cells in enumerate(frame):
+                out.append(_move(self.top + r, 1) + "".join(GLYPHS[c] for c in cells) + "\x1b[K")
+            out.append(_move(self.top + self.height + 1, 1) + "-" * 40 + "\x1b[K")
+        else:
+            rows, cols = np.nonzero(frame != self._prev)
+            i = 0
+            while i < len(rows):
+                j = i
+                while j + 1 < len(rows) and rows[j + 1] == rows[i] and cols[j + 1] == cols[j] + 1:
+                    j += 1
+                cells = frame[rows[i], cols[i]:cols[j] + 1]
+                out.append(_move(self.top + rows[i], cols[i] + 1) + "".join(GLYPHS[c] for c in cells))
+                i = j + 1
+        self._prev = frame
+
+        n = self.max_candles
+        status = f"Close: {self.history.column('close', n)[-1]}  High: {self.history.column('high', n).max()}  " \
+                 f"Low: {self.history.column('low', n).min()}"
+        if status != self._prev_status:
+            out.append(_move(self.top + self.height, 1) + status + "\x1b[K")
+            self._prev_status = status
+
+        out.append(_move(self.top + self.height + 2, 1))  # park the cursor below the chart
+        sys.stdout.write("".join(out))
+        sys.stdout.flush()
+        return True
+
+    def invalidate(self):
+        """Redraw everything on the next frame (e.g. after other output scrolled the screen)."""
+        self._prev = None
+        self._prev_status = None
 
 '''if __name__ == "__main__":
     display = ConsoleDisplay(max_candles=20, height=10)
@@ -96,7 +200,7 @@ class ConsoleDisplay:
         display.render()
         time.sleep(0.1)
 
-    for i, candle in enumerate(display.history):
-        trades_here = [t for t in display.history_trades if t['index'] == i]
-        print(f"Candle {i}: Close={candle['close']}, Trades: {[t['side'] for t in trades_here]}")
+    for i in range(display.history.first_index, len(display.history)):
+        candle = display.history.row(i)
+        print(f"Candle {i}: Close={candle['close']}, Trades: {display.trades_at(i)}")
 '''
@@ -1,10 +1,13 @@
 import time
+import numpy as np
 import pandas as pd
 from collections import deque
 from display import ConsoleDisplay
 from candles import BuildCandles
-from ta.volatility import BollingerBands, AverageTrueRange
 import api
+from shared import indicators
+from shared.profiling import get_profiler
+from shared.metrics_server import BotMetrics, serve_metrics
 
 # ##########################
 # Strategy: SMA + Bollinger + ATR
@@ -19,24 +22,22 @@ class ARIMA:
         if len(df) < self.long_window:
             return 0
 
-        close = df['close']
+        close = np.asarray(df['close'], dtype=float)
+        high = np.asarray(df['high'], dtype=float)
+        low = np.asarray(df['low'], dtype=float)
 
         # Bollinger Bands
-        bb = BollingerBands(close=close, window=self.long_window, window_dev=2)
-        df["bb_middle"] = bb.bollinger_mavg()
-        df["bb_upper"] = bb.bollinger_hband()
-        df["bb_lower"] = bb.bollinger_lband()
+        bb_middle, bb_upper, bb_lower = indicators.bollinger(close, self.long_window, 2)
 
         # ATR
-        atr = AverageTrueRange(high=df['high'], low=df['low'], close=close, window=self.long_window)
-        df['atr'] = atr.average_true_range()
-        latest_atr = df['atr'].iloc[-1]
+        atr = indicators.atr(high, low, close, self.long_window)
+        latest_atr = atr[-1]
 
         sma_short = close[-self.short_window:].mean()
         sma_long = close[-self.long_window:].mean()
-        latest_close = close.iloc[-1]
-        bb_upper = df["bb_upper"].iloc[-1]
-        bb_lower = df["bb_lower"].iloc[-1]
+        latest_close = close[-1]
+        bb_upper = bb_upper[-1]
+        bb_lower = bb_lower[-1]
 
         threshold = 1.5 * latest_atr
 
@@ -61,16 +62,55 @@ class TraderBot:
         self.symbol = symbol
         self.trade_size = trade_size
         self.display = display
+        self.profiler = get_profiler()
+        self.metrics = BotMetrics(f"Daniel-{symbol}")
+        self.position = 0.0  # net units bought by this bot
 
-    def run(self, interval=20):
+    def run(self, interval=20, profile_every=15, poll_interval=1.0):
+        """
+        Trade forever, one cycle every `interval` seconds.
+
+        :param profile_every: print the per-stage timing table every this many cycles (0 = never)
+        :param poll_interval: seconds between price ticks fed to the candle builder between cycles
+        """
         print(f"Starting trading bot for {self.symbol} with interval {interval}s...\n")
+        self.metrics.loop_budget = interval
+        serve_metrics(self.metrics)  # only listens when METRICS_PORT is set
+        cycles = 0
         while True:
-            # Fetch the latest candle every 20 seconds
+            with self.metrics.iteration(), self.profiler.span("cycle", self.symbol):
+                self._cycle()
+            cycles += 1
+            if profile_every and cycles % profile_every == 0:
+                print(self.profiler.report(reset=True))
+
+            self._collect_ticks(interval, poll_interval)
+
+    def _collect_ticks(self, duration, poll_interval):
+        """Poll the price every `poll_interval` seconds for `duration` seconds."""
+        deadline = time.monotonic() + duration
+        while True:
+            with self.profiler.span("tick", self.symbol):
+                try:
+                    self.builder.poll()
+                except Exception as e:
+                    print(f"Price poll failed: {e}")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(poll_interval, remaining))
+
+    def _cycle(self):
+        # Fetch the latest candle every 20 seconds
+        with self.profiler.span("candles", self.symbol):
             candles = self.builder.get_candles()
-            print(f"Candles fetched: {len(candles)}")
+        print(f"Candles fetched: {len(candles)}")
 
+        with self.profiler.span("signal", self.symbol):
             signal = self.strategy.generate_signal(candles)
+        self.metrics.signal(self.symbol, {1: "buy", -1: "sell"}.get(signal))
 
+        with self.profiler.span("trade", self.symbol):
             if signal == 1:
                 trade = self.api.trade(self.symbol, "buy", self.trade_size)
                 print(f"BUY executed at {trade['price']}")
@@ -79,8 +119,10 @@ class TraderBot:
                 print(f"SELL executed at {trade['price']}")
             else:
                 print("HOLD")
-
-            time.sleep(interval)
+                return
+        self.position += self.trade_size if signal == 1 else -self.trade_size
+        self.metrics.trade(self.symbol, "buy" if signal == 1 else "sell")
+        self.metrics.position(self.symbol, self.position)
 
 
 # ##########################
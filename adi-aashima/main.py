@@ -1,11 +1,23 @@
+import sys
 import time
-import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
 from concurrent.futures import ThreadPoolExecutor
 import traydner_lib as td
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.candle_store import CandleStore
+from shared.candle_arrays import decode_history
+from shared.streaming import EMA, RSI, feed_candles
+from shared.ledger import Ledger
+from shared.event_log import EventLogger
+from shared.state_journal import StateJournal
+from shared.profiling import get_profiler
+from shared.metrics_server import BotMetrics, serve_metrics
+
 # === CONFIGURATION ===
 SYMBOLS = ["BTC", "ETH", "SOL"]  # add more symbols as needed
 MARKET = "crypto"
@@ -20,88 +32,119 @@ CAPITAL_FRACTION = 0.1
 STOP_LOSS_PCT = 0.02
 TAKE_PROFIT_PCT = 0.04
 LOG_FILE = "trade_log.jsonl"
+STATE_FILE = "state.json"
+LOG_MAX_BYTES = 20 * 1024 * 1024  # rotate the event log at this size, keeping gzipped backups
+CANDLE_CACHE_DIR = "candle_cache"
+LEDGER_RECONCILE_SECONDS = 15*60  # re-check the local ledger against /balance this often
 MAX_THREADS = 5
+PROFILE_LOG_CYCLES = 1  # write the per-stage timing summary to the log every N cycles
 
 # === STATE ===
 state = {s: {"position": 0, "entry_price": None, "last_signal": None} for s in SYMBOLS}
+# every change to `state` goes through the journal: appended as one line, compacted into STATE_FILE now and then
+state_journal = StateJournal(STATE_FILE, state)
+candle_store = CandleStore(td.symbol_history, cache_dir=CANDLE_CACHE_DIR)
+# cash and holdings, updated locally after each trade instead of re-fetching the balance
+ledger = Ledger(td.account_balance, reconcile_interval=LEDGER_RECONCILE_SECONDS)
+# events are queued and written in batches by a background thread
+event_log = EventLogger(LOG_FILE, max_bytes=LOG_MAX_BYTES, compress=True)
+# per-stage, per-symbol timings of trade_logic
+profiler = get_profiler()
+# served on /metrics when METRICS_PORT is set
+bot_metrics = BotMetrics("adi-aashima", loop_budget=POLL_INTERVAL)
+
+def new_indicators():
+    return {"ema_fast": EMA(EMA_FAST), "ema_slow": EMA(EMA_SLOW), "rsi": RSI(RSI_PERIOD, method="simple"),
+            "prev_fast": None, "prev_slow": None, "last_ts": None, "count": 0}
 
-def save_state():
-    with open("state.json", "w") as f:
-        json.dump(state, f)
+# streaming indicator state per symbol, fed only the candles it has not seen yet
+indicators = {s: new_indicators() for s in SYMBOLS}
 
 def load_state():
-    global state
-    try:
-        with open("state.json") as f:
-            state.update(json.load(f))
-    except FileNotFoundError:
-        pass
+    state_journal.load()
 
 def log_event(symbol: str, event_type: str, data: dict):
-    entry = {"time": datetime.now().isoformat(), "symbol": symbol, "event": event_type, **data}
-    with open(LOG_FILE, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    with profiler.span("log", symbol):
+        event_log.log({"time": datetime.now().isoformat(), "symbol": symbol, "event": event_type, **data})
 
 def fetch_candles(symbol: str, resolution: str, limit: int = 100):
-    data = td.symbol_history(symbol, resolution, limit)
-    if not data or "history" not in data:
+    data = candle_store.get_history(symbol, resolution, limit)
+    if not data or not data.get("history"):
         log_event(symbol, "error", {"msg": "Failed to fetch candles"})
         return None
-    df = pd.DataFrame(data["history"])
+    try:
+        columns = decode_history(data["history"])
+    except (KeyError, TypeError, ValueError) as e:
+        log_event(symbol, "error", {"msg": f"Invalid candles: {e}"})
+        return None
+    df = pd.DataFrame(columns)
     df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
     df.set_index("timestamp", inplace=True)
     return df
 
-def compute_ema(df: pd.DataFrame, span: int):
-    return df["close"].ewm(span=span, adjust=False).mean()
+def update_indicators(symbol: str, df: pd.DataFrame):
+    """Feeds candles not seen yet into the symbol's streaming EMAs and RSI (O(1) per candle)."""
+    ind = indicators[symbol]
+    timestamps = df.index.asi8.tolist()
+    closes = df["close"].tolist()
+    if ind["last_ts"] is not None and timestamps and timestamps[0] > ind["last_ts"]:
+        # gap since the last cycle; start over from this window
+        ind = indicators[symbol] = new_indicators()
+
+    def update(i):
+        ind["prev_fast"], ind["prev_slow"] = ind["ema_fast"].value, ind["ema_slow"].value
+        ind["ema_fast"].update(closes[i])
+        ind["ema_slow"].update(closes[i])
+        ind["rsi"].update(closes[i])
+        ind["count"] += 1
 
-def compute_rsi(df: pd.DataFrame, period: int):
-    delta = df["close"].diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(period).mean()
-    avg_loss = loss.rolling(period).mean()
-    rs = avg_gain / (avg_loss + 1e-10)
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    def revise(i):
+        ind["ema_fast"].revise(closes[i])
+        ind["ema_slow"].revise(closes[i])
+        ind["rsi"].revise(closes[i])
+
+    ind["last_ts"] = feed_candles(timestamps, ind["last_ts"], update, revise)
+    return ind
 
 def get_signal(symbol, df: pd.DataFrame) -> Optional[str]:
-    if len(df) < max(EMA_SLOW, RSI_PERIOD):
+    ind = update_indicators(symbol, df)
+    if ind["count"] < max(EMA_SLOW, RSI_PERIOD) or ind["rsi"].value is None:
         return None
-    df["ema_fast"] = compute_ema(df, EMA_FAST)
-    df["ema_slow"] = compute_ema(df, EMA_SLOW)
-    df["rsi"] = compute_rsi(df, RSI_PERIOD)
 
-    last = df.iloc[-1]
-    prev = df.iloc[-2]
+    fast, slow, rsi = ind["ema_fast"].value, ind["ema_slow"].value, ind["rsi"].value
+    prev_fast, prev_slow = ind["prev_fast"], ind["prev_slow"]
 
-    print(f"{symbol} | EMA_FAST={last['ema_fast']:.2f} EMA_SLOW={last['ema_slow']:.2f} RSI={last['rsi']:.2f}")
+    print(f"{symbol} | EMA_FAST={fast:.2f} EMA_SLOW={slow:.2f} RSI={rsi:.2f}")
 
     # Long: EMA fast crosses above EMA slow AND RSI not overbought
-    if prev["ema_fast"] <= prev["ema_slow"] and last["ema_fast"] > last["ema_slow"] and last["rsi"] < RSI_OVERBOUGHT:
+    if prev_fast <= prev_slow and fast > slow and rsi < RSI_OVERBOUGHT:
         return "buy"
     # Short: EMA fast crosses below EMA slow AND RSI not oversold
-    elif prev["ema_fast"] >= prev["ema_slow"] and last["ema_fast"] < last["ema_slow"] and last["rsi"] > RSI_OVERSOLD:
+    elif prev_fast >= prev_slow and fast < slow and rsi > RSI_OVERSOLD:
         return "sell"
     return None
 
-MIN_QTY = 1e-6  # adjust according to API minimum
+def signals_from_arrays(fast: np.ndarray, slow: np.ndarray, rsi: np.ndarray,
+                        oversold: float = RSI_OVERSOLD, overbought: float = RSI_OVERBOUGHT,
+                        warmup: int = max(EMA_SLOW, RSI_PERIOD)) -> np.ndarray:
+    """get_signal over whole indicator arrays at once: +1 buy, -1 sell, 0 none (for backtests)."""
+    crossed_up = np.zeros(len(fast), dtype=bool)
+    crossed_down = np.zeros(len(fast), dtype=bool)
+    crossed_up[1:] = (fast[:-1] <= slow[:-1]) & (fast[1:] > slow[1:])
+    crossed_down[1:] = (fast[:-1] >= slow[:-1]) & (fast[1:] < slow[1:])
+    signals = np.zeros(len(fast), dtype=np.int8)
+    signals[crossed_up & (rsi < overbought)] = 1
+    signals[crossed_down & (rsi > oversold)] = -1
+    signals[:warmup - 1] = 0
+    return signals
 
-def qty_from_balance(symbol: str, side: str):
-    price_info = td.symbol_price(symbol)
-    if not price_info:
-        return 0
-    price = price_info["price"]
-    bal = td.account_balance()
-    if not bal:
-        return 0
+MIN_QTY = 1e-6  # adjust according to API minimum
 
+def qty_from_balance(symbol: str, side: str, price: float):
     if side == "buy":
-        cash = bal.get("cash", 0)
-        qty = (cash * CAPITAL_FRACTION) / price
+        qty = (ledger.cash * CAPITAL_FRACTION) / price
     elif side == "sell":
-        holding = bal.get(MARKET, {}).get(symbol, 0)
-        qty = holding  # sell full holding for TP/SL
+        qty = ledger.holding(symbol, MARKET)  # sell full holding for TP/SL
     else:
         return 0
 
@@ -109,6 +152,13 @@ def qty_from_balance(symbol: str, side: str):
         return 0
     return round(qty, 6)
 
+def place_trade(symbol: str, side: str, qty: float, price: float):
+    resp = td.symbol_trade(symbol, side, qty)
+    ledger.apply_trade(symbol, side, qty, price, MARKET, resp)  # None (failed) makes the ledger re-sync
+    if resp:
+        bot_metrics.trade(symbol, side)
+    return resp
+
 def check_stops(symbol: str, price: float):
     st = state[symbol]
     if st["position"] == 0 or not st["entry_price"]:
@@ -120,84 +170,101 @@ def check_stops(symbol: str, price: float):
     if st["position"] == 1:
         if change <= -STOP_LOSS_PCT:
             log_event(symbol, "stop_loss_long", {"price": price, "entry": entry})
-            qty = qty_from_balance(symbol, "sell")
+            qty = qty_from_balance(symbol, "sell", price)
             if qty > 0:
-                td.symbol_trade(symbol, "sell", qty)
-            st.update({"position": 0, "entry_price": None, "last_signal": None})
+                place_trade(symbol, "sell", qty, price)
+            state_journal.update(symbol, {"position": 0, "entry_price": None, "last_signal": None})
         elif change >= TAKE_PROFIT_PCT:
             log_event(symbol, "take_profit_long", {"price": price, "entry": entry})
-            qty = qty_from_balance(symbol, "sell")
+            qty = qty_from_balance(symbol, "sell", price)
             if qty > 0:
-                td.symbol_trade(symbol, "sell", qty)
-            st.update({"position": 0, "entry_price": None, "last_signal": None})
+                place_trade(symbol, "sell", qty, price)
+            state_journal.update(symbol, {"position": 0, "entry_price": None, "last_signal": None})
 
     # short position stop/TP
     elif st["position"] == -1:
         if change >= STOP_LOSS_PCT:
             log_event(symbol, "stop_loss_short", {"price": price, "entry": entry})
-            qty = qty_from_balance(symbol, "buy")
+            qty = qty_from_balance(symbol, "buy", price)
             if qty > 0:
-                td.symbol_trade(symbol, "buy", qty)
-            st.update({"position": 0, "entry_price": None, "last_signal": None})
+                place_trade(symbol, "buy", qty, price)
+            state_journal.update(symbol, {"position": 0, "entry_price": None, "last_signal": None})
         elif change <= -TAKE_PROFIT_PCT:
             log_event(symbol, "take_profit_short", {"price": price, "entry": entry})
-            qty = qty_from_balance(symbol, "buy")
+            qty = qty_from_balance(symbol, "buy", price)
             if qty > 0:
-                td.symbol_trade(symbol, "buy", qty)
-            st.update({"position": 0, "entry_price": None, "last_signal": None})
+                place_trade(symbol, "buy", qty, price)
+            state_journal.update(symbol, {"position": 0, "entry_price": None, "last_signal": None})
 
 def trade_logic(symbol: str):
+    with profiler.span("cycle", symbol):
+        _trade_logic(symbol)
+    bot_metrics.position(symbol, state[symbol]["position"])
+
+def _trade_logic(symbol: str):
     st = state[symbol]
-    status = td.market_status(MARKET)
+    with profiler.span("status", symbol):
+        status = td.market_status(MARKET)
     if not status or not status.get("isOpen", True):
         log_event(symbol, "market_closed", {})
         return
 
-    candles = fetch_candles(symbol, RESOLUTION)
+    with profiler.span("candles", symbol):
+        candles = fetch_candles(symbol, RESOLUTION)
     if candles is None:
         log_event(symbol, "no_candles", {})
         return
 
-    price_info = td.symbol_price(symbol)
+    with profiler.span("price", symbol):
+        price_info = td.symbol_price(symbol)
     if not price_info:
         log_event(symbol, "no_price_info", {})
         return
     price = price_info["price"]
 
-    check_stops(symbol, price)
+    with profiler.span("stops", symbol):
+        check_stops(symbol, price)
 
-    signal = get_signal(symbol, candles)
+    with profiler.span("signal", symbol):
+        signal = get_signal(symbol, candles)
+    bot_metrics.signal(symbol, signal)
     if signal is None or signal == st["last_signal"]:
         log_event(symbol, "no_signals", {})
         return
 
-    qty = qty_from_balance(symbol, "buy" if signal=="buy" else "sell")
+    with profiler.span("sizing", symbol):
+        qty = qty_from_balance(symbol, "buy" if signal=="buy" else "sell", price)
     if qty <= 0:
         log_event(symbol, "invalid_qty", {"qty": qty})
         return
 
-    if signal == "buy" and st["position"] <= 0:
-        td.symbol_trade(symbol, "buy", qty)
-        st.update({"position": 1, "entry_price": price, "last_signal": signal})
-        log_event(symbol, "buy", {"qty": qty, "price": price})
-        print(f"{datetime.now()}: BUY {qty} {symbol} at {price:.2f}")
-    elif signal == "sell" and st["position"] >= 0:
-        td.symbol_trade(symbol, "sell", qty)
-        st.update({"position": -1, "entry_price": price, "last_signal": signal})
-        log_event(symbol, "sell", {"qty": qty, "price": price})
-        print(f"{datetime.now()}: SELL {qty} {symbol} at {price:.2f}")
-
-    save_state()
+    with profiler.span("trade", symbol):
+        if signal == "buy" and st["position"] <= 0:
+            place_trade(symbol, "buy", qty, price)
+            state_journal.update(symbol, {"position": 1, "entry_price": price, "last_signal": signal})
+            log_event(symbol, "buy", {"qty": qty, "price": price})
+            print(f"{datetime.now()}: BUY {qty} {symbol} at {price:.2f}")
+        elif signal == "sell" and st["position"] >= 0:
+            place_trade(symbol, "sell", qty, price)
+            state_journal.update(symbol, {"position": -1, "entry_price": price, "last_signal": signal})
+            log_event(symbol, "sell", {"qty": qty, "price": price})
+            print(f"{datetime.now()}: SELL {qty} {symbol} at {price:.2f}")
 
 def main():
     print(f"Starting EMA+RSI Bot on {SYMBOLS} at {RESOLUTION}")
     load_state()
     log_event("system", "start", {"symbols": SYMBOLS, "resolution": RESOLUTION})
     executor = ThreadPoolExecutor(max_workers=MAX_THREADS)
+    serve_metrics(bot_metrics)
+    cycles = 0
     while True:
-        futures = [executor.submit(trade_logic, sym) for sym in SYMBOLS]
-        for f in futures:
-            f.result()  # wait for completion
+        with bot_metrics.iteration():
+            futures = [executor.submit(trade_logic, sym) for sym in SYMBOLS]
+            for f in futures:
+                f.result()  # wait for completion
+        cycles += 1
+        if cycles % PROFILE_LOG_CYCLES == 0:
+            log_event("system", "profile", profiler.summary(reset=True))
         time.sleep(POLL_INTERVAL)
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+"""
+Parameter sweep for the EMA crossover + RSI bot in main.py.
+
+Backtests combinations of EMA_FAST / EMA_SLOW / STOP_LOSS_PCT /
+TAKE_PROFIT_PCT on the candles main.py has already cached in
+CANDLE_CACHE_DIR, across all CPU cores, and prints a ranked table.
+
+    python sweep.py                  # full grid for every symbol in SYMBOLS
+    python sweep.py --random 5000 --symbols BTC --csv btc_sweep.csv
+"""
+
+import argparse
+
+import main as bot
+from shared import indicators
+from shared.candle_arrays import decode_history
+from shared.candle_store import CandleStore
+from shared.sweep import StrategyFamily, grid, random_search, run_sweep, format_table, save_csv
+
+# Read the whole cache; the store's retention limit is for the live bots
+ALL_CANDLES = 10 ** 9
+
+SEARCH_SPACE = {
+    "ema_fast": [5, 7, 9, 12, 15, 20],
+    "ema_slow": [18, 21, 26, 34, 50, 75, 100],
+    "stop_loss_pct": [0.005, 0.01, 0.02, 0.03, 0.05],
+    "take_profit_pct": [0.01, 0.02, 0.04, 0.06, 0.1],
+}
+INITIAL_CASH = 10_000.0
+RANDOM_SPACE = {
+    "ema_fast": (3, 30),
+    "ema_slow": (10, 150),
+    "stop_loss_pct": (0.002, 0.08),
+    "take_profit_pct": (0.005, 0.15),
+}
+
+
+class EmaRsiFamily(StrategyFamily):
+    """
+    main.get_signal with check_stops. Each EMA and the RSI are computed once
+    per worker and reused by every set with the same period; only the
+    crossover and the stop scan run per set.
+    """
+
+    name = "ema_rsi"
+
+    def group_key(self, params):
+        return params["ema_fast"], params["ema_slow"]
+
+    def signals(self, candles, params, cache):
+        close = candles["close"]
+        fast = cache.get(("ema", params["ema_fast"]), lambda: indicators.ema(close, params["ema_fast"]))
+        slow = cache.get(("ema", params["ema_slow"]), lambda: indicators.ema(close, params["ema_slow"]))
+        rsi = cache.get(("rsi", bot.RSI_PERIOD), lambda: indicators.rsi(close, bot.RSI_PERIOD, method="simple"))
+        return bot.signals_from_arrays(fast, slow, rsi, warmup=max(params["ema_slow"], bot.RSI_PERIOD))
+
+    def backtest_kwargs(self, params):
+        return {"stop_loss_pct": params["stop_loss_pct"], "take_profit_pct": params["take_profit_pct"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep EMA/RSI bot parameters over cached candles.")
+    parser.add_argument("--symbols", nargs="+", default=bot.SYMBOLS)
+    parser.add_argument("--resolution", default=bot.RESOLUTION)
+    parser.add_argument("--random", type=int, metavar="N", help="sample N random sets instead of the grid")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--processes", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--csv", help="write every result to this CSV (symbol name appended)")
+    args = parser.parse_args()
+
+    if args.random:
+        param_sets = random_search(RANDOM_SPACE, args.random, args.seed)
+    else:
+        param_sets = grid(SEARCH_SPACE)
+    param_sets = [p for p in param_sets if p["ema_fast"] < p["ema_slow"]]
+
+    store = CandleStore(fetch_history=None, cache_dir=bot.CANDLE_CACHE_DIR, max_candles=ALL_CANDLES)
+    for symbol in args.symbols:
+        candles = decode_history(store.candles(symbol, args.resolution), fields=("timestamp", "close"))
+        if not len(candles["close"]):
+            print(f"No cached candles for {symbol}@{args.resolution}; run main.py first.")
+            continue
+
+        print(f"\n{symbol}: sweeping {len(param_sets)} parameter sets over {len(candles['close'])} candles...")
+        results = run_sweep(EmaRsiFamily(), param_sets, candles,
+                            processes=args.processes,
+                            # size positions like qty_from_balance: CAPITAL_FRACTION of the starting cash
+                            quantity=bot.CAPITAL_FRACTION * INITIAL_CASH / candles["close"][0],
+                            initial_cash=INITIAL_CASH,
+                            allow_short=True,
+                            resolution=args.resolution)
+        print(format_table(results, top=args.top))
+        if args.csv:
+            path = args.csv.replace(".csv", f"_{symbol}.csv")
+            save_csv(results, path)
+            print(f"Wrote {len(results)} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,107 @@
 import requests
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.transport import get_transport
+from shared.endpoints import api_host
+from shared.coalesce import SingleFlight, request_key
+from shared.market_hours import MarketStatusCache
+from shared.metrics import decode_json
+
 load_dotenv()
 
-API_BASE = "https://traydner-186649552655.us-central1.run.app/"
+API_BASE = api_host() + "/"  # TRAYDNER_BASE_URL overrides the live API (e.g. a local mock server)
 API_KEY = os.getenv("API_KEY")
+HEADERS = {"Authorization": f"Bearer {API_KEY}"}
+
+# Identical GETs from the symbol threads (and repeats within one trade_logic
+# pass) share one request; results linger this many seconds.
+COALESCE_WINDOW = 1.0
+_flight = SingleFlight(linger=COALESCE_WINDOW)
+
+def set_base_url(base_url):
+    global API_BASE
+    API_BASE = api_host(base_url) + "/"
+
+def _fetch(path, params=None):
+    transport = get_transport()
+    response = transport.get(API_BASE + path, headers=HEADERS, params=params)
+    response.raise_for_status()
+    return decode_json(response, transport.metrics)
+
+def _get(path, params=None):
+    fetched = []
+    def fetch():
+        fetched.append(True)
+        return _fetch(path, params)
+    result = _flight.do(request_key(path, params), fetch)
+    if not fetched:
+        get_transport().metrics.cache_hit(path)
+    return result
+
+def _post(path, params=None):
+    transport = get_transport()
+    response = transport.post(API_BASE + path, headers=HEADERS, params=params)
+    _flight.forget(endpoint="api/remote/balance")  # a trade changes the balance
+    response.raise_for_status()
+    return decode_json(response, transport.metrics)
+
+def coalescing_stats():
+    return _flight.stats()
 
 def symbol_price(symbol):
     try:
-        response = requests.get(API_BASE + f"api/remote/price?symbol={symbol}", headers={"Authorization": f"Bearer {API_KEY}"}, timeout=15)
-        response.raise_for_status()
-        return response.json()
+        return _get("api/remote/price", {"symbol": symbol})
     except requests.exceptions.RequestException as e:
         print(f"Error fetching price for symbol {symbol}: {e}")
         return None
     
 def symbol_trade(symbol, side, quantity):
     try:
-        response = requests.post(API_BASE + f"api/remote/trade?symbol={symbol}&side={side}&quantity={quantity}", headers={"Authorization": f"Bearer {API_KEY}"}, timeout=15)
-        response.raise_for_status()
-        return response.json()
+        return _post("api/remote/trade", {"symbol": symbol, "side": side, "quantity": quantity})
     except requests.exceptions.RequestException as e:
         print(f"Error executing trade for symbol {symbol} on side {side} at quantity {quantity}: {e}")
         return None
     
 def account_balance():
     try:
-        response = requests.get(API_BASE + f"api/remote/balance", headers={"Authorization": f"Bearer {API_KEY}"}, timeout=15)
-        response.raise_for_status()
-        return response.json()
+        return _get("api/remote/balance")
     except requests.exceptions.RequestException as e:
         print(f"Error fetching account balance: {e}")
         return None
 
-def symbol_history(symbol, resolution, limit=500):
+def symbol_history(symbol, resolution, limit=500, start_ts=None, end_ts=None):
+    params = {"symbol": symbol, "resolution": resolution, "limit": limit}
+    if start_ts is not None:
+        params["start_ts"] = start_ts
+    if end_ts is not None:
+        params["end_ts"] = end_ts
     try:
-        response = requests.get(API_BASE + f"api/remote/history?symbol={symbol}&resolution={resolution}&limit={limit}", headers={"Authorization": f"Bearer {API_KEY}"}, timeout=15)
-        response.raise_for_status()
-        return response.json()
+        return _get("api/remote/history", params)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {limit} candles of symbol {symbol} at resolution {resolution}: {e}")
         return None
 
-def market_status(market):
+def _fetch_market_status(symbol=None, market=None):
+    params = {"symbol": symbol} if symbol else {"market": market}
     try:
-        response = requests.get(API_BASE + f"api/remote/market_status?market={market}", headers={"Authorization": f"Bearer {API_KEY}"}, timeout=15)
-        response.raise_for_status()
-        return response.json()
+        return _get("api/remote/market_status", params)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching market status: {e}")
         return None
+
+# isOpen answers are reused until shortly before the next scheduled open/close
+_market_status_cache = MarketStatusCache(_fetch_market_status)
+
+def market_status(market):
+    cached = _market_status_cache.lookup(market=market)
+    if cached is not None:
+        get_transport().metrics.cache_hit("market_status")
+        return cached
+    return _market_status_cache.store(_fetch_market_status(market=market), market=market)
+
+def metrics_snapshot():
+    return get_transport().metrics.snapshot()
@@ -1,6 +1,19 @@
+import sys
+import time
 import requests
+import numpy as np
+from pathlib import Path
 from requests.exceptions import HTTPError
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.candle_arrays import decode_history, FIELDS
+from shared.endpoints import api_host, timeout_for, Timeout
+from shared.coalesce import SingleFlight, request_key
+from shared.market_hours import MarketStatusCache
+from shared.rate_limit import RateLimiter, RetryPolicy, get_limiter, request_with_retries
+from shared.hedging import Hedger, get_hedger, hedgeable
+from shared.metrics import ClientMetrics, get_metrics, decode_json
 
 class TraydnerAPI:
     """
@@ -10,17 +23,59 @@ class TraydnerAPI:
     of the API endpoints documented.
     """
     
-    def __init__(self, api_key: str):
+    def __init__(self,
+                 api_key: str,
+                 base_url: Optional[str] = None,
+                 coalesce_window: float = 0.5,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 timeouts: Optional[Dict[str, Timeout]] = None,
+                 hedger: Optional[Hedger] = None,
+                 hedge: bool = True,
+                 metrics: Optional[ClientMetrics] = None,
+                 symbol_markets: Optional[Dict[str, str]] = None):
         """
         Initializes the API client.
 
         Args:
             api_key (str): Your API key (Bearer token).
+            base_url (Optional[str]): API host to use instead of production (e.g. a
+                                      local mock server). Defaults to the
+                                      ``TRAYDNER_BASE_URL`` environment variable,
+                                      then the live API.
+            coalesce_window (float): Seconds an identical GET keeps sharing a
+                                     completed response, on top of sharing calls
+                                     that are in flight at the same time (0 to
+                                     only share in-flight calls).
+            rate_limiter (Optional[RateLimiter]): Request budget and priority
+                                                  lanes; defaults to the one
+                                                  shared by every client in the
+                                                  process (``shared.rate_limit``).
+            retry_policy (Optional[RetryPolicy]): Backoff for 429s, 5xx responses
+                                                  and connection errors.
+            timeouts (Optional[Dict[str, Timeout]]): Per-endpoint (connect, read)
+                                                     timeouts on top of
+                                                     ``shared.endpoints.ENDPOINT_TIMEOUTS``,
+                                                     keyed by name (e.g. "history").
+            hedger (Optional[Hedger]): Latency tracker that re-sends GETs slower
+                                       than their endpoint's p95; defaults to the
+                                       process-wide one.
+            hedge (bool): Set to False to never hedge GETs.
+            metrics (Optional[ClientMetrics]): Per-endpoint latency histograms,
+                                               status codes, bytes, decode time,
+                                               retries and cache hits; defaults
+                                               to the process-wide registry.
+            symbol_markets (Optional[Dict[str, str]]): Symbol -> market ("stock",
+                                                       "crypto", "forex") for tickers
+                                                       the status cache cannot place
+                                                       (e.g. {"AAPL": "stock"});
+                                                       holdings in /balance are
+                                                       learned automatically.
         """
         if not api_key:
             raise ValueError("API key is required.")
             
-        self.base_url = "https://traydner-186649552655.us-central1.run.app/api/remote"
+        self.base_url = api_host(base_url) + "/api/remote"
         self._api_key = api_key
         
         # Use a session to persist headers across all requests
@@ -30,6 +85,21 @@ class TraydnerAPI:
             "Accept": "application/json"
         })
 
+        # Identical GETs from several strategies share one network call
+        self._flight = SingleFlight(linger=coalesce_window)
+
+        # Trades pre-empt everything else; 429s and 5xx are retried with backoff
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+
+        # Bounded waits: per-endpoint timeouts, and a second copy of slow GETs
+        self.timeouts = timeouts
+        self.hedger = (hedger or get_hedger()) if hedge else None
+        self.metrics = metrics or get_metrics()
+
+        # isOpen answers are reused until shortly before the next scheduled open/close
+        self.market_status_cache = MarketStatusCache(symbol_markets=symbol_markets)
+
     def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Internal helper method to make API requests.
@@ -53,11 +123,50 @@ class TraydnerAPI:
         else:
             cleaned_params = None
 
+        if method == "GET":
+            fetched = False
+
+            def fetch():
+                nonlocal fetched
+                fetched = True
+                return self._send(method, url, cleaned_params)
+
+            result = self._flight.do(request_key(endpoint, cleaned_params), fetch)
+            if not fetched:
+                self.metrics.cache_hit(endpoint)
+            return result
+
+        try:
+            return self._send(method, url, cleaned_params)
+        finally:
+            if endpoint == "/trade":
+                # The balance may have changed; don't serve a lingering pre-trade copy
+                self._flight.forget(endpoint="/balance")
+
+    def _send(self, method: str, url: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Performs the HTTP request (rate limited, hedged, with retries) and decodes the JSON body."""
+        timeout = timeout_for(url, overrides=self.timeouts)
+
+        def send():
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, params=params, timeout=timeout)
+            except Exception:
+                self.metrics.observe(url, time.perf_counter() - start)
+                raise
+            self.metrics.observe(url, time.perf_counter() - start, response.status_code, len(response.content))
+            return response
+
+        attempt = send
+        if self.hedger is not None and hedgeable(method, params):
+            limiter = self.rate_limiter or get_limiter()
+            attempt = lambda: self.hedger.call(url, send, on_hedge=lambda: limiter.acquire(url))
         try:
-            response = self.session.request(method, url, params=cleaned_params)
+            response = request_with_retries(attempt, method, url, self.rate_limiter, self.retry_policy,
+                                            metrics=self.metrics)
             # Raise an exception for bad status codes (4xx or 5xx)
             response.raise_for_status()
-            return response.json()
+            return decode_json(response, self.metrics)
         except HTTPError as http_err:
             print(f"HTTP error occurred: {http_err} - {response.text}")
             raise
@@ -65,6 +174,37 @@ class TraydnerAPI:
             print(f"An other error occurred: {err}")
             raise
 
+    def coalescing_stats(self) -> Dict[str, Any]:
+        """
+        Returns how many GETs were served by another caller's request.
+
+        Returns:
+            Dict[str, Any]: ``calls``, ``executions`` (network requests),
+            ``coalesced`` and ``coalesced_ratio``.
+        """
+        return self._flight.stats()
+
+    def hedging_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns per-endpoint latency and hedging counters.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Endpoint name to ``requests``, ``hedged``,
+            ``hedge_rate``, ``hedge_wins``, ``p50_ms``, ``p95_ms`` and ``delay_ms``.
+        """
+        return self.hedger.stats() if self.hedger is not None else {}
+
+    def metrics_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns per-endpoint call metrics (see ``shared.metrics.ClientMetrics.snapshot``).
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Endpoint name to request and error counts,
+            status codes, bytes, retries, cache hits, and latency/decode
+            percentiles in milliseconds.
+        """
+        return self.metrics.snapshot()
+
     def get_price(self, symbol: str) -> Dict[str, Any]:
         """
         Fetches the latest price for a given symbol.
@@ -106,7 +246,9 @@ class TraydnerAPI:
         Returns:
             Dict[str, Any]: API response with balance information.
         """
-        return self._request("GET", "/balance")
+        balance = self._request("GET", "/balance")
+        self.market_status_cache.learn_balance(balance)
+        return balance
 
     def get_history(self, 
                     symbol: str, 
@@ -136,12 +278,45 @@ class TraydnerAPI:
         }
         return self._request("GET", "/history", params=params)
 
+    def get_history_arrays(self,
+                           symbol: str,
+                           resolution: str,
+                           start_ts: Optional[int] = None,
+                           end_ts: Optional[int] = None,
+                           limit: Optional[int] = None,
+                           fields: Sequence[str] = FIELDS) -> Dict[str, np.ndarray]:
+        """
+        Fetches candles and decodes them into contiguous NumPy columns.
+
+        Args:
+            symbol (str): Ticker symbol.
+            resolution (str): Time resolution (e.g., "1m", "5m", "1h", "D").
+            start_ts (Optional[int]): Start timestamp (Unix seconds).
+            end_ts (Optional[int]): End timestamp (Unix seconds).
+            limit (Optional[int]): Max number of candles (1-5000, default 500).
+            fields (Sequence[str]): Columns to decode (default: all OHLCV + timestamp).
+
+        Returns:
+            Dict[str, np.ndarray]: Column name to array, oldest candle first.
+            Timestamps are int64 Unix seconds; prices and volume are float64.
+
+        Raises:
+            KeyError, TypeError, ValueError: If the candles fail validation
+            (see ``shared.candle_arrays.decode_history``).
+        """
+        data = self.get_history(symbol, resolution, start_ts=start_ts, end_ts=end_ts, limit=limit)
+        return decode_history(data.get('history') or [], fields)
+
     def get_market_status(self, 
                           symbol: Optional[str] = None, 
                           market: Optional[str] = None) -> Dict[str, bool]:
         """
         Returns the market status (open or closed).
 
+        Answers come from ``market_status_cache`` while the trading-hours
+        calendar says they cannot have changed; the API is only asked again
+        near a scheduled open or close (or when it contradicted the calendar).
+
         Args:
             symbol (Optional[str]): Ticker symbol. Takes precedence over 'market'.
             market (Optional[str]): Market type ("stock", "crypto", "forex").
@@ -152,8 +327,9 @@ class TraydnerAPI:
         if not symbol and not market:
             raise ValueError("Either 'symbol' or 'market' must be provided.")
             
-        params = {
-            "symbol": symbol,
-            "market": market
-        }
-        return self._request("GET", "/market_status", params=params)
+        cached = self.market_status_cache.lookup(symbol, market)
+        if cached is not None:
+            self.metrics.cache_hit("/market_status")
+            return cached
+        response = self._request("GET", "/market_status", params={"symbol": symbol, "market": market})
+        return self.market_status_cache.store(response, symbol, market)
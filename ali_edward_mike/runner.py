@@ -0,0 +1,210 @@
+"""
+Runs N strategies over M symbols from one market-data fetch per cycle.
+
+Each strategy used to call ``get_signal()`` itself, which fetched the
+market status, history and price on its own. The same symbol was therefore
+downloaded once per strategy. ``StrategyRunner`` groups what the due
+strategies need and fetches, concurrently:
+
+* one market status per symbol (usually cached);
+* for the symbols whose market is open, one price per symbol and one
+  history per (symbol, resolution), long enough for the most demanding
+  consumer (``history_limit()``).
+
+It then hands the results to each strategy's ``evaluate``. The cost of a
+cycle grows with the number of distinct symbols and resolutions, not with
+the number of strategies.
+
+    config = {
+        "MeanReversionTrader": {"symbols": ["BTC", "ETH"], "resolution": "1m", "quantity": 0.01,
+                                "poll_interval": 60, "mean_period": 20, "std_dev_multiplier": 2.0},
+        "MomentumTrader": {"symbols": ["BTC", "ETH"], "resolution": "1h", "quantity": 0.01,
+                           "poll_interval": 3600, "rsi_period": 12},
+    }
+    runner = StrategyRunner(client, build_traders(client, config))
+    runner.run()
+"""
+
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from TraydnerAPI import TraydnerAPI
+import strategies
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.candle_store import CandleStore
+from shared.metrics_server import BotMetrics
+
+# Keys of a config entry that configure the runner rather than the strategy
+RUNNER_KEYS = ("symbol", "symbols", "quantity", "poll_interval")
+
+
+class Trader:
+    """One strategy instance on one symbol, with its trade size and schedule."""
+
+    def __init__(self, name: str, strategy: Any, quantity: float, poll_interval: float):
+        self.name = name
+        self.strategy = strategy
+        self.symbol = strategy.symbol
+        self.resolution = strategy.resolution
+        self.quantity = quantity
+        self.poll_interval = poll_interval
+        self.last_check = 0.0
+
+    def due(self, now: float) -> bool:
+        return now - self.last_check >= self.poll_interval
+
+
+def build_traders(client: TraydnerAPI,
+                  config: Dict[str, Dict[str, Any]],
+                  candle_store: Optional[CandleStore] = None) -> List[Trader]:
+    """
+    Instantiates every strategy in ``config`` once per symbol.
+
+    Args:
+        client (TraydnerAPI): Shared API client.
+        config (Dict[str, Dict[str, Any]]): Strategy class name (from ``strategies``)
+                                            to its parameters. ``symbols`` (or a
+                                            single ``symbol``), ``quantity`` and
+                                            ``poll_interval`` are for the runner;
+                                            everything else is passed to the class.
+        candle_store (Optional[CandleStore]): Passed to every strategy.
+
+    Returns:
+        List[Trader]: One per (strategy, symbol).
+    """
+    traders = []
+    for name, params in config.items():
+        cls = getattr(strategies, name)
+        symbols = params.get("symbols") or [params["symbol"]]
+        kwargs = {k: v for k, v in params.items() if k not in RUNNER_KEYS}
+        for symbol in symbols:
+            strategy = cls(client=client, symbol=symbol, candle_store=candle_store, **kwargs)
+            traders.append(Trader(name, strategy, params["quantity"], params["poll_interval"]))
+    return traders
+
+
+class StrategyRunner:
+    """Fetches shared market data once per cycle and fans it out to every due strategy."""
+
+    def __init__(self,
+                 client: TraydnerAPI,
+                 traders: List[Trader],
+                 candle_store: Optional[CandleStore] = None,
+                 metrics: Optional[BotMetrics] = None,
+                 execute: bool = True,
+                 max_workers: int = 8):
+        """
+        Args:
+            client (TraydnerAPI): Used for status, prices and trades.
+            traders (List[Trader]): From ``build_traders``.
+            candle_store (Optional[CandleStore]): History source; the client if None.
+            metrics (Optional[BotMetrics]): Receives iterations, signals and trades.
+            execute (bool): Place trades for BUY/SELL signals; False only reports them.
+            max_workers (int): Concurrent requests per cycle.
+        """
+        self.client = client
+        self.traders = traders
+        self.history_source = candle_store or client
+        self.metrics = metrics
+        self.execute = execute
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="runner")
+
+    def _fetch(self, due: List[Trader]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[Tuple[str, str], Any]]:
+        """
+        Status per symbol, then price per open symbol and history per open
+        (symbol, resolution); failures map to exceptions.
+        """
+        def gather(futures):
+            results = {}
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    results[key] = e
+            return results
+
+        # Statuses are usually cached, so this round is cheap; closed markets
+        # (e.g. stocks over a weekend) then skip price and history entirely.
+        symbols = sorted({t.symbol for t in due})
+        status = gather({s: self.pool.submit(self.client.get_market_status, symbol=s) for s in symbols})
+        open_symbols = {s for s, st in status.items()
+                        if not isinstance(st, Exception) and st.get("isOpen", False)}
+
+        limits: Dict[Tuple[str, str], int] = {}
+        for t in due:
+            if t.symbol in open_symbols:
+                key = (t.symbol, t.resolution)
+                limits[key] = max(limits.get(key, 0), t.strategy.history_limit())
+        prices = {s: self.pool.submit(self.client.get_price, s) for s in sorted(open_symbols)}
+        history = {key: self.pool.submit(self.history_source.get_history,
+                                         symbol=key[0], resolution=key[1], limit=limit)
+                   for key, limit in limits.items()}
+        return status, gather(prices), gather(history)
+
+    def run_once(self, now: Optional[float] = None) -> Dict[Tuple[str, str], str]:
+        """
+        Checks every due trader against one shared fetch and acts on the signals.
+
+        Returns:
+            Dict[Tuple[str, str], str]: (strategy name, symbol) to signal.
+        """
+        now = time.time() if now is None else now
+        due = [t for t in self.traders if t.due(now)]
+        if not due:
+            return {}
+        status, prices, history = self._fetch(due)
+
+        signals = {}
+        for t in due:
+            print(f"\n[{time.ctime()}] Checking {t.name} for {t.symbol}...")
+            s = status[t.symbol]
+            if isinstance(s, Exception):
+                print(f"API Error during check: {s}")
+                continue
+            is_open = s.get("isOpen", False)
+            p, h = prices.get(t.symbol), history.get((t.symbol, t.resolution))
+            failed = next((d for d in (p, h) if isinstance(d, Exception)), None)
+            if failed is not None:
+                print(f"API Error during check: {failed}")
+                continue
+            signal = t.strategy.evaluate(h, p.get("price") if p else None, is_open=is_open)
+            signals[(t.name, t.symbol)] = signal
+            t.last_check = now
+            if self.metrics is not None:
+                self.metrics.signal(t.symbol, signal)
+            if signal in ("BUY", "SELL") and self.execute:
+                self._trade(t, signal.lower())
+            elif signal == "HOLD":
+                print("--- No trade executed. ---")
+        return signals
+
+    def _trade(self, trader: Trader, side: str) -> None:
+        print(f"--- Executing {side.upper()} of {trader.quantity} {trader.symbol} ---")
+        try:
+            response = self.client.execute_trade(trader.symbol, side, trader.quantity)
+        except Exception as e:
+            print(f"Trade failed: {e}")
+            return
+        print(f"Trade Response: {response}")
+        if self.metrics is not None:
+            self.metrics.trade(trader.symbol, side)
+
+    def run(self, sleep: float = 5.0) -> None:
+        """Checks due traders every ``sleep`` seconds until interrupted."""
+        print(f"Running {len(self.traders)} traders on "
+              f"{len({t.symbol for t in self.traders})} symbols.")
+        while True:
+            start = time.perf_counter()
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+                traceback.print_exc()
+            if self.metrics is not None:
+                self.metrics.record_iteration(time.perf_counter() - start)
+            time.sleep(sleep)
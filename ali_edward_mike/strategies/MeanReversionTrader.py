@@ -1,26 +1,44 @@
-# (Place in its own cell)
-# Assumes the 'TraydnerAPI' class is defined/imported in a previous cell.
+# Mean Reversion Trading Strategy using Bollinger Bands
+# Imported through the strategies package; it locates the repo root from
+# __file__, so it cannot be pasted into a notebook cell.
 
 import math
+import sys
 import traceback 
+import numpy as np
+from pathlib import Path
 from requests.exceptions import HTTPError
 from typing import Optional, Dict, Any, List, Tuple
 from TraydnerAPI import TraydnerAPI
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for the shared package
+from shared.candle_arrays import decode_history
+from shared.streaming import Bollinger, feed_candles
+from shared import indicators
+from shared.backtest import run_backtest, BUY, SELL, HOLD
+
 class MeanReversionTrader:
     """
     Implements a mean reversion trading strategy (using Bollinger Bands)
     by consuming a TraydnerAPI client.
     
     This class is responsible for SIGNAL GENERATION, not execution.
+
+    The bands are maintained incrementally: the first check downloads the
+    full ``mean_period`` window, later checks only fetch the newest
+    ``TAIL_CANDLES`` candles and fold them into the running statistics.
     """
+
+    # Candles fetched per check once the bands are warm
+    TAIL_CANDLES = 3
     
     def __init__(self, 
                  client: 'TraydnerAPI', # Using forward reference string
                  symbol: str, 
                  resolution: str, 
                  mean_period: int = 20, 
-                 std_dev_multiplier: float = 2.0):
+                 std_dev_multiplier: float = 2.0,
+                 candle_store: Optional['CandleStore'] = None):
         """
         Initializes the mean reversion trader.
 
@@ -31,36 +49,60 @@ class MeanReversionTrader:
             mean_period (int): The lookback period for calculating the mean (SMA).
             std_dev_multiplier (float): The number of standard deviations
                                         to set the upper/lower bands.
+            candle_store (Optional[CandleStore]): If given, history is served from
+                                        this local store, which only downloads
+                                        candles newer than the ones it already has.
         """
         self.client = client
         self.symbol = symbol
         self.resolution = resolution
+        self.candle_store = candle_store
         self.mean_period = mean_period
         self.std_dev_multiplier = std_dev_multiplier
+        self._bands = Bollinger(mean_period, std_dev_multiplier)
+        self._last_ts: Optional[int] = None
         print(f"MeanReversionTrader initialized for {self.symbol}.")
         print(f"Strategy:   Mean Reversion (Bollinger Bands)")
         print(f"Symbol:     {self.symbol}")
         print(f"Resolution: {self.resolution}")
         print(f"Quantity:   {self.mean_period}")
 
-    def _calculate_metrics(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    def history_limit(self) -> int:
+        """
+        Candles the next check needs: the newest few once the bands are warm,
+        otherwise the full period.
+        """
+        return self.TAIL_CANDLES if self._last_ts is not None else self.mean_period
+
+    def _fetch_history(self) -> Dict[str, Any]:
+        limit = self.history_limit()
+        print(f"Fetching {limit} candles of {self.symbol}@{self.resolution} history...")
+        history_source = self.candle_store or self.client
+        return history_source.get_history(
+            symbol=self.symbol,
+            resolution=self.resolution,
+            limit=limit
+        )
+
+    def _calculate_metrics(self, history_data: Optional[Dict[str, Any]] = None) -> Tuple[Optional[float], Optional[float], Optional[float]]:
         """
-        Fetches historical data and calculates the mean, upper band, and lower band.
+        Calculates the mean, upper band, and lower band.
+
+        Args:
+            history_data (Optional[Dict[str, Any]]): A /history response with at least
+                                                     ``history_limit()`` candles; fetched
+                                                     if not given.
 
         Returns:
             Tuple[Optional[float], Optional[float], Optional[float]]:
             A tuple of (mean, upper_band, lower_band). Returns (None, None, None)
             if data is insufficient.
         """
-        print(f"Fetching {self.mean_period} candles of {self.symbol}@{self.resolution} history...")
+        warm = self._last_ts is not None
         
         try:
-            # Fetch exactly the number of candles needed for the period
-            history_data = self.client.get_history(
-                symbol=self.symbol,
-                resolution=self.resolution,
-                limit=self.mean_period
-            )
+            if history_data is None:
+                history_data = self._fetch_history()
             
             history_list = history_data.get('history')
             
@@ -69,39 +111,35 @@ class MeanReversionTrader:
                 print(f"Warning: 'history' key is missing, empty, or not a list. API response: {history_data}")
                 return None, None, None
 
-            if len(history_list) < self.mean_period:
+            if not warm and len(history_list) < self.mean_period:
                 print(f"Warning: Insufficient historical data found ({len(history_list)} candles). Need {self.mean_period}.")
                 return None, None, None
                 
-            # --- FIX: Changed 'c' to 'close' to match the API response ---
-            closes = []
-            for i, candle in enumerate(history_list):
-                if not isinstance(candle, dict) or 'close' not in candle:
-                    print(f"ERROR: Candle at index {i} is invalid or missing 'close' key. Data: {candle}")
-                    raise KeyError(f"Candle at index {i} is invalid or missing 'close' key")
-                
-                # Also ensure the price is a valid number
-                price = candle['close']
-                if not isinstance(price, (int, float)):
-                    print(f"ERROR: Price for candle {i} is not a number. Data: {candle}")
-                    raise TypeError(f"Price for candle {i} is not a valid number.")
-                    
-                closes.append(price)
-            # --- END FIX ---
+            # Decode and validate as arrays (raises KeyError/TypeError on bad candles)
+            candles = decode_history(history_list, fields=("timestamp", "close"))
+            timestamps = candles["timestamp"].tolist()
+            closes = candles["close"].tolist()
             
-            # Calculate metrics
-            mean = sum(closes) / len(closes)
+            if warm and timestamps[0] > self._last_ts:
+                # Candles were missed since the last check; rebuild from a full window
+                print("Warning: Gap since last check, re-initializing bands.")
+                self._bands = Bollinger(self.mean_period, self.std_dev_multiplier)
+                self._last_ts = None
+                # Re-use the given candles if they cover a full period, else fetch them
+                return self._calculate_metrics(history_data if len(history_list) >= self.mean_period else None)
             
-            # Calculate Standard Deviation
-            sum_sq_diff = sum([(price - mean) ** 2 for price in closes])
-            variance = sum_sq_diff / len(closes)
-            std_dev = math.sqrt(variance)
+            # Fold new candles into the bands; the re-fetched last candle is revised in place
+            self._last_ts = feed_candles(
+                timestamps, self._last_ts,
+                update=lambda i: self._bands.update(closes[i]),
+                revise=lambda i: self._bands.revise(closes[i]),
+            )
             
-            # Calculate bands
-            upper_band = mean + (self.std_dev_multiplier * std_dev)
-            lower_band = mean - (self.std_dev_multiplier * std_dev)
+            if not self._bands.ready:
+                print(f"Warning: Insufficient historical data found. Need {self.mean_period} candles.")
+                return None, None, None
             
-            return mean, upper_band, lower_band
+            return self._bands.middle, self._bands.upper, self._bands.lower
             
         except HTTPError as e:
             print(f"Error fetching history: {e}")
@@ -127,17 +165,47 @@ class MeanReversionTrader:
                 print(f"Market for {self.symbol} is closed. No signal generated.")
                 return "HOLD"
 
-            # 2. Get the trading bands
-            mean, upper_band, lower_band = self._calculate_metrics()
+            # 2. Get the history and the current price, then decide
+            history_data = self._fetch_history()
+            price_data = self.client.get_price(self.symbol)
+            return self.evaluate(history_data, price_data.get('price'))
+
+        except HTTPError as e:
+            print(f"API Error during signal check: {e.response.status_code} - {e.response.text}")
+            return "HOLD"
+        except Exception as e:
+            print(f"An unexpected error occurred during signal check: {e}")
+            traceback.print_exc()
+            return "HOLD"
+
+    def evaluate(self, history_data: Dict[str, Any], current_price: Optional[float], is_open: bool = True) -> str:
+        """
+        The decision of ``get_signal`` on market data fetched by the caller.
+
+        Lets a runner fetch each (symbol, resolution) once per cycle and hand
+        it to every strategy that needs it.
+
+        Args:
+            history_data (Dict[str, Any]): /history response for this symbol and
+                                           resolution with at least ``history_limit()``
+                                           candles (more is fine).
+            current_price (Optional[float]): Latest price.
+            is_open (bool): Whether the symbol's market is open.
+
+        Returns:
+            str: "BUY", "SELL", or "HOLD"
+        """
+        try:
+            if not is_open:
+                print(f"Market for {self.symbol} is closed. No signal generated.")
+                return "HOLD"
+
+            mean, upper_band, lower_band = self._calculate_metrics(history_data)
             
             if mean is None:
                 print("Could not calculate trading signals. No signal generated.")
                 return "HOLD"
 
-            # 3. Get the current price
-            price_data = self.client.get_price(self.symbol)
-            current_price = price_data.get('price')
-            
             if current_price is None:
                 print("Could not fetch current price. No signal generated.")
                 return "HOLD"
@@ -148,7 +216,7 @@ class MeanReversionTrader:
             print(f"Mean (SMA):    {mean:.4f}")
             print(f"Upper Band:    {upper_band:.4f}")
 
-            # 4. Make trading decision
+            # Make trading decision
             if current_price < lower_band:
                 # Price is "oversold"
                 print(f"\nGenerated Signal: BUY (Price {current_price:.4f} is BELOW lower band {lower_band:.4f})")
@@ -164,10 +232,59 @@ class MeanReversionTrader:
                 print("\nGenerated Signal: HOLD (Price is within the bands)")
                 return "HOLD"
 
-        except HTTPError as e:
-            print(f"API Error during signal check: {e.response.status_code} - {e.response.text}")
-            return "HOLD"
         except Exception as e:
             print(f"An unexpected error occurred during signal check: {e}")
             traceback.print_exc()
-            return "HOLD"
\ No newline at end of file
+            return "HOLD"
+
+    # ---------- Backtesting (no HTTP) ---------- #
+
+    @staticmethod
+    def signals_from_bands(close: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+        """
+        Vectorized form of the decision in ``get_signal``.
+
+        Returns:
+            np.ndarray: BUY (+1) below the lower band, SELL (-1) above the upper
+            band, HOLD (0) otherwise, including bars where the bands are not yet
+            defined.
+        """
+        signals = np.full(len(close), HOLD, dtype=np.int8)
+        signals[close < lower] = BUY
+        signals[close > upper] = SELL
+        return signals
+
+    def backtest_signals(self, candles: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Computes the signal this strategy would have given at every bar.
+
+        Bar ``i`` is evaluated like a live check whose newest candle is ``i``:
+        bands over the ``mean_period`` closes ending at ``i`` versus ``close[i]``.
+
+        Args:
+            candles (Dict[str, np.ndarray]): Columns from ``get_history_arrays``.
+
+        Returns:
+            np.ndarray: +1 BUY, -1 SELL, 0 HOLD per bar.
+        """
+        close = candles["close"]
+        _, upper, lower = indicators.bollinger(close, self.mean_period, self.std_dev_multiplier)
+        return self.signals_from_bands(close, lower, upper)
+
+    def backtest(self, candles: Dict[str, np.ndarray], quantity: float = 1.0, **kwargs) -> Dict[str, Any]:
+        """
+        Runs the strategy over a full history in one vectorized pass.
+
+        Args:
+            candles (Dict[str, np.ndarray]): Columns from ``get_history_arrays``
+                                             (needs ``timestamp`` and ``close``).
+            quantity (float): Units traded per position.
+            **kwargs: Passed to ``shared.backtest.run_backtest`` (initial_cash,
+                      fee_rate, allow_short).
+
+        Returns:
+            Dict[str, Any]: Positions, fills, equity curve and stats.
+        """
+        kwargs.setdefault("resolution", self.resolution)
+        return run_backtest(candles["timestamp"], candles["close"], self.backtest_signals(candles),
+                            quantity=quantity, **kwargs)
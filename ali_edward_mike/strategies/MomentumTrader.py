@@ -1,12 +1,22 @@
 # Momentum Trading Strategy using RSI (Relative Strength Index)
-# Assumes the 'TraydnerAPI' class is defined/imported in a previous cell.
+# Imported through the strategies package; it locates the repo root from
+# __file__, so it cannot be pasted into a notebook cell.
 
 import math
+import sys
 import traceback 
+import numpy as np
+from pathlib import Path
 from requests.exceptions import HTTPError
 from typing import Optional, Dict, Any, List, Tuple
 from TraydnerAPI import TraydnerAPI
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for the shared package
+from shared.candle_arrays import decode_history
+from shared.streaming import RSI, feed_candles
+from shared import indicators
+from shared.backtest import run_backtest, BUY, SELL, HOLD
+
 class MomentumTrader:
     """
     Implements a momentum trading strategy using RSI (Relative Strength Index)
@@ -16,7 +26,14 @@ class MomentumTrader:
     overbought (RSI > 70) or oversold (RSI < 30) conditions.
     
     This class is responsible for SIGNAL GENERATION, not execution.
+
+    The RSI is maintained incrementally: the first check downloads
+    ``rsi_period + 1`` candles, later checks only fetch the newest
+    ``TAIL_CANDLES`` candles and fold them into the running averages.
     """
+
+    # Candles fetched per check once the RSI is warm
+    TAIL_CANDLES = 3
     
     def __init__(self, 
                  client: 'TraydnerAPI',
@@ -24,7 +41,8 @@ class MomentumTrader:
                  resolution: str, 
                  rsi_period: int = 14,
                  oversold_threshold: float = 30.0,
-                 overbought_threshold: float = 70.0):
+                 overbought_threshold: float = 70.0,
+                 candle_store: Optional['CandleStore'] = None):
         """
         Initializes the momentum trader.
 
@@ -35,13 +53,18 @@ class MomentumTrader:
             rsi_period (int): The lookback period for RSI calculation (typically 14).
             oversold_threshold (float): RSI value below which is considered oversold (default 30).
             overbought_threshold (float): RSI value above which is considered overbought (default 70).
+            candle_store (Optional[CandleStore]): If given, history is served from this local
+                                                  store, which only downloads new candles.
         """
         self.client = client
         self.symbol = symbol
         self.resolution = resolution
+        self.candle_store = candle_store
         self.rsi_period = rsi_period
         self.oversold_threshold = oversold_threshold
         self.overbought_threshold = overbought_threshold
+        self._rsi = RSI(rsi_period, method="simple")
+        self._last_ts: Optional[int] = None
         print(f"MomentumTrader initialized for {self.symbol}.")
         print(f"Strategy:   Momentum (RSI)")
         print(f"Symbol:     {self.symbol}")
@@ -50,22 +73,40 @@ class MomentumTrader:
         print(f"Oversold:   < {self.oversold_threshold}")
         print(f"Overbought: > {self.overbought_threshold}")
 
-    def _calculate_rsi(self) -> Optional[float]:
+    def history_limit(self) -> int:
+        """
+        Candles the next check needs: period + 1 to calculate period changes,
+        or only the newest few once the RSI is warm.
+        """
+        return self.TAIL_CANDLES if self._last_ts is not None else self.rsi_period + 1
+
+    def _fetch_history(self) -> Dict[str, Any]:
+        limit = self.history_limit()
+        print(f"Fetching {limit} candles of {self.symbol}@{self.resolution} history for RSI...")
+        history_source = self.candle_store or self.client
+        return history_source.get_history(
+            symbol=self.symbol,
+            resolution=self.resolution,
+            limit=limit
+        )
+
+    def _calculate_rsi(self, history_data: Optional[Dict[str, Any]] = None) -> Optional[float]:
         """
-        Fetches historical data and calculates the RSI.
+        Calculates the RSI.
+
+        Args:
+            history_data (Optional[Dict[str, Any]]): A /history response with at least
+                                                     ``history_limit()`` candles; fetched
+                                                     if not given.
 
         Returns:
             Optional[float]: The current RSI value, or None if calculation fails.
         """
-        print(f"Fetching {self.rsi_period + 1} candles of {self.symbol}@{self.resolution} history for RSI...")
+        warm = self._last_ts is not None
         
         try:
-            # Need period + 1 candles to calculate period changes
-            history_data = self.client.get_history(
-                symbol=self.symbol,
-                resolution=self.resolution,
-                limit=self.rsi_period + 1
-            )
+            if history_data is None:
+                history_data = self._fetch_history()
             
             history_list = history_data.get('history')
             
@@ -74,50 +115,32 @@ class MomentumTrader:
                 print(f"Warning: 'history' key is missing, empty, or not a list. API response: {history_data}")
                 return None
 
-            if len(history_list) < self.rsi_period + 1:
+            if not warm and len(history_list) < self.rsi_period + 1:
                 print(f"Warning: Insufficient historical data found ({len(history_list)} candles). Need {self.rsi_period + 1}.")
                 return None
             
-            # Extract closing prices
-            closes = []
-            for i, candle in enumerate(history_list):
-                if not isinstance(candle, dict) or 'close' not in candle:
-                    print(f"ERROR: Candle at index {i} is invalid or missing 'close' key. Data: {candle}")
-                    raise KeyError(f"Candle at index {i} is invalid or missing 'close' key")
-                
-                price = candle['close']
-                if not isinstance(price, (int, float)):
-                    print(f"ERROR: Price for candle {i} is not a number. Data: {candle}")
-                    raise TypeError(f"Price for candle {i} is not a valid number.")
-                    
-                closes.append(price)
-            
-            # Calculate price changes
-            gains = []
-            losses = []
+            # Extract and validate as arrays (raises KeyError/TypeError on bad candles)
+            candles = decode_history(history_list, fields=("timestamp", "close"))
+            timestamps = candles["timestamp"].tolist()
+            closes = candles["close"].tolist()
             
-            for i in range(1, len(closes)):
-                change = closes[i] - closes[i - 1]
-                if change > 0:
-                    gains.append(change)
-                    losses.append(0)
-                else:
-                    gains.append(0)
-                    losses.append(abs(change))
+            if warm and timestamps[0] > self._last_ts:
+                # Candles were missed since the last check; rebuild from a full window
+                print("Warning: Gap since last check, re-initializing RSI.")
+                self._rsi = RSI(self.rsi_period, method="simple")
+                self._last_ts = None
+                # Re-use the given candles if they cover a full period, else fetch them
+                return self._calculate_rsi(history_data if len(history_list) > self.rsi_period else None)
             
-            # Calculate average gain and average loss
-            avg_gain = sum(gains) / len(gains)
-            avg_loss = sum(losses) / len(losses)
-            
-            # Avoid division by zero
-            if avg_loss == 0:
-                return 100.0  # If no losses, RSI is 100
-            
-            # Calculate RS and RSI
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
+            # Fold new price changes into the running averages; the re-fetched last candle is revised
+            self._last_ts = feed_candles(
+                timestamps, self._last_ts,
+                update=lambda i: self._rsi.update(closes[i]),
+                revise=lambda i: self._rsi.revise(closes[i]),
+            )
             
-            return rsi
+            # None until rsi_period changes have been seen; 100.0 if there were no losses
+            return self._rsi.value
             
         except HTTPError as e:
             print(f"Error fetching history: {e}")
@@ -142,17 +165,44 @@ class MomentumTrader:
                 print(f"Market for {self.symbol} is closed. No signal generated.")
                 return "HOLD"
 
-            # 2. Calculate RSI
-            rsi = self._calculate_rsi()
+            # 2. Get the history and the current price, then decide
+            history_data = self._fetch_history()
+            price_data = self.client.get_price(self.symbol)
+            return self.evaluate(history_data, price_data.get('price'))
+
+        except HTTPError as e:
+            print(f"API Error during signal check: {e.response.status_code} - {e.response.text}")
+            return "HOLD"
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}")
+            traceback.print_exc()
+            return "HOLD"
+
+    def evaluate(self, history_data: Dict[str, Any], current_price: Optional[float], is_open: bool = True) -> str:
+        """
+        The decision of ``get_signal`` on market data fetched by the caller.
+
+        Args:
+            history_data (Dict[str, Any]): /history response for this symbol and
+                                           resolution with at least ``history_limit()``
+                                           candles (more is fine).
+            current_price (Optional[float]): Latest price (for display).
+            is_open (bool): Whether the symbol's market is open.
+
+        Returns:
+            str: "BUY", "SELL", or "HOLD"
+        """
+        try:
+            if not is_open:
+                print(f"Market for {self.symbol} is closed. No signal generated.")
+                return "HOLD"
+
+            rsi = self._calculate_rsi(history_data)
             
             if rsi is None:
                 print("Could not calculate RSI. No signal generated.")
                 return "HOLD"
 
-            # 3. Get the current price for display
-            price_data = self.client.get_price(self.symbol)
-            current_price = price_data.get('price')
-            
             if current_price is None:
                 print("Could not fetch current price. No signal generated.")
                 return "HOLD"
@@ -163,7 +213,7 @@ class MomentumTrader:
             print(f"Oversold:      < {self.oversold_threshold}")
             print(f"Overbought:    > {self.overbought_threshold}")
 
-            # 4. Make trading decision based on RSI
+            # Make trading decision based on RSI
             if rsi < self.oversold_threshold:
                 # RSI indicates oversold - potential buy opportunity
                 print(f"\nGenerated Signal: BUY (RSI {rsi:.2f} is BELOW oversold threshold {self.oversold_threshold})")
@@ -179,10 +229,57 @@ class MomentumTrader:
                 print(f"\nGenerated Signal: HOLD (RSI {rsi:.2f} is in neutral zone)")
                 return "HOLD"
 
-        except HTTPError as e:
-            print(f"API Error during signal check: {e.response.status_code} - {e.response.text}")
-            return "HOLD"
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
             traceback.print_exc()
             return "HOLD"
+
+    # ---------- Backtesting (no HTTP) ---------- #
+
+    @staticmethod
+    def signals_from_rsi(rsi: np.ndarray, oversold_threshold: float, overbought_threshold: float) -> np.ndarray:
+        """
+        Vectorized form of the decision in ``get_signal``.
+
+        Returns:
+            np.ndarray: BUY (+1) when RSI is below ``oversold_threshold``, SELL (-1)
+            above ``overbought_threshold``, HOLD (0) otherwise or while RSI is undefined.
+        """
+        signals = np.full(len(rsi), HOLD, dtype=np.int8)
+        signals[rsi < oversold_threshold] = BUY
+        signals[rsi > overbought_threshold] = SELL
+        return signals
+
+    def backtest_signals(self, candles: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Computes the signal this strategy would have given at every bar.
+
+        Bar ``i`` uses the same simple-average RSI over the ``rsi_period``
+        changes ending at ``i`` that a live check would compute.
+
+        Args:
+            candles (Dict[str, np.ndarray]): Columns from ``get_history_arrays``.
+
+        Returns:
+            np.ndarray: +1 BUY, -1 SELL, 0 HOLD per bar.
+        """
+        rsi = indicators.rsi(candles["close"], self.rsi_period, method="simple")
+        return self.signals_from_rsi(rsi, self.oversold_threshold, self.overbought_threshold)
+
+    def backtest(self, candles: Dict[str, np.ndarray], quantity: float = 1.0, **kwargs) -> Dict[str, Any]:
+        """
+        Runs the strategy over a full history in one vectorized pass.
+
+        Args:
+            candles (Dict[str, np.ndarray]): Columns from ``get_history_arrays``
+                                             (needs ``timestamp`` and ``close``).
+            quantity (float): Units traded per position.
+            **kwargs: Passed to ``shared.backtest.run_backtest`` (initial_cash,
+                      fee_rate, allow_short).
+
+        Returns:
+            Dict[str, Any]: Positions, fills, equity curve and stats.
+        """
+        kwargs.setdefault("resolution", self.resolution)
+        return run_backtest(candles["timestamp"], candles["close"], self.backtest_signals(candles),
+                            quantity=quantity, **kwargs)
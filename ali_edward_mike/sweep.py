@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep for the strategies in ``strategies/``.
+
+Backtests a grid (or a random sample) of ``STRATEGY_PARAMS`` values on the
+candles cached by ``CandleStore`` and prints the best combinations. Runs
+offline unless ``--sync`` is given, which first tops up the cache from the
+API (needs the ``API_KEY`` environment variable).
+
+    python sweep.py MeanReversionTrader --symbol BTC --resolution 1m
+    python sweep.py MomentumTrader --resolution 1h --random 2000 --csv momentum.csv
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from TraydnerAPI import TraydnerAPI
+from strategies.MeanReversionTrader import MeanReversionTrader
+from strategies.MomentumTrader import MomentumTrader
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared import indicators
+from shared.candle_arrays import decode_history
+from shared.candle_store import CandleStore, MAX_LIMIT
+from shared.sweep import StrategyFamily, grid, random_search, run_sweep, format_table, save_csv
+
+
+class MeanReversionFamily(StrategyFamily):
+    """Bollinger band reversion; the band statistics are shared across multipliers."""
+
+    name = "MeanReversionTrader"
+
+    def group_key(self, params):
+        return params["mean_period"]
+
+    def signals(self, candles, params, cache):
+        close = candles["close"]
+        period = params["mean_period"]
+        mean, std = cache.get(("bands", period),
+                              lambda: (indicators.sma(close, period), indicators.rolling_std(close, period)))
+        width = params["std_dev_multiplier"] * std
+        return MeanReversionTrader.signals_from_bands(close, mean - width, mean + width)
+
+
+class MomentumFamily(StrategyFamily):
+    """RSI thresholds; the RSI series is shared across thresholds."""
+
+    name = "MomentumTrader"
+
+    def group_key(self, params):
+        return params["rsi_period"]
+
+    def signals(self, candles, params, cache):
+        period = params["rsi_period"]
+        rsi = cache.get(("rsi", period), lambda: indicators.rsi(candles["close"], period, method="simple"))
+        return MomentumTrader.signals_from_rsi(rsi, params["oversold_threshold"], params["overbought_threshold"])
+
+
+# Read the whole cache; the store's retention limit is for the live bots
+ALL_CANDLES = 10 ** 9
+
+FAMILIES = {f.name: f for f in (MeanReversionFamily(), MomentumFamily())}
+
+# Grid values (lists) and random-search ranges (tuples) per strategy
+SEARCH_SPACES = {
+    "MeanReversionTrader": {
+        "mean_period": list(range(5, 101, 5)),
+        "std_dev_multiplier": [1.0, 1.25, 1.5, 1.75, 2.0, 2.25, 2.5, 2.75, 3.0],
+    },
+    "MomentumTrader": {
+        "rsi_period": list(range(4, 31, 2)),
+        "oversold_threshold": [15.0, 20.0, 25.0, 30.0, 35.0, 40.0],
+        "overbought_threshold": [60.0, 65.0, 70.0, 75.0, 80.0, 85.0],
+    },
+}
+RANDOM_SPACES = {
+    "MeanReversionTrader": {"mean_period": (5, 200), "std_dev_multiplier": (0.5, 3.5)},
+    "MomentumTrader": {"rsi_period": (3, 50), "oversold_threshold": (10.0, 45.0),
+                       "overbought_threshold": (55.0, 90.0)},
+}
+
+
+def load_candles(symbol: str, resolution: str, cache_dir: str, sync: bool):
+    """Reads the cached candles for a key, optionally syncing the newest ones first."""
+    if sync:
+        client = TraydnerAPI(api_key=os.environ["API_KEY"])
+        store = CandleStore(client.get_history, cache_dir=cache_dir, max_candles=ALL_CANDLES)
+        store.get_history(symbol, resolution, limit=MAX_LIMIT)
+    else:
+        store = CandleStore(fetch_history=None, cache_dir=cache_dir, max_candles=ALL_CANDLES)
+    return decode_history(store.candles(symbol, resolution), fields=("timestamp", "close"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep strategy parameters over cached candles.")
+    parser.add_argument("strategy", choices=sorted(FAMILIES))
+    parser.add_argument("--symbol", default="BTC")
+    parser.add_argument("--resolution", default="1m")
+    parser.add_argument("--cache-dir", default="candle_cache")
+    parser.add_argument("--sync", action="store_true", help="fetch new candles from the API first")
+    parser.add_argument("--random", type=int, metavar="N", help="sample N random sets instead of the grid")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--processes", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--quantity", type=float, default=0.01)
+    parser.add_argument("--fee-rate", type=float, default=0.0)
+    parser.add_argument("--sort-by", default="sharpe")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--csv", help="also write every result to this CSV file")
+    args = parser.parse_args()
+
+    candles = load_candles(args.symbol, args.resolution, args.cache_dir, args.sync)
+    if not len(candles["close"]):
+        print(f"No cached candles for {args.symbol}@{args.resolution} in {args.cache_dir}; run with --sync.")
+        return
+
+    if args.random:
+        param_sets = random_search(RANDOM_SPACES[args.strategy], args.random, args.seed)
+    else:
+        param_sets = grid(SEARCH_SPACES[args.strategy])
+    print(f"Sweeping {len(param_sets)} {args.strategy} parameter sets over "
+          f"{len(candles['close'])} {args.symbol}@{args.resolution} candles...")
+
+    results = run_sweep(FAMILIES[args.strategy], param_sets, candles,
+                        processes=args.processes,
+                        sort_by=args.sort_by,
+                        ascending=args.sort_by == "max_drawdown",
+                        quantity=args.quantity,
+                        fee_rate=args.fee_rate,
+                        resolution=args.resolution)
+    print(format_table(results, top=args.top))
+    if args.csv:
+        save_csv(results, args.csv)
+        print(f"Wrote {len(results)} rows to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
-import requests
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.transport import get_transport
+from shared.endpoints import api_host
+from shared.metrics import decode_json
 
 class TraydnerAPI:
     """
@@ -6,22 +12,23 @@ class TraydnerAPI:
     -------------------------------------------------
     Base URL:
         https://traydner-186649552655.us-central1.run.app
+        (override with base_url= or the TRAYDNER_BASE_URL environment variable)
     Authentication:
         Authorization: Bearer <YOUR_API_KEY>
     """
 
-    BASE_URL = "https://traydner-186649552655.us-central1.run.app"
-
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, transport=None, base_url: str = None):
         self.api_key = api_key
+        self.base_url = api_host(base_url)
         self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.transport = transport or get_transport()
 
     def _request(self, method: str, endpoint: str, params=None):
         """Internal: make a request and return JSON or raise for status."""
-        url = f"{self.BASE_URL}{endpoint}"
-        response = requests.request(method, url, headers=self.headers, params=params)
+        url = f"{self.base_url}{endpoint}"
+        response = self.transport.request(method, url, headers=self.headers, params=params)
         response.raise_for_status()
-        return response.json()
+        return decode_json(response, self.transport.metrics)
 
     # ---------- Public API Methods ---------- #
 
@@ -1,61 +1,65 @@
 import api
+import sys
 import time
+from pathlib import Path
 from log import log
-import numpy as np
 from dotenv import dotenv_values
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.streaming import RollingStats
+from shared.ring_buffer import RingBuffer
+from shared.ledger import Ledger
+from shared.profiling import get_profiler
+from shared.metrics_server import BotMetrics, serve_metrics
+
 KEY = dotenv_values('.env')['KEY']
 TRADE_PERCENTAGE = 1
+RECONCILE_SECONDS = 300  # how often the local ledger is checked against /balance
+PROFILE_EVERY = 300  # log the per-stage timing table every N loop iterations
 
 class Trader:
     MAX_HISTORY = 30
     
     def __init__(self, key, target, market):
         self.api = api.TraydnerAPI(key)
-        self.price_history = []
-        self.balance = self.api.get_balance()['balance']
+        self.price_history = RingBuffer(self.MAX_HISTORY + 1, ('price',))  # fixed memory, O(1) evict
+        self.short_avg = RollingStats(5)
+        self.long_avg = RollingStats(15)
+        self.ledger = Ledger(self.api.get_balance, reconcile_interval=RECONCILE_SECONDS)
         self.entry_price = -1
-        self.portfolio = {}
-        if self.balance is not float:
-            self.portfolio['crypto'] = self.balance['crypto']
-            self.portfolio['stocks']= self.balance['stocks']
-            self.portfolio['forex'] = self.balance['forex']
-            self.balance = self.balance['cash']
+        self._refresh()
         self.target = target
         self.market = market
     
     def _refresh(self):
-        self.balance = self.api.get_balance()['balance']
-        self.portfolio = {}
-        if self.balance is not float:
-            self.portfolio['crypto'] = self.balance['crypto']
-            self.portfolio['stocks']= self.balance['stocks']
-            self.portfolio['forex'] = self.balance['forex']
-            self.balance = self.balance['cash']
+        # read from the local ledger; it only calls /balance when a reconcile is due
+        snapshot = self.ledger.snapshot()
+        self.balance = snapshot.pop('cash')
+        self.portfolio = snapshot
     
     def add_history(self, price):
-        if len(self.price_history) > self.MAX_HISTORY:
-            self.price_history.pop(0)
-        self.price_history.append(price)
+        self.price_history.append(price=price)
+        self.short_avg.update(price)
+        self.long_avg.update(price)
         
     def buy_signal(self):
         if len(self.price_history) < 15:
             log("not enough data to compute buy signal", level="WARNING")
             return False
         
-        short_avg = np.mean(self.price_history[-5:])
-        long_avg = np.mean(self.price_history[-15:])
-        return short_avg > long_avg
+        return self.short_avg.mean > self.long_avg.mean
     
     def get_units(self):
-        return self.balance * TRADE_PERCENTAGE / self.price_history[-1]
+        return self.balance * TRADE_PERCENTAGE / self.price_history.last('price')
     
     def buy(self):
         units = self.get_units()
-        self.api.make_trade(self.target, "buy", units)
-        self.entry_price = self.price_history[-1]
+        response = self.api.make_trade(self.target, "buy", units)
+        self.entry_price = self.price_history.last('price')
+        self.ledger.apply_trade(self.target, "buy", units, self.entry_price, self.market, response)
         self._refresh()
         log(f"buy: {self.target} at {units * self.entry_price} (balance: {self.balance})", level="WARNING")
+        return response
     
     def holding(self):
         return self.market in self.portfolio and self.target in self.portfolio[self.market]
@@ -66,10 +70,12 @@ class Trader:
             return
         
         units = self.portfolio[self.market][self.target]
-        self.api.make_trade(self.target, 'sell', units)
+        response = self.api.make_trade(self.target, 'sell', units)
+        self.ledger.apply_trade(self.target, 'sell', units, self.price_history.last('price'), self.market, response)
         self._refresh()
         log(f"sell: {self.target} at {units * self.entry_price} (balance: {self.balance})", level="WARNING")
         self.entry_price = -1
+        return response
         
 
 trader = Trader(KEY, "btc", "crypto")
@@ -79,16 +85,28 @@ log("init ok")
 log(f"Balance: {trader.balance}")
 
 cp_count = 4
+profiler = get_profiler()
+bot_metrics = BotMetrics("aryav", loop_budget=1.0)
+serve_metrics(bot_metrics)  # only listens when METRICS_PORT is set
+iterations = 0
 
 while trading_loop:
+    loop_start = time.perf_counter()
+    iterations += 1
+    if iterations % PROFILE_EVERY == 0:
+        log("stage timings:\n" + profiler.report(reset=True))
+
     if len(trader.price_history) < 15:
-        current_price = trader.api.get_price(trader.target)['price']
+        with profiler.span("price", trader.target):
+            current_price = trader.api.get_price(trader.target)['price']
         trader.add_history(current_price)
         log(f"collecting data... [{len(trader.price_history)}]")
+        bot_metrics.record_iteration(time.perf_counter() - loop_start)
         time.sleep(1)
         continue
 
-    current_price = trader.api.get_price(trader.target)['price']
+    with profiler.span("price", trader.target):
+        current_price = trader.api.get_price(trader.target)['price']
     trader.add_history(current_price)
     cp_count += 1
     
@@ -98,14 +116,22 @@ while trading_loop:
             log(f"% {100 * (current_price - trader.entry_price)/trader.entry_price}")
         cp_count = 0
         
-    buy_signal = trader.buy_signal()
-    
-    if trader.holding():
-        if current_price > trader.entry_price * 1.002 or current_price < trader.entry_price * 0.999:
-            trader.sell()
+    with profiler.span("signal", trader.target):
+        buy_signal = trader.buy_signal()
+    if buy_signal:
+        bot_metrics.signal(trader.target, "buy")
     
-    if buy_signal and not trader.holding():
-        trader.buy()
+    with profiler.span("trade", trader.target):
+        if trader.holding():
+            if current_price > trader.entry_price * 1.002 or current_price < trader.entry_price * 0.999:
+                if trader.sell():
+                    bot_metrics.trade(trader.target, "sell")
+
+        if buy_signal and not trader.holding():
+            if trader.buy():
+                bot_metrics.trade(trader.target, "buy")
+    bot_metrics.position(trader.target, trader.portfolio.get(trader.market, {}).get(trader.target, 0))
     
+    bot_metrics.record_iteration(time.perf_counter() - loop_start)
     time.sleep(1)
 
@@ -0,0 +1,7 @@
+"""
+Shared infrastructure for the Traydner trading bots.
+
+Each team folder runs as a standalone script directory, so modules here are
+imported as ``shared.<module>`` after the repository root has been put on
+``sys.path`` by the consuming script.
+"""
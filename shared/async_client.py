@@ -0,0 +1,434 @@
+import asyncio
+import json
+import time
+from typing import Optional, Dict, Any, List, Iterable, Sequence
+
+import aiohttp
+import numpy as np
+
+from .candle_arrays import decode_history, FIELDS
+from .endpoints import api_host, timeout_for, Timeout
+from .coalesce import AsyncSingleFlight, request_key
+from .market_hours import MarketStatusCache
+from .rate_limit import RateLimiter, RetryPolicy, get_limiter, parse_retry_after
+from .hedging import Hedger, get_hedger, hedgeable
+from .metrics import ClientMetrics, get_metrics
+
+
+class AsyncTraydnerAPI:
+    """
+    An asyncio-native client for the Traydner API.
+
+    Mirrors the surface of the blocking ``TraydnerAPI`` clients, but every
+    call is a coroutine and all calls share a single pooled set of keep-alive
+    connections. Hundreds of symbols can therefore be polled concurrently from
+    one event loop without spawning a thread per request.
+
+    Usage:
+        async with AsyncTraydnerAPI(api_key) as client:
+            prices = await client.get_prices(["BTC", "ETH", "SOL"])
+    """
+
+    API_PATH = "/api/remote"
+
+    def __init__(self,
+                 api_key: str,
+                 pool_size: int = 100,
+                 per_host_limit: int = 0,
+                 connect_timeout: float = 5.0,
+                 timeout: float = 15.0,
+                 keepalive_timeout: float = 30.0,
+                 max_concurrency: int = 64,
+                 base_url: Optional[str] = None,
+                 coalesce_window: float = 0.5,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 timeouts: Optional[Dict[str, Timeout]] = None,
+                 hedger: Optional[Hedger] = None,
+                 hedge: bool = True,
+                 metrics: Optional[ClientMetrics] = None,
+                 symbol_markets: Optional[Dict[str, str]] = None):
+        """
+        Initializes the async API client.
+
+        Args:
+            api_key (str): Your API key (Bearer token).
+            pool_size (int): Maximum number of open connections in the pool.
+            per_host_limit (int): Maximum connections to the API host (0 = no
+                                  limit beyond ``pool_size``).
+            connect_timeout (float): Seconds allowed to establish a connection, for
+                                     endpoints without their own timeout.
+            timeout (float): Total seconds allowed for a single request; each
+                             endpoint's read timeout applies within it.
+            keepalive_timeout (float): Seconds an idle connection is kept open.
+            max_concurrency (int): Upper bound on in-flight requests issued by
+                                   the batch helpers (e.g. ``get_prices``).
+            base_url (Optional[str]): API host to use instead of production (e.g. a
+                                      local mock server); see ``shared.endpoints``.
+            coalesce_window (float): Seconds an identical GET keeps sharing a
+                                     completed response; concurrent identical
+                                     GETs always share one request.
+            rate_limiter (Optional[RateLimiter]): Request budget and priority
+                                                  lanes; defaults to the one
+                                                  shared by every client in the
+                                                  process (``shared.rate_limit``).
+            retry_policy (Optional[RetryPolicy]): Backoff for 429s, 5xx responses
+                                                  and connection errors.
+            timeouts (Optional[Dict[str, Timeout]]): Per-endpoint (connect, read)
+                                                     timeouts on top of
+                                                     ``shared.endpoints.ENDPOINT_TIMEOUTS``.
+            hedger (Optional[Hedger]): Latency tracker that re-sends GETs slower
+                                       than their endpoint's p95; defaults to the
+                                       process-wide one.
+            hedge (bool): Set to False to never hedge GETs.
+            metrics (Optional[ClientMetrics]): Per-endpoint latency histograms,
+                                               status codes, bytes, decode time,
+                                               retries and cache hits; defaults
+                                               to the process-wide registry.
+            symbol_markets (Optional[Dict[str, str]]): Symbol -> market ("stock",
+                                                       "crypto", "forex") for tickers
+                                                       the status cache cannot place
+                                                       (e.g. {"AAPL": "stock"});
+                                                       holdings in /balance are
+                                                       learned automatically.
+        """
+        if not api_key:
+            raise ValueError("API key is required.")
+
+        self.base_url = api_host(base_url) + self.API_PATH
+        self._api_key = api_key
+        self._pool_size = pool_size
+        self._per_host_limit = per_host_limit
+        self._keepalive_timeout = keepalive_timeout
+        self._timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self._max_concurrency = max_concurrency
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._flight = AsyncSingleFlight(linger=coalesce_window)
+        self.market_status_cache = MarketStatusCache(symbol_markets=symbol_markets)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeouts = timeouts
+        self.hedger = (hedger or get_hedger()) if hedge else None
+        self.metrics = metrics or get_metrics()
+
+    async def __aenter__(self) -> "AsyncTraydnerAPI":
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the shared session, creating it lazily.
+
+        The session has to be created from inside a running event loop, so it
+        is built on first use rather than in ``__init__``.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_size,
+                limit_per_host=self._per_host_limit,
+                keepalive_timeout=self._keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+                headers={
+                    "Authorization": f"Bearer {self._api_key}",
+                    "Accept": "application/json",
+                },
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Closes the pooled connections. Safe to call more than once."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Internal helper method to make API requests.
+
+        Args:
+            method (str): HTTP method (e.g., "GET", "POST").
+            endpoint (str): API endpoint path (e.g., "/price").
+            params (Optional[Dict[str, Any]]): Query parameters for the request.
+
+        Returns:
+            Dict[str, Any]: The JSON response from the API.
+
+        Raises:
+            aiohttp.ClientResponseError: If the API returns an unsuccessful status code.
+        """
+        url = self.base_url + endpoint
+
+        # Filter out optional parameters that are None; aiohttp only accepts
+        # str/int/float query values, so everything is stringified here.
+        cleaned_params = None
+        if params:
+            cleaned_params = {k: str(v) for k, v in params.items() if v is not None}
+
+        if method == "GET":
+            fetched = False
+
+            def fetch():
+                nonlocal fetched
+                fetched = True
+                return self._send(method, url, cleaned_params)
+
+            result = await self._flight.do(request_key(endpoint, cleaned_params), fetch)
+            if not fetched:
+                self.metrics.cache_hit(endpoint)
+            return result
+        try:
+            return await self._send(method, url, cleaned_params)
+        finally:
+            if endpoint == "/trade":
+                self._flight.forget(endpoint="/balance")
+
+    async def _send(self, method: str, url: str, params: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        """Performs the HTTP request (rate limited, hedged, with retries) and decodes the JSON body."""
+        connect, read = self._endpoint_timeout(url)
+        timeout = aiohttp.ClientTimeout(total=self._timeout.total, connect=connect, sock_read=read)
+        limiter = self.rate_limiter or get_limiter()
+        policy = self.retry_policy
+
+        def send():
+            return self._attempt(method, url, params, timeout)
+
+        call = send
+        if self.hedger is not None and hedgeable(method, params):
+            call = lambda: self.hedger.call_async(url, send, on_hedge=lambda: limiter.acquire_async(url))
+
+        attempt = 0
+        while True:
+            await limiter.acquire_async(url)
+            try:
+                response, body = await call()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not policy.should_retry(method, attempt):
+                    raise
+                delay = policy.delay(attempt)
+            else:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                limiter.on_response(response.status, retry_after)
+                if response.status < 400:
+                    return body
+                delay = None
+                if policy.should_retry(method, attempt, response.status):
+                    delay = policy.delay(attempt, retry_after)
+                if delay is None:
+                    print(f"HTTP error occurred: {response.status} {response.reason} - {body}")
+                    response.raise_for_status()
+            limiter.record_retry()
+            self.metrics.retry(url)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, method: str, url: str, params: Optional[Dict[str, str]],
+                       timeout: aiohttp.ClientTimeout):
+        """One request; returns the (released) response and its JSON, or its text on errors."""
+        session = self._get_session()
+        start = time.perf_counter()
+        try:
+            async with session.request(method, url, params=params, timeout=timeout) as response:
+                body = await response.read()
+        except Exception:
+            self.metrics.observe(url, time.perf_counter() - start)
+            raise
+        self.metrics.observe(url, time.perf_counter() - start, response.status, len(body))
+        if response.status >= 400:
+            return response, body.decode("utf-8", errors="replace")
+        start = time.perf_counter()
+        data = json.loads(body)
+        self.metrics.observe_decode(url, time.perf_counter() - start)
+        return response, data
+
+    def _endpoint_timeout(self, url: str):
+        timeout = timeout_for(url, (self._timeout.connect, self._timeout.total), self.timeouts)
+        return timeout if isinstance(timeout, tuple) else (timeout, timeout)
+
+    def coalescing_stats(self) -> Dict[str, Any]:
+        """Returns ``calls``, ``executions``, ``coalesced`` and ``coalesced_ratio`` for GETs."""
+        return self._flight.stats()
+
+    def hedging_stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns per-endpoint ``requests``, ``hedged``, ``hedge_rate``, ``hedge_wins`` and latencies."""
+        return self.hedger.stats() if self.hedger is not None else {}
+
+    def metrics_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Returns per-endpoint call metrics (see ``shared.metrics.ClientMetrics.snapshot``)."""
+        return self.metrics.snapshot()
+
+    async def get_price(self, symbol: str) -> Dict[str, Any]:
+        """
+        Fetches the latest price for a given symbol.
+
+        Args:
+            symbol (str): Ticker symbol (e.g., "AAPL", "BTC", "EUR").
+
+        Returns:
+            Dict[str, Any]: API response with price data.
+        """
+        return await self._request("GET", "/price", params={"symbol": symbol})
+
+    async def trade(self, symbol: str, side: str, quantity: float) -> Dict[str, Any]:
+        """
+        Executes a simulated trade.
+
+        Args:
+            symbol (str): Ticker symbol.
+            side (str): 'buy' or 'sell'.
+            quantity (float): Number of units. Integers required for stocks.
+
+        Returns:
+            Dict[str, Any]: API response confirming the trade.
+        """
+        if side not in ['buy', 'sell']:
+            raise ValueError("Side must be 'buy' or 'sell'.")
+
+        params = {
+            "symbol": symbol,
+            "side": side,
+            "quantity": quantity
+        }
+        return await self._request("POST", "/trade", params=params)
+
+    async def get_balance(self) -> Dict[str, Any]:
+        """
+        Fetches the simulated account balance for the authenticated user.
+
+        Returns:
+            Dict[str, Any]: API response with balance information.
+        """
+        balance = await self._request("GET", "/balance")
+        self.market_status_cache.learn_balance(balance)
+        return balance
+
+    async def get_history(self,
+                          symbol: str,
+                          resolution: str,
+                          start_ts: Optional[int] = None,
+                          end_ts: Optional[int] = None,
+                          limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fetches recent candles (historical data) for a symbol.
+
+        Args:
+            symbol (str): Ticker symbol.
+            resolution (str): Time resolution (e.g., "1m", "5m", "1h", "D").
+            start_ts (Optional[int]): Start timestamp (Unix seconds).
+            end_ts (Optional[int]): End timestamp (Unix seconds).
+            limit (Optional[int]): Max number of candles (1-5000, default 500).
+
+        Returns:
+            Dict[str, Any]: API response with historical data.
+        """
+        params = {
+            "symbol": symbol,
+            "resolution": resolution,
+            "start_ts": start_ts,
+            "end_ts": end_ts,
+            "limit": limit
+        }
+        return await self._request("GET", "/history", params=params)
+
+    async def get_history_arrays(self,
+                                 symbol: str,
+                                 resolution: str,
+                                 start_ts: Optional[int] = None,
+                                 end_ts: Optional[int] = None,
+                                 limit: Optional[int] = None,
+                                 fields: Sequence[str] = FIELDS) -> Dict[str, np.ndarray]:
+        """
+        Fetches candles and decodes them into contiguous NumPy columns.
+
+        See ``get_history`` for the arguments and
+        ``shared.candle_arrays.decode_history`` for the returned arrays.
+        """
+        data = await self.get_history(symbol, resolution, start_ts=start_ts, end_ts=end_ts, limit=limit)
+        return decode_history(data.get("history") or [], fields)
+
+    async def get_market_status(self,
+                                symbol: Optional[str] = None,
+                                market: Optional[str] = None) -> Dict[str, bool]:
+        """
+        Returns the market status (open or closed).
+
+        Args:
+            symbol (Optional[str]): Ticker symbol. Takes precedence over 'market'.
+            market (Optional[str]): Market type ("stock", "crypto", "forex").
+
+        Returns:
+            Dict[str, bool]: API response, e.g., {"isOpen": true}.
+        """
+        if not symbol and not market:
+            raise ValueError("Either 'symbol' or 'market' must be provided.")
+
+        # Served from the trading-hours cache unless a state change is possible
+        cached = self.market_status_cache.lookup(symbol, market)
+        if cached is not None:
+            self.metrics.cache_hit("/market_status")
+            return cached
+
+        params = {
+            "symbol": symbol,
+            "market": market
+        }
+        response = await self._request("GET", "/market_status", params=params)
+        return self.market_status_cache.store(response, symbol, market)
+
+    # ---------- Batch helpers ---------- #
+
+    async def _gather_bounded(self, coros: Iterable) -> List[Any]:
+        """
+        Runs coroutines concurrently, at most ``max_concurrency`` at a time.
+
+        Failures are returned in place of results (``return_exceptions``
+        semantics) so one bad symbol does not cancel the whole batch.
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def run(coro):
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(run(c) for c in coros), return_exceptions=True)
+
+    async def get_prices(self, symbols: List[str]) -> Dict[str, Any]:
+        """
+        Fetches the latest price for many symbols concurrently.
+
+        Args:
+            symbols (List[str]): Ticker symbols.
+
+        Returns:
+            Dict[str, Any]: Mapping of symbol to its price response, or to the
+            exception raised while fetching it.
+        """
+        results = await self._gather_bounded(self.get_price(s) for s in symbols)
+        return dict(zip(symbols, results))
+
+    async def get_histories(self,
+                            symbols: List[str],
+                            resolution: str,
+                            limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fetches recent candles for many symbols concurrently.
+
+        Args:
+            symbols (List[str]): Ticker symbols.
+            resolution (str): Time resolution shared by all symbols.
+            limit (Optional[int]): Max number of candles per symbol.
+
+        Returns:
+            Dict[str, Any]: Mapping of symbol to its history response, or to
+            the exception raised while fetching it.
+        """
+        results = await self._gather_bounded(
+            self.get_history(s, resolution, limit=limit) for s in symbols
+        )
+        return dict(zip(symbols, results))
@@ -0,0 +1,167 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Dict, Any, List, Tuple
+
+from .candle_store import CandleStore, RESOLUTION_SECONDS, MAX_LIMIT, to_seconds
+from .rate_limit import BULK, lane
+
+
+class RateBudget:
+    """
+    Spaces request start times so no more than ``requests_per_second`` begin
+    in any one-second span, across all threads sharing the budget.
+    """
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until the caller may start its request."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def plan_windows(start_ts: int, end_ts: int, resolution: str, limit: int = MAX_LIMIT) -> List[Tuple[int, int]]:
+    """
+    Splits [start_ts, end_ts] into consecutive windows of at most ``limit`` candles.
+
+    Args:
+        start_ts (int): Range start (Unix seconds, inclusive).
+        end_ts (int): Range end (Unix seconds, inclusive).
+        resolution (str): Candle resolution; must be in ``RESOLUTION_SECONDS``.
+        limit (int): Candles per request (capped at the API's 5000).
+
+    Returns:
+        List[Tuple[int, int]]: (window_start, window_end) pairs, oldest first.
+    """
+    if resolution not in RESOLUTION_SECONDS:
+        raise ValueError(f"Unsupported resolution for backfill: {resolution}")
+    step = RESOLUTION_SECONDS[resolution]
+    limit = min(limit, MAX_LIMIT)
+    span = step * limit
+
+    windows = []
+    window_start = start_ts - start_ts % step  # align to candle boundaries
+    while window_start <= end_ts:
+        window_end = min(window_start + span - step, end_ts)
+        windows.append((window_start, window_end))
+        window_start += span
+    return windows
+
+
+def find_gaps(candles: List[Dict[str, Any]], resolution: str) -> List[Dict[str, int]]:
+    """
+    Reports runs of missing candles in a sorted series.
+
+    Markets that close (stocks, forex weekends) legitimately produce gaps;
+    callers decide which ones matter.
+
+    Returns:
+        List[Dict[str, int]]: ``{"after_ts", "before_ts", "missing"}`` per gap.
+    """
+    step = RESOLUTION_SECONDS[resolution]
+    gaps = []
+    for prev, cur in zip(candles, candles[1:]):
+        prev_ts = to_seconds(prev["timestamp"])
+        cur_ts = to_seconds(cur["timestamp"])
+        if cur_ts - prev_ts > step:
+            gaps.append({
+                "after_ts": prev_ts,
+                "before_ts": cur_ts,
+                "missing": (cur_ts - prev_ts) // step - 1,
+            })
+    return gaps
+
+
+def backfill(fetch_history: Callable[..., Optional[Dict[str, Any]]],
+             symbol: str,
+             resolution: str,
+             start_ts: int,
+             end_ts: int,
+             store: Optional[CandleStore] = None,
+             limit: int = MAX_LIMIT,
+             max_workers: int = 4,
+             requests_per_second: float = 4.0,
+             retries: int = 2) -> Dict[str, Any]:
+    """
+    Downloads an arbitrary historical range in parallel, limit-sized windows.
+
+    Windows are fetched concurrently under a shared request-rate budget, in
+    the client rate limiter's bulk lane (so live trades and prices go first), then
+    de-duplicated by timestamp, trimmed to the requested range and sorted into
+    one series. If a ``store`` is given the series is merged into it.
+
+    Args:
+        fetch_history (Callable): A ``get_history``-style callable, called as
+                                  ``fetch_history(symbol, resolution, start_ts=...,
+                                  end_ts=..., limit=...)``.
+        symbol (str): Ticker symbol.
+        resolution (str): Candle resolution (e.g., "1m").
+        start_ts (int): Range start (Unix seconds).
+        end_ts (int): Range end (Unix seconds).
+        store (Optional[CandleStore]): Store to merge the result into. Size its
+                                       ``max_candles`` for the whole range.
+        limit (int): Candles per request (max 5000).
+        max_workers (int): Concurrent requests.
+        requests_per_second (float): Request-start budget shared by all workers.
+        retries (int): Extra attempts per window before it is given up on.
+
+    Returns:
+        Dict[str, Any]: ``history`` (sorted candles), ``gaps`` (see
+        ``find_gaps``), ``requests`` (HTTP calls made) and ``failed_windows``.
+    """
+    windows = plan_windows(start_ts, end_ts, resolution, limit)
+    budget = RateBudget(requests_per_second)
+    request_count = 0
+    count_lock = threading.Lock()
+
+    def fetch_window(window: Tuple[int, int]) -> Optional[List[Dict[str, Any]]]:
+        nonlocal request_count
+        for attempt in range(retries + 1):
+            budget.acquire()
+            with count_lock:
+                request_count += 1
+            try:
+                with lane(BULK):
+                    data = fetch_history(symbol, resolution, start_ts=window[0], end_ts=window[1], limit=limit)
+            except Exception as e:
+                print(f"Backfill window {window} failed (attempt {attempt + 1}): {e}")
+                continue
+            if data and isinstance(data.get("history"), list):
+                return data["history"]
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(fetch_window, windows))
+
+    by_ts: Dict[int, Dict[str, Any]] = {}
+    failed_windows = []
+    for window, history in zip(windows, results):
+        if history is None:
+            failed_windows.append(window)
+            continue
+        for candle in history:
+            ts = to_seconds(candle["timestamp"])
+            if start_ts <= ts <= end_ts:
+                by_ts[ts] = candle
+
+    candles = [by_ts[ts] for ts in sorted(by_ts)]
+    if store is not None and candles:
+        store.merge(symbol, resolution, candles)
+
+    return {
+        "symbol": symbol,
+        "resolution": resolution,
+        "history": candles,
+        "gaps": find_gaps(candles, resolution),
+        "requests": request_count,
+        "failed_windows": failed_windows,
+    }
@@ -0,0 +1,198 @@
+"""
+Vectorized backtesting over historical candle arrays.
+
+A strategy turns a whole history into a signal array (+1 BUY, -1 SELL,
+0 HOLD) in one pass; ``run_backtest`` then derives positions, fills, the
+equity curve and summary statistics without any per-bar Python loop and
+without touching the API.
+
+Execution model: a BUY holds a long position of ``quantity`` units, a SELL
+closes it (or holds a short of ``quantity`` when ``allow_short``), and
+repeated signals in the same direction are ignored. Fills happen at the
+close of the signal bar, which is the price the live bots see when they act.
+Optional stop-loss / take-profit exits flatten the position until the next
+signal, like ``check_stops`` in adi-aashima.
+"""
+
+from typing import Optional, Dict, Any
+
+import numpy as np
+
+from .candle_store import RESOLUTION_SECONDS
+
+BUY = 1
+SELL = -1
+HOLD = 0
+
+
+def positions_from_signals(signals, allow_short: bool = False) -> np.ndarray:
+    """
+    Converts BUY/SELL/HOLD signals into the position held after each bar.
+
+    Returns:
+        np.ndarray: +1 long, 0 flat, -1 short (only when ``allow_short``).
+    """
+    signals = np.asarray(signals)
+    target = np.where(signals == BUY, 1, np.where(signals == SELL, -1 if allow_short else 0, 0)).astype(np.int8)
+    acted = signals != HOLD
+
+    # Forward-fill the last non-HOLD target; bars before the first signal are flat.
+    last_idx = np.maximum.accumulate(np.where(acted, np.arange(len(signals)), -1))
+    return np.where(last_idx >= 0, target[np.maximum(last_idx, 0)], 0).astype(np.int8)
+
+
+def apply_stops(close,
+                signals,
+                stop_loss_pct: Optional[float] = None,
+                take_profit_pct: Optional[float] = None,
+                allow_short: bool = False) -> np.ndarray:
+    """
+    Positions from signals, with stop-loss / take-profit exits applied.
+
+    After an entry, the first bar whose close is ``stop_loss_pct`` against the
+    entry price (or ``take_profit_pct`` in favour) goes flat, and the position
+    stays flat until the next BUY/SELL signal, which re-enters even if it is
+    in the same direction as before. The loop runs once per signal, not per
+    bar; each stop search is a single vectorized scan.
+
+    Returns:
+        np.ndarray: +1 long, 0 flat, -1 short per bar.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    signals = np.asarray(signals)
+    position = positions_from_signals(signals, allow_short)
+    if stop_loss_pct is None and take_profit_pct is None:
+        return position
+
+    stop_loss = stop_loss_pct if stop_loss_pct is not None else np.inf
+    take_profit = take_profit_pct if take_profit_pct is not None else np.inf
+    events = np.flatnonzero(signals != HOLD)
+    ends = np.append(events[1:], len(close))
+
+    holding = 0
+    entry = 0.0
+    for start, end in zip(events, ends):
+        target = int(position[start])
+        if target == 0:
+            holding = 0
+            continue
+        if target == holding:
+            # Same-direction signal while holding keeps the entry, unless this
+            # bar's close hits a stop; then the signal re-enters right away.
+            move = holding * (close[start] - entry) / entry
+            if move <= -stop_loss or move >= take_profit:
+                holding = 0
+        if target != holding:
+            holding, entry = target, close[start]
+        move = holding * (close[start + 1:end] - entry) / entry
+        hit = (move <= -stop_loss) | (move >= take_profit)
+        if hit.any():
+            position[start + 1 + int(np.argmax(hit)):end] = 0
+            holding = 0
+    return position
+
+
+def run_backtest(timestamps,
+                 close,
+                 signals,
+                 quantity: float = 1.0,
+                 initial_cash: float = 10_000.0,
+                 fee_rate: float = 0.0,
+                 allow_short: bool = False,
+                 resolution: Optional[str] = None,
+                 stop_loss_pct: Optional[float] = None,
+                 take_profit_pct: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Simulates trading a signal array over a price history.
+
+    Args:
+        timestamps: Candle timestamps (Unix seconds), oldest first.
+        close: Closing prices, same length.
+        signals: +1 BUY, -1 SELL, 0 HOLD per bar, same length.
+        quantity (float): Units held while in a position.
+        initial_cash (float): Starting cash balance.
+        fee_rate (float): Fee as a fraction of traded notional (e.g. 0.001).
+        allow_short (bool): If True, SELL signals open a short.
+        resolution (Optional[str]): Candle resolution, used to annualize the
+                                    Sharpe ratio (e.g. "1m", "1h").
+        stop_loss_pct (Optional[float]): Exit when a position loses this fraction.
+        take_profit_pct (Optional[float]): Exit when a position gains this fraction.
+
+    Returns:
+        Dict[str, Any]: ``position`` (per bar), ``fills`` (dict of arrays:
+        index, timestamp, side, quantity, price, fee), ``equity`` (per bar) and
+        ``stats`` (summary numbers).
+    """
+    timestamps = np.asarray(timestamps)
+    close = np.asarray(close, dtype=np.float64)
+    position = apply_stops(close, signals, stop_loss_pct, take_profit_pct, allow_short)
+
+    units = position * quantity
+    traded = np.diff(units, prepend=0.0)
+    fill_idx = np.flatnonzero(traded)
+    fees = np.abs(traded) * close * fee_rate
+
+    cash = initial_cash - np.cumsum(traded * close + fees)
+    equity = cash + units * close
+
+    fills = {
+        "index": fill_idx,
+        "timestamp": timestamps[fill_idx],
+        "side": np.where(traded[fill_idx] > 0, "buy", "sell"),
+        "quantity": np.abs(traded[fill_idx]),
+        "price": close[fill_idx],
+        "fee": fees[fill_idx],
+    }
+
+    return {
+        "position": position,
+        "fills": fills,
+        "equity": equity,
+        "stats": summarize(equity, position, close, fill_idx, fees, quantity, initial_cash, resolution),
+    }
+
+
+def summarize(equity: np.ndarray,
+              position: np.ndarray,
+              close: np.ndarray,
+              fill_idx: np.ndarray,
+              fees: np.ndarray,
+              quantity: float,
+              initial_cash: float,
+              resolution: Optional[str] = None) -> Dict[str, float]:
+    """Computes return, drawdown, Sharpe and round-trip statistics for a backtest."""
+    if not len(equity):
+        return {"total_return": 0.0, "max_drawdown": 0.0, "sharpe": 0.0, "fills": 0,
+                "round_trips": 0, "win_rate": 0.0, "exposure": 0.0, "fees": 0.0, "final_equity": initial_cash}
+
+    peak = np.maximum.accumulate(equity)
+    drawdown = np.where(peak > 0, (peak - equity) / peak, 0.0)
+
+    prev_equity = np.concatenate(([initial_cash], equity[:-1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(prev_equity != 0, equity / prev_equity - 1.0, 0.0)
+    std = returns.std()
+    sharpe = returns.mean() / std if std > 0 else 0.0
+    if resolution in RESOLUTION_SECONDS:
+        sharpe *= np.sqrt(365 * 24 * 3600 / RESOLUTION_SECONDS[resolution])
+
+    # A round trip is a run of bars holding the same non-zero position; it is
+    # closed at the next fill. A still-open final position is not counted.
+    entries = fill_idx[position[fill_idx] != 0]
+    next_fill = np.searchsorted(fill_idx, entries, side="right")
+    closed = next_fill < len(fill_idx)
+    entries = entries[closed]
+    exits = fill_idx[next_fill[closed]]
+    trip_pnl = position[entries] * quantity * (close[exits] - close[entries]) - fees[entries] - fees[exits]
+
+    return {
+        "total_return": float(equity[-1] / initial_cash - 1.0),
+        "max_drawdown": float(drawdown.max()),
+        "sharpe": float(sharpe),
+        "fills": int(len(fill_idx)),
+        "round_trips": int(len(trip_pnl)),
+        "win_rate": float((trip_pnl > 0).mean()) if len(trip_pnl) else 0.0,
+        "exposure": float((position != 0).mean()),
+        "fees": float(fees.sum()),
+        "final_equity": float(equity[-1]),
+    }
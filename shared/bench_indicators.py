@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark shared.indicators against the pandas / ``ta`` code it replaces.
+
+Each pair is first checked for matching output, then timed on a synthetic
+random-walk series. Run from the repository root:
+
+    python shared/bench_indicators.py [n_candles ...]
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared import indicators
+
+try:
+    from ta.volatility import AverageTrueRange, BollingerBands
+except ImportError:  # ta is only needed for the Daniel/ comparison rows
+    AverageTrueRange = BollingerBands = None
+
+SIZES = [100, 10_000, 1_000_000]
+PERIOD = 20
+
+
+def make_series(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    close = 50_000 + np.cumsum(rng.normal(0, 25, n))
+    high = close + rng.random(n) * 40
+    low = close - rng.random(n) * 40
+    return high, low, close
+
+
+# ---------- The implementations being replaced ---------- #
+
+def pandas_ema(close: pd.Series, span: int):
+    # adi-aashima compute_ema
+    return close.ewm(span=span, adjust=False).mean()
+
+
+def pandas_rsi(close: pd.Series, period: int):
+    # adi-aashima compute_rsi
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(period).mean()
+    avg_loss = loss.rolling(period).mean()
+    rs = avg_gain / (avg_loss + 1e-10)
+    return 100 - (100 / (1 + rs))
+
+
+def pandas_bollinger(close: pd.Series, period: int):
+    mid = close.rolling(period).mean()
+    std = close.rolling(period).std(ddof=0)
+    return mid, mid + 2 * std, mid - 2 * std
+
+
+def ta_bollinger(close: pd.Series, period: int):
+    # Daniel/trader.py ARIMA
+    bb = BollingerBands(close=close, window=period, window_dev=2)
+    return bb.bollinger_mavg(), bb.bollinger_hband(), bb.bollinger_lband()
+
+
+def ta_atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int):
+    # Daniel/trader.py ARIMA
+    return AverageTrueRange(high=high, low=low, close=close, window=period).average_true_range()
+
+
+def check(name: str, ours, theirs, skip: int) -> None:
+    ours = np.asarray(ours, dtype=float)[skip:]
+    theirs = np.asarray(theirs, dtype=float)[skip:]
+    if not np.allclose(ours, theirs, rtol=1e-7, atol=1e-6, equal_nan=True):
+        worst = np.nanmax(np.abs(ours - theirs))
+        raise AssertionError(f"{name}: outputs differ (max abs diff {worst})")
+
+
+def bench(fn, repeat: int = 5) -> float:
+    """Best-of-``repeat`` seconds per call."""
+    number = 1
+    while timeit.timeit(fn, number=number) < 0.05 and number < 10_000:
+        number *= 10
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def main(sizes):
+    rows = []
+    for n in sizes:
+        high, low, close = make_series(n)
+        h, l, c = pd.Series(high), pd.Series(low), pd.Series(close)
+
+        cases = [
+            ("ema(9)", lambda: indicators.ema(close, 9), lambda: pandas_ema(c, 9), 0),
+            ("rsi(14, simple)", lambda: indicators.rsi(close, 14, "simple"), lambda: pandas_rsi(c, 14), 14),
+            ("bollinger(20) vs pandas", lambda: indicators.bollinger(close, PERIOD)[1],
+             lambda: pandas_bollinger(c, PERIOD)[1], PERIOD),
+        ]
+        if BollingerBands is not None:
+            cases += [
+                ("bollinger(20) vs ta", lambda: indicators.bollinger(close, PERIOD)[1],
+                 lambda: ta_bollinger(c, PERIOD)[1], PERIOD),
+                ("atr(20) vs ta", lambda: indicators.atr(high, low, close, PERIOD),
+                 lambda: ta_atr(h, l, c, PERIOD), PERIOD),
+            ]
+
+        for name, ours, theirs, skip in cases:
+            # pandas_rsi adds 1e-10 to the loss average, so compare it loosely
+            if name.startswith("rsi"):
+                np.testing.assert_allclose(np.asarray(ours())[skip:], np.asarray(theirs())[skip:], atol=1e-4)
+            else:
+                check(name, ours(), theirs(), skip)
+            t_ours, t_theirs = bench(ours), bench(theirs)
+            rows.append((n, name, t_ours, t_theirs))
+
+    print(f"{'n':>9}  {'indicator':<26} {'numpy':>11} {'baseline':>11} {'speedup':>8}")
+    print("-" * 70)
+    for n, name, t_ours, t_theirs in rows:
+        print(f"{n:>9}  {name:<26} {t_ours * 1e3:>9.3f}ms {t_theirs * 1e3:>9.3f}ms {t_theirs / t_ours:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or SIZES)
@@ -0,0 +1,93 @@
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+REQUIRED_FIELDS = ("timestamp", "close")
+
+_DTYPES = {
+    "timestamp": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+}
+
+
+def _required_column(history: List[Dict[str, Any]], field: str) -> np.ndarray:
+    try:
+        values = [candle[field] for candle in history]
+    except (KeyError, TypeError):
+        # Slow path only to produce a precise error message.
+        for i, candle in enumerate(history):
+            if not isinstance(candle, dict) or field not in candle:
+                raise KeyError(f"Candle at index {i} is invalid or missing '{field}' key")
+        raise
+
+    column = np.array(values)
+    if column.dtype.kind not in "iuf":
+        for i, value in enumerate(values):
+            if not isinstance(value, (int, float)):
+                raise TypeError(f"{field.capitalize()} for candle {i} is not a valid number: {value!r}")
+    return column
+
+
+def _optional_column(history: List[Dict[str, Any]], field: str) -> np.ndarray:
+    values = [candle.get(field, np.nan) for candle in history]
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        for i, value in enumerate(values):
+            if not isinstance(value, (int, float)):
+                raise TypeError(f"{field.capitalize()} for candle {i} is not a valid number: {value!r}")
+        raise
+
+
+def decode_history(history: List[Dict[str, Any]], fields: Sequence[str] = FIELDS) -> Dict[str, np.ndarray]:
+    """
+    Converts a ``history`` list from the API into contiguous column arrays.
+
+    Each field is pulled out in one pass and handed to NumPy as a whole, and
+    validation runs on the arrays rather than per candle. Timestamps given in
+    milliseconds are normalized to Unix seconds and the columns are returned
+    sorted by time.
+
+    Args:
+        history (List[Dict[str, Any]]): The ``history`` list of a /history response.
+        fields (Sequence[str]): Columns to decode. ``timestamp`` and ``close`` are
+                                required on every candle; other columns may be
+                                missing and decode as NaN.
+
+    Returns:
+        Dict[str, np.ndarray]: int64 ``timestamp`` and float64 price/volume arrays.
+
+    Raises:
+        KeyError: If a candle is not a dict or lacks a required field.
+        TypeError: If a price is not numeric.
+        ValueError: If a close price is NaN or infinite.
+    """
+    if not isinstance(history, list):
+        raise TypeError(f"'history' must be a list, got {type(history).__name__}")
+
+    columns: Dict[str, np.ndarray] = {}
+    for field in fields:
+        if field in REQUIRED_FIELDS:
+            column = _required_column(history, field)
+        else:
+            column = _optional_column(history, field)
+        columns[field] = np.ascontiguousarray(column, dtype=_DTYPES.get(field, np.float64))
+
+    if "close" in columns:
+        bad = ~np.isfinite(columns["close"])
+        if bad.any():
+            raise ValueError(f"Close for candle {int(np.argmax(bad))} is not finite.")
+
+    if "timestamp" in columns and len(history):
+        ts = columns["timestamp"]
+        columns["timestamp"] = np.where(ts > 10**10, ts // 1000, ts)
+        if np.any(np.diff(columns["timestamp"]) < 0):
+            order = np.argsort(columns["timestamp"], kind="stable")
+            columns = {name: column[order] for name, column in columns.items()}
+
+    return columns
@@ -0,0 +1,328 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Dict, Any, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from .candle_arrays import decode_history, FIELDS
+from .resample import Resampler
+
+# Seconds per candle for the resolutions the Traydner API serves.
+RESOLUTION_SECONDS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "1h": 60 * 60,
+    "4h": 4 * 60 * 60,
+    "1d": 24 * 60 * 60,
+    "D": 24 * 60 * 60,
+    "W": 7 * 24 * 60 * 60,
+}
+
+# Hard cap the API places on ``limit`` for /history.
+MAX_LIMIT = 5000
+
+
+def to_seconds(timestamp: float) -> int:
+    """Normalizes a candle timestamp that may be in milliseconds to Unix seconds."""
+    return int(timestamp // 1000) if timestamp > 10**10 else int(timestamp)
+
+
+class CandleStore:
+    """
+    An on-disk candle cache keyed by (symbol, resolution) with delta sync.
+
+    The first request for a key downloads the full lookback window. After
+    that, only the tail since the last stored candle is requested (via
+    ``start_ts``) and merged in; the requested window is then served from the
+    local copy. The newest stored candle is always re-fetched because it may
+    still be forming.
+
+    The store wraps any ``get_history``-style callable, so it works with every
+    client variant in the repo, and ``get_history`` here returns the same
+    ``{"history": [...]}`` shape so it can be dropped in where a client's
+    ``get_history`` was called.
+
+    With ``resample_from="1m"``, coarser resolutions are derived locally from
+    the one stored 1m series (see ``get_resampled_arrays``), so strategies on
+    different timeframes of a symbol share a single download.
+    """
+
+    def __init__(self,
+                 fetch_history: Callable[..., Optional[Dict[str, Any]]],
+                 cache_dir: str = "candle_cache",
+                 max_candles: int = 20000,
+                 resample_from: Optional[str] = None):
+        """
+        Initializes the candle store.
+
+        Args:
+            fetch_history (Callable): Called as ``fetch_history(symbol, resolution,
+                                      limit=..., start_ts=...)`` and expected to
+                                      return an API response with a ``history``
+                                      list (e.g. ``client.get_history``).
+            cache_dir (str): Directory holding one ``.jsonl`` file per key.
+            max_candles (int): Most candles retained per key; older ones are
+                               dropped when the file is compacted.
+            resample_from (Optional[str]): Base resolution from which ``get_history``
+                                           derives coarser ones locally; None
+                                           fetches every resolution from the API.
+        """
+        self.fetch_history = fetch_history
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_candles = max_candles
+        self.resample_from = resample_from
+
+        self._candles: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._file_lines: Dict[Tuple[str, str], int] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # bumped when stored candles other than the newest are rewritten, invalidating resamplers
+        self._generation: Dict[Tuple[str, str], int] = {}
+        self._resamplers: Dict[Tuple[str, str, str], Tuple[int, Resampler]] = {}
+        # keys whose full history is shorter than a window that was asked for
+        self._exhausted: Set[Tuple[str, str]] = set()
+
+    # ---------- Public API ---------- #
+
+    def get_history(self, symbol: str, resolution: str, limit: int = 500) -> Dict[str, Any]:
+        """
+        Syncs the missing tail for a key and returns the latest ``limit`` candles.
+
+        Args:
+            symbol (str): Ticker symbol.
+            resolution (str): Time resolution (e.g., "1m", "1h").
+            limit (int): Number of most recent candles to return.
+
+        Returns:
+            Dict[str, Any]: ``{"symbol", "resolution", "count", "history"}``.
+        """
+        if self.resample_from and resolution != self.resample_from:
+            columns = self.get_resampled_arrays(symbol, resolution, limit)
+            history = [dict(zip(FIELDS, row)) for row in zip(*(columns[f].tolist() for f in FIELDS))]
+        else:
+            history = self._synced(symbol, resolution, limit)
+        return {
+            "symbol": symbol,
+            "resolution": resolution,
+            "count": len(history),
+            "history": history,
+        }
+
+    def get_history_arrays(self,
+                           symbol: str,
+                           resolution: str,
+                           limit: int = 500,
+                           fields: Sequence[str] = FIELDS) -> Dict[str, np.ndarray]:
+        """Like ``get_history``, but decoded into NumPy columns (see ``decode_history``)."""
+        return decode_history(self.get_history(symbol, resolution, limit)["history"], fields)
+
+    def get_resampled_arrays(self,
+                             symbol: str,
+                             resolution: str,
+                             limit: int = 500,
+                             base: Optional[str] = None,
+                             fields: Sequence[str] = FIELDS) -> Dict[str, np.ndarray]:
+        """
+        The latest ``limit`` bars of ``resolution``, derived from the stored ``base`` series.
+
+        Only ``base`` is downloaded (delta-synced as usual). Each resolution's
+        bars are kept between calls and only the newest, possibly partial bar
+        and anything after it is re-aggregated. The resolution is fetched from
+        the API instead when it is not a multiple of ``base``, when ``limit``
+        bars need more base candles than ``max_candles`` keeps (e.g. 1m for 20
+        daily bars at the default), or when the stored base history is still
+        too short (backfill the base series to go deeper).
+
+        Args:
+            symbol (str): Ticker symbol.
+            resolution (str): Target resolution, e.g. "15m", "1h", "D".
+            limit (int): Number of most recent bars to return.
+            base (Optional[str]): Base resolution; defaults to ``resample_from``, then "1m".
+            fields (Sequence[str]): Columns to return.
+
+        Returns:
+            Dict[str, np.ndarray]: Columns like ``get_history_arrays``; the last
+            bar is partial while its period is still running.
+        """
+        base = base or self.resample_from or "1m"
+        step, base_step = RESOLUTION_SECONDS.get(resolution), RESOLUTION_SECONDS.get(base)
+        if not step or not base_step or step <= base_step or step % base_step:
+            return decode_history(self._synced(symbol, resolution, limit), fields)
+
+        factor = step // base_step
+        need = factor * (limit + 1)     # +1 for a partial bar at either end
+        if need > self.max_candles:
+            # the base series is never kept that long, so resampling could not succeed
+            return decode_history(self._synced(symbol, resolution, limit), fields)
+        with self._lock_for(symbol, base):
+            self._sync(symbol, base, min(need, MAX_LIMIT))
+            stored = self._load(symbol, base)
+            key = (symbol, base, resolution)
+            generation, resampler = self._resamplers.get(key, (None, None))
+            if resampler is None or generation != self._generation.get((symbol, base), 0) \
+                    or resampler.bars.capacity < limit + 2:
+                resampler = Resampler(step, max_bars=max(limit, self.max_candles // factor) + 2)
+                self._resamplers[key] = (self._generation.get((symbol, base), 0), resampler)
+            resume = resampler.resume_from()
+            tail = len(stored)
+            while tail and (resume is None or to_seconds(stored[tail - 1]["timestamp"]) >= resume):
+                tail -= 1
+            if tail < len(stored):
+                resampler.update(decode_history(stored[tail:]))
+            bars = resampler.columns(limit)
+            short = len(stored) < need
+
+        if len(bars["timestamp"]) < limit and short:
+            return decode_history(self._synced(symbol, resolution, limit), fields)
+        return {f: bars[f] for f in fields}
+
+    def candles(self, symbol: str, resolution: str) -> List[Dict[str, Any]]:
+        """Returns every stored candle for a key, oldest first, without syncing."""
+        with self._lock_for(symbol, resolution):
+            return list(self._load(symbol, resolution))
+
+    def last_timestamp(self, symbol: str, resolution: str) -> Optional[int]:
+        """Returns the timestamp (Unix seconds) of the newest stored candle, if any."""
+        with self._lock_for(symbol, resolution):
+            stored = self._load(symbol, resolution)
+            return to_seconds(stored[-1]["timestamp"]) if stored else None
+
+    def merge(self, symbol: str, resolution: str, new_candles: List[Dict[str, Any]]) -> int:
+        """
+        Merges candles into the store, replacing any with the same timestamp.
+
+        Args:
+            symbol (str): Ticker symbol.
+            resolution (str): Time resolution.
+            new_candles (List[Dict[str, Any]]): Candles in any order.
+
+        Returns:
+            int: Number of candles written.
+        """
+        with self._lock_for(symbol, resolution):
+            return self._merge(symbol, resolution, new_candles)
+
+    # ---------- Internals ---------- #
+
+    def _synced(self, symbol: str, resolution: str, limit: int) -> List[Dict[str, Any]]:
+        """Syncs a key from the API and returns its latest ``limit`` stored candles."""
+        with self._lock_for(symbol, resolution):
+            self._sync(symbol, resolution, limit)
+            return self._load(symbol, resolution)[-limit:]
+
+    def _lock_for(self, symbol: str, resolution: str) -> threading.Lock:
+        key = (symbol, resolution)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _path(self, symbol: str, resolution: str) -> Path:
+        return self.cache_dir / f"{symbol}_{resolution}.jsonl"
+
+    def _load(self, symbol: str, resolution: str) -> List[Dict[str, Any]]:
+        """Returns the in-memory candle list for a key, reading the file on first use."""
+        key = (symbol, resolution)
+        if key in self._candles:
+            return self._candles[key]
+
+        by_ts: Dict[float, Dict[str, Any]] = {}
+        lines = 0
+        path = self._path(symbol, resolution)
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        candle = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash; everything before it is intact.
+                        continue
+                    by_ts[candle["timestamp"]] = candle  # later lines win
+                    lines += 1
+
+        self._candles[key] = [by_ts[ts] for ts in sorted(by_ts)][-self.max_candles:]
+        self._file_lines[key] = lines
+        return self._candles[key]
+
+    def _sync(self, symbol: str, resolution: str, limit: int) -> None:
+        stored = self._load(symbol, resolution)
+        step = RESOLUTION_SECONDS.get(resolution)
+
+        key = (symbol, resolution)
+        params: Dict[str, Any] = {"limit": min(limit, MAX_LIMIT)}
+        # Only the tail is needed once the store is as deep as it can usefully
+        # be: it covers ``limit`` (or is full), or the server has nothing older.
+        deep = len(stored) >= min(limit, self.max_candles) or key in self._exhausted
+        if stored and step and deep:
+            last_ts = to_seconds(stored[-1]["timestamp"])
+            # +1 re-fetches the (possibly still forming) last stored candle.
+            missing = int((time.time() - last_ts) // step) + 1
+            if missing < limit:
+                params = {"start_ts": last_ts, "limit": min(missing + 1, MAX_LIMIT)}
+
+        data = self.fetch_history(symbol, resolution, **params)
+        history = data.get("history") if data else None
+        if history and isinstance(history, list):
+            if "start_ts" not in params and len(history) < params["limit"]:
+                self._exhausted.add(key)     # e.g. a new listing with a short history
+            self._merge(symbol, resolution, history)
+
+    def _merge(self, symbol: str, resolution: str, new_candles: List[Dict[str, Any]]) -> int:
+        key = (symbol, resolution)
+        stored = self._load(symbol, resolution)
+        new_candles = sorted(new_candles, key=lambda c: c["timestamp"])
+        if not new_candles:
+            return 0
+
+        first_ts = new_candles[0]["timestamp"]
+        rewrite = False
+        if not stored or stored[-1]["timestamp"] < first_ts:
+            stored.extend(new_candles)
+        elif stored[0]["timestamp"] >= first_ts or new_candles[-1]["timestamp"] < stored[-1]["timestamp"]:
+            # Overlaps older data (e.g. a backfill); fall back to a full merge.
+            by_ts = {c["timestamp"]: c for c in stored}
+            by_ts.update((c["timestamp"], c) for c in new_candles)
+            stored[:] = [by_ts[ts] for ts in sorted(by_ts)]
+            rewrite = True
+            self._generation[key] = self._generation.get(key, 0) + 1
+        else:
+            # Common case: the new candles replace and extend the tail.
+            replaced = 0
+            while stored and stored[-1]["timestamp"] >= first_ts:
+                stored.pop()
+                replaced += 1
+            if replaced > 1:
+                self._generation[key] = self._generation.get(key, 0) + 1
+            stored.extend(new_candles)
+
+        if len(stored) > self.max_candles:
+            del stored[:len(stored) - self.max_candles]
+
+        path = self._path(symbol, resolution)
+        if rewrite or self._file_lines.get(key, 0) + len(new_candles) > 2 * max(len(stored), 1):
+            self._compact(symbol, resolution)
+        else:
+            with open(path, "a") as f:
+                f.write("".join(json.dumps(c) + "\n" for c in new_candles))
+            self._file_lines[key] = self._file_lines.get(key, 0) + len(new_candles)
+        return len(new_candles)
+
+    def _compact(self, symbol: str, resolution: str) -> None:
+        """Rewrites a key's file with exactly the in-memory candles, atomically."""
+        key = (symbol, resolution)
+        path = self._path(symbol, resolution)
+        tmp = path.with_suffix(".jsonl.tmp")
+        stored = self._candles[key]
+        with open(tmp, "w") as f:
+            f.write("".join(json.dumps(c) + "\n" for c in stored))
+        os.replace(tmp, path)
+        self._file_lines[key] = len(stored)
@@ -0,0 +1,172 @@
+"""
+Request coalescing ("single-flight") for identical API calls.
+
+When several callers ask for the same thing at once (two strategies checking
+BTC's price, three bot threads asking whether the crypto market is open),
+only the first call goes to the network; the others wait for it and receive
+the same decoded result. An optional ``linger`` window keeps a completed
+result for a short time, so the back-to-back repeats inside one trading cycle
+(``trade_logic`` -> ``check_stops`` -> ``qty_from_balance``) are served too.
+
+Shared results are the same object for every caller and must be treated as
+read-only. Errors are never shared beyond the callers already waiting.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+# Completed entries are swept once the table grows past this many keys
+_SWEEP_SIZE = 256
+
+
+def request_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, Tuple]:
+    """A hashable key for an endpoint and its query parameters (order-insensitive)."""
+    return endpoint, tuple(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None))
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "done_at")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done_at: Optional[float] = None
+
+
+class _Counters:
+    def __init__(self, linger: float):
+        self.linger = linger
+        self.calls = 0         # do() invocations
+        self.executions = 0    # calls that actually ran ``fn``
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.calls - self.executions,
+            "coalesced_ratio": (self.calls - self.executions) / self.calls if self.calls else 0.0,
+        }
+
+
+class SingleFlight(_Counters):
+    """Thread-safe coalescing of identical blocking calls."""
+
+    def __init__(self, linger: float = 0.0):
+        """
+        Args:
+            linger (float): Seconds a completed result keeps being served to new
+                            callers with the same key (0 = only share in-flight calls).
+        """
+        super().__init__(linger)
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Runs ``fn()`` unless an identical call is in flight (or lingering); returns its result."""
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None and call.done_at is not None and time.monotonic() - call.done_at > self.linger:
+                call = None
+            owner = call is None
+            if owner:
+                if len(self._calls) >= _SWEEP_SIZE:
+                    self._sweep()
+                call = self._calls[key] = _Call()
+                self.executions += 1
+
+        if not owner:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            raise
+        finally:
+            call.event.set()
+
+        with self._lock:
+            if self._calls.get(key) is call:
+                if self.linger > 0:
+                    call.done_at = time.monotonic()
+                else:
+                    del self._calls[key]
+        return call.result
+
+    def forget(self, keys: Iterable[Hashable] = None, endpoint: Optional[str] = None) -> None:
+        """
+        Drops lingering results so the next call goes to the network.
+
+        Args:
+            keys: Specific keys to drop.
+            endpoint (Optional[str]): Drop every ``request_key`` for this endpoint
+                                      (e.g. "/balance" after a trade).
+        """
+        with self._lock:
+            for key in list(keys or ()):
+                self._calls.pop(key, None)
+            if endpoint is not None:
+                for key in [k for k in self._calls if isinstance(k, tuple) and k and k[0] == endpoint]:
+                    del self._calls[key]
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, c in self._calls.items() if c.done_at is not None and now - c.done_at > self.linger]:
+            del self._calls[key]
+
+
+class AsyncSingleFlight(_Counters):
+    """Coalescing of identical coroutine calls within one event loop."""
+
+    def __init__(self, linger: float = 0.0):
+        super().__init__(linger)
+        self._calls: Dict[Hashable, Tuple[asyncio.Future, list]] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Awaits ``factory()`` unless an identical call is in flight (or lingering)."""
+        self.calls += 1
+        entry = self._calls.get(key)
+        if entry is not None:
+            task, done_at = entry
+            if not done_at or time.monotonic() - done_at[0] <= self.linger:
+                # shield: a cancelled waiter must not cancel the shared request
+                return await asyncio.shield(task)
+
+        if len(self._calls) >= _SWEEP_SIZE:
+            now = time.monotonic()
+            for k in [k for k, (_, d) in self._calls.items() if d and now - d[0] > self.linger]:
+                del self._calls[k]
+
+        self.executions += 1
+        task = asyncio.ensure_future(factory())
+        done_at: list = []
+        self._calls[key] = (task, done_at)
+
+        def finished(t: asyncio.Future) -> None:
+            if self._calls.get(key, (None,))[0] is not t:
+                return
+            if t.cancelled() or t.exception() is not None or self.linger <= 0:
+                del self._calls[key]
+            else:
+                done_at.append(time.monotonic())
+
+        task.add_done_callback(finished)
+        return await asyncio.shield(task)
+
+    def forget(self, keys: Iterable[Hashable] = None, endpoint: Optional[str] = None) -> None:
+        """See ``SingleFlight.forget``."""
+        for key in list(keys or ()):
+            self._calls.pop(key, None)
+        if endpoint is not None:
+            for key in [k for k in self._calls if isinstance(k, tuple) and k and k[0] == endpoint]:
+                del self._calls[key]
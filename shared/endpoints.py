@@ -0,0 +1,61 @@
+"""
+Where the Traydner API lives.
+
+Every client takes its host from ``api_host``: an explicit ``base_url``
+argument wins, then the ``TRAYDNER_BASE_URL`` environment variable, then the
+production Cloud Run URL. Pointing the variable at ``shared/mock_server.py``
+runs any bot offline:
+
+    TRAYDNER_BASE_URL=http://127.0.0.1:8080 python main.py
+
+It also holds the per-endpoint request timeouts the clients share.
+"""
+
+import os
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+Timeout = Union[float, Tuple[float, float]]
+
+PRODUCTION_HOST = "https://traydner-186649552655.us-central1.run.app"
+BASE_URL_ENV = "TRAYDNER_BASE_URL"
+
+CONNECT_TIMEOUT = 3.05
+# endpoint name -> (connect, read) seconds; a price quote that takes longer
+# than a few seconds is worth less than a retry, a 5000-candle history is not
+ENDPOINT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "price": (CONNECT_TIMEOUT, 5.0),
+    "balance": (CONNECT_TIMEOUT, 5.0),
+    "market_status": (CONNECT_TIMEOUT, 5.0),
+    "trade": (CONNECT_TIMEOUT, 10.0),
+    "history": (CONNECT_TIMEOUT, 20.0),
+}
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, 15.0)
+
+
+def api_host(base_url: Optional[str] = None) -> str:
+    """Returns the API host (scheme + authority, no trailing slash)."""
+    return (base_url or os.getenv(BASE_URL_ENV) or PRODUCTION_HOST).rstrip("/")
+
+
+def endpoint_name(endpoint: str) -> str:
+    """Reduces a path or URL ("/api/remote/history", "history", ...) to "history"."""
+    return urlsplit(endpoint).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def timeout_for(endpoint: str,
+                default: Timeout = DEFAULT_TIMEOUT,
+                overrides: Optional[Dict[str, Timeout]] = None) -> Timeout:
+    """
+    The (connect, read) timeout for a path or URL.
+
+    Args:
+        endpoint (str): Path or URL; only its last segment is used.
+        default (Timeout): Used for endpoints not in ``ENDPOINT_TIMEOUTS``.
+        overrides (Optional[Dict[str, Timeout]]): Per-endpoint values that win
+                                                  over ``ENDPOINT_TIMEOUTS``.
+    """
+    name = endpoint_name(endpoint)
+    if overrides and name in overrides:
+        return overrides[name]
+    return ENDPOINT_TIMEOUTS.get(name, default)
@@ -0,0 +1,216 @@
+"""
+Batched, asynchronous JSON-lines event log.
+
+``log_event`` used to open the log file, append one line and close it for
+every event, from several threads at once. ``EventLogger.log`` only appends
+the record to an in-memory queue. A background writer serializes whatever
+has queued up and writes it with a single ``write`` call:
+
+* at least every ``flush_interval`` seconds, or
+* as soon as ``batch_size`` events are waiting.
+
+The file stays open between batches. Records must not be mutated after
+they are logged, because they are serialized later on the writer thread.
+
+The log rotates like ``logging.handlers.RotatingFileHandler``
+(``trade_log.jsonl`` -> ``.1`` -> ``.2`` ...). It rotates when it would grow
+past ``max_bytes``, once it has been open for ``rotate_interval`` seconds,
+or both. With ``compress=True`` rotated files are gzipped (``.1.gz``).
+
+The queue is bounded by ``max_queue``. If the writer falls that far behind,
+new events are dropped and counted rather than blocking the caller. Queued
+events are flushed at interpreter exit.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+class EventLogger:
+    """Thread-safe, non-blocking JSON-lines logger with batching and rotation."""
+
+    def __init__(self,
+                 path: str,
+                 flush_interval: float = 1.0,
+                 batch_size: int = 256,
+                 max_bytes: Optional[int] = 50 * 1024 * 1024,
+                 rotate_interval: Optional[float] = None,
+                 backups: int = 5,
+                 compress: bool = False,
+                 max_queue: int = 100_000,
+                 encoder: Callable[[Any], str] = json.dumps):
+        """
+        Args:
+            path (str): Log file; appended to if it exists.
+            flush_interval (float): Maximum seconds an event waits in memory.
+            batch_size (int): Queued events that wake the writer early.
+            max_bytes (Optional[int]): Rotate before the file would exceed this; None = never.
+            rotate_interval (Optional[float]): Rotate after writing to one file this many seconds; None = never.
+            backups (int): Rotated files kept; older ones are deleted.
+            compress (bool): Gzip rotated files.
+            max_queue (int): Queued events beyond which new ones are dropped.
+            encoder (Callable): Turns one record into one line (without the newline).
+        """
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self.compress = compress
+        self.max_queue = max_queue
+        self.encoder = encoder
+
+        self._queue: Deque[Any] = deque()   # append/popleft are atomic
+        self._count_lock = threading.Lock()  # uncontended in practice; guards the counters
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flushed = threading.Condition()
+        self._lock = threading.Lock()       # start/stop
+        self._thread: Optional[threading.Thread] = None
+        self._at_exit = False
+        self._file = None
+        self._size = 0
+        self._opened = 0.0
+
+        self.logged = 0
+        self.written = 0
+        self.rejected = 0      # queue full; never counted in ``logged``
+        self.failed = 0        # logged but lost to a write error
+        self.batches = 0
+        self.rotations = 0
+
+    def log(self, record: Any) -> bool:
+        """
+        Queues one record; never blocks on I/O.
+
+        Returns:
+            bool: False if the queue was full and the record was dropped.
+        """
+        with self._count_lock:
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                return False
+            self._queue.append(record)
+            self.logged += 1
+        if self._thread is None:
+            self.start()
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def start(self) -> "EventLogger":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+                self._thread.start()
+                if not self._at_exit:
+                    atexit.register(self.close)
+                    self._at_exit = True
+        return self
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until everything logged so far is written; False on timeout."""
+        target, thread = self.logged, self._thread
+        if thread is None:
+            return not self._queue
+        self._wake.set()
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self.written + self.failed >= target or
+                                          not thread.is_alive(), timeout)
+
+    def close(self) -> None:
+        """Writes what is queued, stops the writer and closes the file."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join()
+        self._write_batch()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"logged": self.logged, "written": self.written, "rejected": self.rejected,
+                "failed": self.failed, "queued": len(self._queue), "batches": self.batches,
+                "rotations": self.rotations}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._write_batch()
+
+    def _write_batch(self) -> None:
+        batch = []
+        while self._queue:
+            batch.append(self._queue.popleft())
+        if batch:
+            lines = []
+            for record in batch:
+                try:
+                    lines.append(self.encoder(record) + "\n")
+                except (TypeError, ValueError) as e:
+                    lines.append(json.dumps({"event": "unserializable", "error": str(e)}) + "\n")
+            data = "".join(lines).encode("utf-8")
+            try:
+                self._open(len(data))
+                self._file.write(data)
+                self._file.flush()
+                self._size += len(data)
+                with self._count_lock:
+                    self.written += len(batch)
+                    self.batches += 1
+            except OSError as e:
+                print(f"Event log: failed to write {len(batch)} events to {self.path}: {e}")
+                with self._count_lock:
+                    self.failed += len(batch)
+        with self._flushed:
+            self._flushed.notify_all()
+
+    def _open(self, incoming: int) -> None:
+        """Opens the file, rotating first if ``incoming`` bytes would overflow it or it is too old."""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "ab")
+            self._size = self._file.tell()
+            self._opened = time.time()
+        too_big = self.max_bytes is not None and self._size and self._size + incoming > self.max_bytes
+        too_old = self.rotate_interval is not None and self._size and \
+            time.time() - self._opened >= self.rotate_interval
+        if too_big or too_old:
+            self._rotate()
+            self._file = open(self.path, "ab")
+            self._size = 0
+            self._opened = time.time()
+
+    def _backup(self, n: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{n}" + (".gz" if self.compress else ""))
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        self.rotations += 1
+        if self.backups <= 0:
+            self.path.unlink()
+            return
+        for n in range(self.backups - 1, 0, -1):
+            if self._backup(n).exists():
+                os.replace(self._backup(n), self._backup(n + 1))
+        if self.compress:
+            with open(self.path, "rb") as src, gzip.open(self._backup(1), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            self.path.unlink()
+        else:
+            os.replace(self.path, self._backup(1))
@@ -0,0 +1,280 @@
+"""
+Hedged GETs: bound tail latency by racing a second copy of a slow request.
+
+A request that has not answered by its endpoint's recent p95 latency is
+probably stuck behind a slow backend instance or a lost packet. ``Hedger``
+fires a second, identical request at that point and returns whichever
+answer arrives first. Only about 5% of requests ever reach the hedge delay,
+so the extra load is small. A budget (``max_hedge_ratio``) caps it further
+when the backend is slow across the board and hedging would not help.
+
+Only idempotent requests (GETs) may be hedged, and only small ones:
+downloads of more than ``MAX_HEDGED_LIMIT`` candles are naturally slower than
+the endpoint's usual tail syncs, so they would always look slow (see
+``hedgeable``). A blocking request cannot be cancelled, so the loser runs to
+completion and its answer is dropped. An async loser is cancelled.
+
+Blocking attempts only go to the thread pool when a worker is free for them,
+so no request ever queues behind stuck ones. When the pool is busy the call
+simply runs unhedged on the caller's thread, and queueing is never mistaken
+for backend latency.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Mapping, Optional
+
+from .endpoints import endpoint_name
+
+WINDOW = 200            # latencies kept per endpoint
+MIN_SAMPLES = 20        # below this, ``initial_delay`` is used
+HEDGE_QUANTILE = 0.95
+MAX_HEDGED_LIMIT = 500  # larger ``limit``s are bulk downloads, not hedged
+
+
+def hedgeable(method: str, params: Optional[Mapping[str, Any]] = None) -> bool:
+    """Whether a request may be hedged: a GET that is not a bulk download."""
+    if method != "GET":
+        return False
+    try:
+        return int((params or {}).get("limit") or 0) <= MAX_HEDGED_LIMIT
+    except (TypeError, ValueError):
+        return True
+
+
+class _Endpoint:
+    __slots__ = ("latencies", "requests", "hedged", "hedge_wins")
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+
+class Hedger:
+    """
+    Per-endpoint latency tracking and hedged execution of blocking or async calls.
+
+    Thread-safe; one instance can serve every client in a process.
+    """
+
+    def __init__(self,
+                 initial_delay: float = 1.0,
+                 min_delay: float = 0.05,
+                 max_delay: float = 5.0,
+                 max_hedge_ratio: float = 0.1,
+                 max_workers: int = 32,
+                 window: int = WINDOW):
+        """
+        Args:
+            initial_delay (float): Hedge delay until an endpoint has ``MIN_SAMPLES``
+                                   latencies recorded.
+            min_delay (float): Lower bound on the hedge delay.
+            max_delay (float): Upper bound on the hedge delay.
+            max_hedge_ratio (float): Hedges allowed as a fraction of requests
+                                     (plus a small allowance at start-up).
+            max_workers (int): Threads running blocking attempts.
+            window (int): Latencies kept per endpoint for the p95.
+        """
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.window = window
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._free = max_workers     # idle pool workers; guarded by ``_lock``
+
+    def _endpoint(self, name: str) -> _Endpoint:
+        entry = self._endpoints.get(name)
+        if entry is None:
+            entry = self._endpoints[name] = _Endpoint(self.window)
+        return entry
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        """Adds one completed attempt's latency."""
+        with self._lock:
+            self._endpoint(endpoint_name(endpoint)).latencies.append(seconds)
+
+    def delay(self, endpoint: str) -> float:
+        """Seconds to wait before hedging: the endpoint's recent p95, clamped."""
+        with self._lock:
+            latencies = sorted(self._endpoint(endpoint_name(endpoint)).latencies)
+        if len(latencies) < MIN_SAMPLES:
+            return self.initial_delay
+        p95 = latencies[min(int(HEDGE_QUANTILE * len(latencies)), len(latencies) - 1)]
+        return min(max(p95, self.min_delay), self.max_delay)
+
+    def _start(self, name: str) -> None:
+        with self._lock:
+            self._endpoint(name).requests += 1
+
+    def _try_hedge(self, name: str) -> bool:
+        """Counts a hedge if the budget allows one."""
+        with self._lock:
+            entry = self._endpoint(name)
+            total_hedged = sum(e.hedged for e in self._endpoints.values())
+            total_requests = sum(e.requests for e in self._endpoints.values())
+            if total_hedged >= self.max_hedge_ratio * total_requests + 5:
+                return False
+            entry.hedged += 1
+            return True
+
+    def _reserve(self) -> bool:
+        """Claims an idle pool worker, if there is one."""
+        with self._lock:
+            if not self._free:
+                return False
+            self._free -= 1
+            return True
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._free += 1
+
+    def _submit(self, ctx: contextvars.Context, fn: Callable, *args):
+        """Runs ``fn`` on a reserved worker, in a copy of ``ctx``."""
+        future = self._pool.submit(ctx.copy().run, fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _won(self, name: str) -> None:
+        with self._lock:
+            self._endpoint(name).hedge_wins += 1
+
+    def _timed(self, name: str, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = fn()
+        self.record(name, time.perf_counter() - start)
+        return result
+
+    def call(self, endpoint: str, fn: Callable[[], Any],
+             on_hedge: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Runs ``fn()`` and, if it is slower than the hedge delay, a second ``fn()``
+        in parallel; returns the first successful result. Without an idle pool
+        worker ``fn()`` just runs once on the calling thread.
+
+        Args:
+            endpoint (str): Path or URL, for the per-endpoint latency window.
+            fn (Callable): The (idempotent) request; called from pool threads.
+            on_hedge (Optional[Callable]): Runs before the hedge is sent, e.g.
+                                           to take a rate-limiter token.
+
+        Raises:
+            Whatever ``fn`` raised, if every attempt failed.
+        """
+        name = endpoint_name(endpoint)
+        self._start(name)
+        if not self._reserve():
+            return self._timed(name, fn)
+        # Attempts run in the caller's context (e.g. its rate-limit lane).
+        # A context can only be entered by one thread at a time, so each gets a copy.
+        ctx = contextvars.copy_context()
+        first = self._submit(ctx, self._timed, name, fn)
+        done, _ = wait([first], timeout=self.delay(name))
+        if done or not self._reserve():
+            return first.result()
+        if not self._try_hedge(name):
+            self._release()
+            return first.result()
+
+        def hedged():
+            if on_hedge is not None:
+                on_hedge()
+            return self._timed(name, fn)
+
+        hedge = self._submit(ctx, hedged)
+        pending = {first, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._won(name)
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    async def call_async(self, endpoint: str, factory: Callable[[], Awaitable[Any]],
+                         on_hedge: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """``call`` for coroutines; ``on_hedge`` is awaited and the losing attempt is cancelled."""
+        name = endpoint_name(endpoint)
+        self._start(name)
+
+        async def timed(hedging: bool = False):
+            if hedging and on_hedge is not None:
+                await on_hedge()
+            start = time.perf_counter()
+            result = await factory()
+            self.record(name, time.perf_counter() - start)
+            return result
+
+        first = asyncio.ensure_future(timed())
+        done, _ = await asyncio.wait({first}, timeout=self.delay(name))
+        if done or not self._try_hedge(name):
+            return await first
+
+        hedge = asyncio.ensure_future(timed(hedging=True))
+        pending = {first, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._won(name)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per endpoint: ``requests``, ``hedged``, ``hedge_rate``, ``hedge_wins``
+        (hedges that answered first), ``p50_ms``/``p95_ms`` of recent attempts
+        and the current ``delay_ms``.
+        """
+        with self._lock:
+            names = list(self._endpoints)
+        out = {}
+        for name in names:
+            with self._lock:
+                entry = self._endpoints[name]
+                latencies = sorted(entry.latencies)
+                requests_made, hedged, wins = entry.requests, entry.hedged, entry.hedge_wins
+            pick = (lambda q: 1000 * latencies[min(int(q * len(latencies)), len(latencies) - 1)]) \
+                if latencies else (lambda q: 0.0)
+            out[name] = {
+                "requests": requests_made,
+                "hedged": hedged,
+                "hedge_rate": hedged / requests_made if requests_made else 0.0,
+                "hedge_wins": wins,
+                "p50_ms": pick(0.5),
+                "p95_ms": pick(HEDGE_QUANTILE),
+                "delay_ms": 1000 * self.delay(name),
+            }
+        return out
+
+
+_default_hedger: Optional[Hedger] = None
+_default_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """Returns the process-wide hedger, creating it with defaults on first use."""
+    global _default_hedger
+    with _default_lock:
+        if _default_hedger is None:
+            _default_hedger = Hedger()
+        return _default_hedger
@@ -0,0 +1,131 @@
+"""
+Bounded in-memory history that spills old rows to a memory-mapped file.
+
+The newest ``capacity`` rows are kept in a ``RingBuffer``, so appends and
+evictions are O(1) and the recent columns are zero-copy NumPy views. Rows
+pushed out of the buffer are appended in chunks to ``spill_path`` as a flat
+array of records. Looking one up by its global index maps the file with
+``np.memmap``, so the pages come from the OS page cache rather than the
+process heap. Memory therefore stays flat however long the process runs.
+Without a ``spill_path`` evicted rows are simply dropped.
+
+    prices = History(10_000, ("timestamp", "close"), spill_path="prices.bin")
+    prices.append(timestamp=ts, close=price)
+    prices.column("close")          # newest rows, no copy
+    prices.row(0)                   # oldest row ever, from the file
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .ring_buffer import RingBuffer
+
+
+class History:
+    """Append-only rows of named numeric columns with global indices."""
+
+    def __init__(self,
+                 capacity: int,
+                 fields: Sequence[str],
+                 dtypes: Optional[Mapping[str, type]] = None,
+                 spill_path: Optional[str] = None,
+                 spill_chunk: int = 1024):
+        """
+        Args:
+            capacity (int): Rows kept in memory.
+            fields (Sequence[str]): Column names.
+            dtypes (Optional[Mapping[str, type]]): Per-column dtype; float64 by default.
+            spill_path (Optional[str]): File evicted rows are appended to (truncated
+                                        on start); None drops them.
+            spill_chunk (int): Evicted rows buffered per write.
+        """
+        dtypes = dict(dtypes or {})
+        self.fields = tuple(fields)
+        self.recent = RingBuffer(capacity, self.fields, dtypes)
+        self.record = np.dtype([(f, dtypes.get(f, np.float64)) for f in self.fields])
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._pending = np.empty(spill_chunk, dtype=self.record)
+        self._n_pending = 0
+        self._total = 0         # rows ever appended
+        self._spilled = 0       # rows in the spill file
+        self._map: Optional[np.memmap] = None
+        self._file = None
+        if self.spill_path is not None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.spill_path, "wb")
+
+    def __len__(self) -> int:
+        return self._total
+
+    @property
+    def first_index(self) -> int:
+        """Global index of the oldest row still retrievable."""
+        if self.spill_path is not None:
+            return 0
+        return self._total - len(self.recent)
+
+    @property
+    def recent_start(self) -> int:
+        """Global index of the oldest row held in memory."""
+        return self._total - len(self.recent)
+
+    def append(self, **values) -> None:
+        """Adds a row (missing columns are 0), spilling the oldest in-memory row if full."""
+        if len(self.recent) == self.recent.capacity and self._file is not None:
+            self._pending[self._n_pending] = tuple(self.recent.column(f)[0] for f in self.fields)
+            self._n_pending += 1
+            if self._n_pending == len(self._pending):
+                self.flush()
+        self.recent.append(**values)
+        self._total += 1
+
+    def update_last(self, **values) -> None:
+        """Overwrites columns of the newest row (e.g. a still-forming candle)."""
+        self.recent.update_last(**values)
+
+    def column(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """View of the newest ``n`` in-memory values of a column (all of them if None)."""
+        view = self.recent.column(field)
+        return view[-n:] if n else view
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """The row at a global index (negative counts from the newest)."""
+        if index < 0:
+            index += self._total
+        if not self.first_index <= index < self._total:
+            raise IndexError(f"row {index} is not available")
+        if index >= self.recent_start:
+            offset = index - self.recent_start
+            return {f: self.recent.column(f)[offset].item() for f in self.fields}
+        if index >= self._spilled:
+            record = self._pending[index - self._spilled]
+        else:
+            record = self._spill_map()[index]
+        return {f: record[f].item() for f in self.fields}
+
+    def flush(self) -> None:
+        """Writes buffered evicted rows to the spill file."""
+        if self._file is None or not self._n_pending:
+            return
+        self._file.write(self._pending[:self._n_pending].tobytes())
+        self._file.flush()
+        self._spilled += self._n_pending
+        self._n_pending = 0
+
+    def _spill_map(self) -> np.memmap:
+        if self._map is None or len(self._map) != self._spilled:
+            self._map = np.memmap(self.spill_path, dtype=self.record, mode="r", shape=(self._spilled,))
+        return self._map
+
+    def close(self, delete: bool = False) -> None:
+        """Flushes and closes the spill file (removing it if ``delete``)."""
+        self.flush()
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if delete:
+                os.remove(self.spill_path)
@@ -0,0 +1,192 @@
+"""
+Vectorized whole-series indicators on NumPy arrays.
+
+Every function takes 1-D float arrays (oldest value first) and returns arrays
+of the same length, with NaN where the indicator is not yet defined. These
+replace the per-bot pandas ``ewm``/``rolling`` code and the ``ta`` package
+calls; see ``bench_indicators.py`` for timings against those paths.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+def _as_float(x) -> np.ndarray:
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+def _ewm(x: np.ndarray, alpha: float, seed: float, start: int) -> np.ndarray:
+    """
+    Evaluates ``y[t] = alpha * x[t] + (1 - alpha) * y[t-1]`` with ``y[start] = seed``.
+
+    The series is cut into blocks short enough that the (1 - alpha) ** -k
+    scale factors stay well inside float64 range. Within every block the
+    recurrence is solved in closed form with one cumulative sum (all blocks at
+    once, as rows of a matrix); only the carry from one block into the next is
+    a Python-level loop, once per block rather than once per element.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if start >= n:
+        return out
+    out[start] = seed
+    r = 1.0 - alpha
+    if r <= 0.0:
+        out[start + 1:] = x[start + 1:]
+        return out
+
+    tail = x[start + 1:]
+    m = len(tail)
+    if not m:
+        return out
+    block = int(min(max(1, 300.0 / -np.log(r)), m))
+    rows = -(-m // block)
+    padded = np.zeros(rows * block)
+    padded[:m] = tail
+    padded = padded.reshape(rows, block)
+
+    powers = r ** np.arange(1, block + 1)
+    # Row-local solution with a zero carry-in is powers * alpha * acc
+    padded /= powers
+    acc = np.cumsum(padded, axis=1)
+    acc *= alpha
+
+    # Carry into each row: y at the end of the previous row
+    carry = np.empty(rows)
+    prev = seed
+    decay = powers[-1]
+    last_local = decay * acc[:, -1]
+    for b in range(rows):
+        carry[b] = prev
+        prev = last_local[b] + decay * prev
+
+    acc += carry[:, None]
+    acc *= powers
+    out[start + 1:] = acc.reshape(-1)[:m]
+    return out
+
+
+def sma(x, period: int) -> np.ndarray:
+    """Simple moving average; NaN for the first ``period - 1`` values."""
+    x = _as_float(x)
+    out = np.full(len(x), np.nan)
+    if period <= len(x):
+        csum = np.cumsum(np.insert(x, 0, 0.0))
+        out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+
+def rolling_std(x, period: int) -> np.ndarray:
+    """Rolling population standard deviation (ddof=0), as used for Bollinger Bands."""
+    x = _as_float(x)
+    out = np.full(len(x), np.nan)
+    if period > len(x):
+        return out
+    # Centering first keeps the sum-of-squares form accurate for large prices.
+    c = x - x.mean()
+    s1 = np.cumsum(np.insert(c, 0, 0.0))
+    s2 = np.cumsum(np.insert(c * c, 0, 0.0))
+    mean = (s1[period:] - s1[:-period]) / period
+    var = (s2[period:] - s2[:-period]) / period - mean * mean
+    out[period - 1:] = np.sqrt(np.maximum(var, 0.0))
+    return out
+
+
+def ema(x, period: int) -> np.ndarray:
+    """
+    Exponential moving average seeded with the first value.
+
+    Matches ``pd.Series.ewm(span=period, adjust=False).mean()``.
+    """
+    x = _as_float(x)
+    if not len(x):
+        return x.copy()
+    return _ewm(x, 2.0 / (period + 1), x[0], 0)
+
+
+def wilder(x, period: int) -> np.ndarray:
+    """Wilder smoothing: seeded with the mean of the first ``period`` values, then alpha = 1/period."""
+    x = _as_float(x)
+    if period > len(x):
+        return np.full(len(x), np.nan)
+    return _ewm(x, 1.0 / period, x[:period].mean(), period - 1)
+
+
+def rsi(close, period: int = 14, method: str = "wilder") -> np.ndarray:
+    """
+    Relative Strength Index.
+
+    Args:
+        close: Closing prices.
+        period (int): Number of price changes averaged.
+        method (str): "simple" for rolling-mean averages (as in ``MomentumTrader``
+                      and adi-aashima), "wilder" for Wilder's smoothing.
+
+    Returns:
+        np.ndarray: RSI in [0, 100]; 100 where there were no losses. The first
+        ``period`` values are NaN.
+    """
+    if method not in ("simple", "wilder"):
+        raise ValueError("method must be 'simple' or 'wilder'")
+    close = _as_float(close)
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+
+    change = np.diff(close)
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change < 0, -change, 0.0)
+    smooth = sma if method == "simple" else wilder
+    avg_gain = smooth(gain, period)
+    avg_loss = smooth(loss, period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    values = np.where(avg_loss == 0, 100.0, values)
+    values[np.isnan(avg_gain)] = np.nan
+    out[1:] = values
+    return out
+
+
+def bollinger(close, period: int = 20, k: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bollinger Bands with a population standard deviation.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (middle, upper, lower).
+    """
+    middle = sma(close, period)
+    width = k * rolling_std(close, period)
+    return middle, middle + width, middle - width
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True range; the first bar has no previous close and uses high - low."""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    tr = high - low
+    if len(close) > 1:
+        prev_close = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+    return tr
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing (matches ``ta.volatility.AverageTrueRange``)."""
+    return wilder(true_range(high, low, close), period)
+
+
+def crossover(a, b) -> np.ndarray:
+    """True where ``a`` crosses above ``b``: a[i-1] <= b[i-1] and a[i] > b[i]."""
+    a, b = _as_float(a), _as_float(b)
+    out = np.zeros(len(a), dtype=bool)
+    out[1:] = (a[:-1] <= b[:-1]) & (a[1:] > b[1:])
+    return out
+
+
+def crossunder(a, b) -> np.ndarray:
+    """True where ``a`` crosses below ``b``: a[i-1] >= b[i-1] and a[i] < b[i]."""
+    a, b = _as_float(a), _as_float(b)
+    out = np.zeros(len(a), dtype=bool)
+    out[1:] = (a[:-1] >= b[:-1]) & (a[1:] < b[1:])
+    return out
@@ -0,0 +1,248 @@
+"""
+A local cash and holdings ledger kept in step with the account.
+
+Bots used to re-download ``/balance`` after every trade and before every
+sizing decision. The ledger instead applies each executed trade to a local
+copy immediately (optimistically), so sizing is a memory lookup, and only
+reconciles against ``/balance``:
+
+* on a schedule (``reconcile_interval``),
+* when something suggests the copy is wrong: a failed trade, a trade without
+  a price, or a cash/holding going negative.
+
+If the trade response carries the account balance (as the mock server's
+does), it is adopted as-is instead of the optimistic estimate.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+MARKETS = ("crypto", "stocks", "forex")
+
+
+def _unwrap(payload: Any) -> Optional[Dict[str, Any]]:
+    """Accepts both ``{"balance": {...}}`` and a bare balance dict."""
+    if not isinstance(payload, dict):
+        return None
+    balance = payload.get("balance", payload)
+    if not isinstance(balance, dict) or "cash" not in balance:
+        return None
+    return balance
+
+
+def _markets(balance: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """The per-market holdings of a balance, skipping scalar extras (timestamps, totals)."""
+    return {k: v for k, v in balance.items() if k != "cash" and isinstance(v, dict)}
+
+
+class Ledger:
+    """Thread-safe local view of cash and per-market holdings."""
+
+    def __init__(self,
+                 fetch_balance: Callable[[], Optional[Dict[str, Any]]],
+                 reconcile_interval: float = 300.0,
+                 tolerance: float = 1e-6,
+                 retry_interval: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            fetch_balance: Returns the ``/balance`` response (or None on failure),
+                           e.g. ``client.get_balance`` or ``td.account_balance``.
+            reconcile_interval (float): Seconds between scheduled reconciliations.
+            tolerance (float): Relative difference under which local and remote
+                               amounts count as equal; also the dust threshold
+                               below which a holding is dropped.
+            retry_interval (float): Minimum seconds between failed sync attempts.
+        """
+        self.fetch_balance = fetch_balance
+        self.reconcile_interval = reconcile_interval
+        self.tolerance = tolerance
+        self.retry_interval = retry_interval
+        self.clock = clock
+
+        self._cash = 0.0
+        self._holdings: Dict[str, Dict[str, float]] = {m: {} for m in MARKETS}
+        self._synced_at: Optional[float] = None
+        self._failed_at: Optional[float] = None
+        self._dirty = True
+        self._syncing = 0       # fetches in flight
+        self._lock = threading.Condition(threading.RLock())
+
+        self.syncs = 0
+        self.trades_applied = 0
+        self.mismatches = 0
+        self.last_mismatch: Optional[Dict[str, Any]] = None
+
+    # ---------- Reads (reconcile first if due) ---------- #
+
+    @property
+    def cash(self) -> float:
+        self.maybe_reconcile()
+        with self._lock:
+            return self._cash
+
+    def holding(self, symbol: str, market: Optional[str] = None) -> float:
+        """Units held of ``symbol`` (0 if none); searches every market if none is given."""
+        self.maybe_reconcile()
+        with self._lock:
+            found = self._find(symbol, market)
+            return self._holdings[found[0]][found[1]] if found else 0.0
+
+    def holdings(self, market: str) -> Dict[str, float]:
+        self.maybe_reconcile()
+        with self._lock:
+            return dict(self._holdings.get(market, {}))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The local balance in the API's shape: ``{"cash", "crypto", "stocks", "forex"}``."""
+        self.maybe_reconcile()
+        with self._lock:
+            return {"cash": self._cash, **{m: dict(h) for m, h in self._holdings.items()}}
+
+    # ---------- Writes ---------- #
+
+    def apply_trade(self,
+                    symbol: str,
+                    side: str,
+                    quantity: float,
+                    price: Optional[float],
+                    market: str,
+                    response: Any = None) -> None:
+        """
+        Records an executed trade.
+
+        Args:
+            symbol (str): Ticker traded.
+            side (str): "buy" or "sell".
+            quantity (float): Units traded.
+            price (Optional[float]): Execution (or last seen) price.
+            market (str): "crypto", "stocks" or "forex".
+            response: The trade endpoint's response; None means the trade
+                      failed or its outcome is unknown, so the ledger is
+                      reconciled before its next read.
+        """
+        with self._lock:
+            if response is None:
+                self._dirty = True
+                return
+            remote = _unwrap(response.get("balance")) if isinstance(response, dict) else None
+            if remote is not None:
+                self._adopt(remote)
+                self.trades_applied += 1
+                return
+            if price is None:
+                self._dirty = True
+                return
+
+            sign = 1 if side == "buy" else -1
+            found = self._find(symbol, market)
+            market, key = found if found else (market, symbol)
+            book = self._holdings.setdefault(market, {})
+            book[key] = book.get(key, 0.0) + sign * quantity
+            self._cash -= sign * quantity * price
+            self.trades_applied += 1
+
+            if abs(book[key]) <= self.tolerance * max(1.0, quantity):
+                del book[key]
+            elif book[key] < 0:
+                self._dirty = True
+            if self._cash < 0:
+                self._dirty = True
+
+    def invalidate(self) -> None:
+        """Forces a reconciliation before the next read."""
+        with self._lock:
+            self._dirty = True
+
+    def maybe_reconcile(self) -> bool:
+        """
+        Syncs with ``/balance`` if the ledger is dirty or the schedule says so.
+
+        While another thread's sync is in flight the current copy is served,
+        except before the very first sync, which is waited for.
+        """
+        with self._lock:
+            now = self.clock()
+            due = self._dirty or self._synced_at is None or now - self._synced_at >= self.reconcile_interval
+            if not due:
+                return False
+            if self._failed_at is not None and now - self._failed_at < self.retry_interval:
+                return False
+            if self._syncing:
+                if self._synced_at is None:
+                    self._lock.wait_for(lambda: not self._syncing)
+                return False
+        return self.sync()
+
+    def sync(self) -> bool:
+        """
+        Replaces the local state with ``/balance``; returns False if the fetch failed.
+
+        The fetch runs without the lock held, so reads and trades on other
+        threads are not held up by it. If a trade is applied meanwhile, the
+        balance may predate it; it is then discarded and the ledger stays dirty.
+        """
+        with self._lock:
+            self._syncing += 1
+            trades_before = self.trades_applied
+        try:
+            remote = _unwrap(self.fetch_balance())
+        except Exception as e:
+            print(f"Ledger: error fetching balance: {e}")
+            remote = None
+        with self._lock:
+            self._syncing -= 1
+            self._lock.notify_all()
+            if remote is None:
+                self._failed_at = self.clock()
+                return False
+            self._failed_at = None
+            if self.trades_applied != trades_before:
+                self._dirty = True
+                return False
+            if self._synced_at is not None:
+                self._check(remote)
+            self._adopt(remote)
+            self.syncs += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"syncs": self.syncs, "trades_applied": self.trades_applied, "mismatches": self.mismatches}
+
+    # ---------- Internals ---------- #
+
+    def _find(self, symbol: str, market: Optional[str]):
+        """(market, key) of an existing holding, matching the symbol case-insensitively."""
+        wanted = symbol.upper()
+        for m in ([market] if market else list(self._holdings)):
+            for key in self._holdings.get(m, {}):
+                if key.upper() == wanted:
+                    return m, key
+        return None
+
+    def _adopt(self, remote: Dict[str, Any]) -> None:
+        self._cash = float(remote.get("cash", 0.0))
+        self._holdings = {m: {s: float(q) for s, q in _markets(remote).get(m, {}).items() if q}
+                          for m in list(MARKETS) + [k for k in _markets(remote) if k not in MARKETS]}
+        self._synced_at = self.clock()
+        self._dirty = False
+
+    def _check(self, remote: Dict[str, Any]) -> None:
+        """Counts a mismatch if the local state had drifted from the account."""
+        def differs(a: float, b: float) -> bool:
+            return abs(a - b) > self.tolerance * max(1.0, abs(a), abs(b))
+
+        diffs = {}
+        if differs(self._cash, float(remote.get("cash", 0.0))):
+            diffs["cash"] = (self._cash, float(remote.get("cash", 0.0)))
+        markets = _markets(remote)
+        for market in set(self._holdings) | set(markets):
+            local = self._holdings.get(market, {})
+            theirs = markets.get(market, {})
+            for symbol in set(local) | set(theirs):
+                if differs(local.get(symbol, 0.0), float(theirs.get(symbol, 0.0))):
+                    diffs[f"{market}.{symbol}"] = (local.get(symbol, 0.0), float(theirs.get(symbol, 0.0)))
+        if diffs:
+            self.mismatches += 1
+            self.last_mismatch = diffs
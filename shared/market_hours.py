@@ -0,0 +1,291 @@
+"""
+Trading-hours calendar and a market-status cache built on it.
+
+Crypto trades around the clock. US stocks trade 9:30-16:00 New York time
+on weekdays, excluding NYSE holidays and closing at 13:00 on the usual
+early-close days. Forex runs from Sunday 17:00 to Friday 17:00 New York
+time. ``MarketStatusCache`` uses that calendar to decide how long an
+``isOpen`` answer from the API stays valid: until shortly before the next
+scheduled open or close. Near a boundary it re-asks the API every few
+seconds, so the network only confirms the actual state change. If the API
+disagrees with the calendar (an unlisted holiday, an unscheduled early
+close, a halt), the API wins and is re-checked on a short TTL.
+"""
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+CRYPTO = "crypto"
+STOCK = "stock"
+FOREX = "forex"
+_MARKET_ALIASES = {"stocks": STOCK, "stock": STOCK, "crypto": CRYPTO, "forex": FOREX}
+
+# One-off NYSE closures (national days of mourning, ...) that no rule produces
+NYSE_SPECIAL_CLOSURES = {
+    date(2025, 1, 9),
+}
+
+# Well-known tickers, so symbol lookups can use the calendar too
+KNOWN_SYMBOLS = {
+    **{s: CRYPTO for s in ("BTC", "ETH", "SOL", "DOGE", "XRP", "ADA", "LTC", "AVAX", "DOT", "LINK", "BNB")},
+    **{s: FOREX for s in ("EUR", "GBP", "JPY", "AUD", "CAD", "CHF", "NZD", "CNY", "MXN")},
+}
+
+STOCK_OPEN = (9, 30)
+STOCK_CLOSE = (16, 0)
+STOCK_EARLY_CLOSE = (13, 0)
+FOREX_ROLL = (17, 0)   # Sunday open / Friday close
+
+
+def normalize_market(market: str) -> str:
+    """Maps the API's market names ("stock"/"stocks", "crypto", "forex") to one spelling."""
+    try:
+        return _MARKET_ALIASES[market.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown market: {market!r}")
+
+
+def _at(day: date, hm: Tuple[int, int]) -> float:
+    return datetime(day.year, day.month, day.day, hm[0], hm[1], tzinfo=NEW_YORK).timestamp()
+
+
+def _easter(year: int) -> date:
+    """Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The ``n``-th ``weekday`` (Monday = 0) of a month; ``n = -1`` for the last."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> Optional[date]:
+    """NYSE observance: Saturday holidays move to Friday, Sunday ones to Monday."""
+    if day.weekday() == 5:
+        # ... except New Year's Day, which is then not made up on Dec 31
+        return None if (day.month, day.day) == (1, 1) else day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year: int) -> FrozenSet[date]:
+    """NYSE full-day closures in ``year`` (early closes are in ``nyse_early_closes``)."""
+    fixed = [date(year, 1, 1), date(year, 7, 4), date(year, 12, 25)]
+    if year >= 2022:
+        fixed.append(date(year, 6, 19))     # Juneteenth
+    holidays = {_observed(day) for day in fixed} - {None}
+    holidays |= {
+        _nth_weekday(year, 1, 0, 3),        # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),        # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),       # Memorial Day
+        _nth_weekday(year, 9, 0, 1),        # Labor Day
+        _nth_weekday(year, 11, 3, 4),       # Thanksgiving
+    }
+    holidays |= {day for day in NYSE_SPECIAL_CLOSURES if day.year == year}
+    return frozenset(holidays)
+
+
+def _is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+
+@lru_cache(maxsize=None)
+def nyse_early_closes(year: int) -> FrozenSet[date]:
+    """
+    NYSE 13:00 closes in ``year``: July 3, the day after Thanksgiving and
+    Christmas Eve, whenever they are trading days. One-off early closes are
+    left to the API check.
+    """
+    days = (date(year, 7, 3), _nth_weekday(year, 11, 3, 4) + timedelta(days=1), date(year, 12, 24))
+    return frozenset(day for day in days if _is_trading_day(day))
+
+
+def _stock_close(day: date) -> Tuple[int, int]:
+    return STOCK_EARLY_CLOSE if day in nyse_early_closes(day.year) else STOCK_CLOSE
+
+
+def is_open(market: str, ts: Optional[float] = None) -> bool:
+    """Whether the calendar has ``market`` open at Unix time ``ts`` (default: now)."""
+    market = normalize_market(market)
+    if market == CRYPTO:
+        return True
+    ts = time.time() if ts is None else ts
+    local = datetime.fromtimestamp(ts, NEW_YORK)
+    day = local.date()
+    hm = (local.hour, local.minute)
+    if market == STOCK:
+        return _is_trading_day(day) and STOCK_OPEN <= hm < _stock_close(day)
+    weekday = day.weekday()
+    if weekday == 5:
+        return False
+    if weekday == 6:
+        return hm >= FOREX_ROLL
+    if weekday == 4:
+        return hm < FOREX_ROLL
+    return True
+
+
+def next_change(market: str, ts: Optional[float] = None) -> Optional[float]:
+    """Unix time of the next scheduled open or close after ``ts``; None for crypto."""
+    market = normalize_market(market)
+    if market == CRYPTO:
+        return None
+    ts = time.time() if ts is None else ts
+    today = datetime.fromtimestamp(ts, NEW_YORK).date()
+    for offset in range(0, 15):
+        day = today + timedelta(days=offset)
+        if market == STOCK:
+            candidates = (_at(day, STOCK_OPEN), _at(day, _stock_close(day))) if _is_trading_day(day) else ()
+        else:
+            candidates = (_at(day, FOREX_ROLL),) if day.weekday() in (4, 6) else ()
+        for boundary in candidates:
+            if boundary > ts:
+                return boundary
+    return None
+
+
+class MarketStatusCache:
+    """
+    Caches ``{"isOpen": ...}`` answers per symbol or market, with TTLs from the calendar.
+
+    Thread-safe. ``get`` wraps a blocking fetch; ``lookup``/``store`` let an
+    async client use the same cache around its own awaits.
+    """
+
+    def __init__(self,
+                 fetch: Optional[Callable[..., Optional[Dict[str, Any]]]] = None,
+                 guard: float = 120.0,
+                 near_ttl: float = 10.0,
+                 mismatch_ttl: float = 60.0,
+                 max_ttl: float = 3600.0,
+                 unknown_ttl: float = 60.0,
+                 symbol_markets: Optional[Dict[str, str]] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            fetch: Called as ``fetch(symbol=..., market=...)``; returns the API
+                   response or None on failure (failures are not cached).
+            guard (float): Seconds before a scheduled open/close at which cached
+                           answers stop being trusted.
+            near_ttl (float): TTL inside the guard window, i.e. how often the API
+                              is polled while waiting for the state to flip.
+            mismatch_ttl (float): TTL when the API disagrees with the calendar.
+            max_ttl (float): Upper bound on any TTL (also the crypto re-check).
+            unknown_ttl (float): TTL for symbols whose market is not known.
+            symbol_markets (Optional[Dict[str, str]]): Extra symbol -> market
+                           mappings on top of ``KNOWN_SYMBOLS`` (e.g. stock
+                           tickers); more are learned from /balance.
+        """
+        self.fetch = fetch
+        self.guard = guard
+        self.near_ttl = near_ttl
+        self.mismatch_ttl = mismatch_ttl
+        self.max_ttl = max_ttl
+        self.unknown_ttl = unknown_ttl
+        self.symbol_markets = dict(KNOWN_SYMBOLS)
+        self._lock = threading.Lock()
+        self.learn_markets(symbol_markets or {})
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+
+    @staticmethod
+    def _key(symbol: Optional[str], market: Optional[str]) -> Tuple[str, str]:
+        # Mirrors the API: the symbol takes precedence over the market
+        if symbol:
+            return "symbol", symbol.upper()
+        if market:
+            return "market", normalize_market(market)
+        raise ValueError("Either 'symbol' or 'market' must be provided.")
+
+    def learn_markets(self, symbol_markets: Dict[str, str]) -> None:
+        """Adds symbol -> market mappings (e.g. from config), so those symbols get calendar TTLs."""
+        learned = {symbol.upper(): normalize_market(market) for symbol, market in symbol_markets.items()}
+        with self._lock:
+            self.symbol_markets.update(learned)
+
+    def learn_balance(self, balance: Any) -> None:
+        """Learns the market of every holding in a /balance response (``{market: {symbol: qty}}``)."""
+        if isinstance(balance, dict) and isinstance(balance.get("balance"), dict):
+            balance = balance["balance"]
+        if not isinstance(balance, dict):
+            return
+        self.learn_markets({symbol: market for market, holdings in balance.items()
+                            if isinstance(holdings, dict) and market.lower() in _MARKET_ALIASES
+                            for symbol in holdings})
+
+    def market_of(self, key: Tuple[str, str]) -> Optional[str]:
+        kind, name = key
+        return name if kind == "market" else self.symbol_markets.get(name)
+
+    def ttl(self, key: Tuple[str, str], observed_open: bool, now: float) -> float:
+        """How long an answer for ``key`` stays valid, given what the API said."""
+        market = self.market_of(key)
+        if market is None:
+            return self.unknown_ttl
+        if observed_open != is_open(market, now):
+            return self.mismatch_ttl
+        boundary = next_change(market, now)
+        if boundary is None:
+            return self.max_ttl
+        until_guard = boundary - self.guard - now
+        return min(until_guard, self.max_ttl) if until_guard > 0 else self.near_ttl
+
+    def lookup(self, symbol: Optional[str] = None, market: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Returns a fresh cached answer, or None if the API must be asked."""
+        key = self._key(symbol, market)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() < entry[1]:
+                self.hits += 1
+                return dict(entry[0])
+            self.misses += 1
+            return None
+
+    def store(self, response: Optional[Dict[str, Any]], symbol: Optional[str] = None,
+              market: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Caches an API response (ignored if it is not a valid status) and returns it."""
+        if not isinstance(response, dict) or "isOpen" not in response:
+            return response
+        key = self._key(symbol, market)
+        now = self.clock()
+        expires = now + self.ttl(key, bool(response["isOpen"]), now)
+        with self._lock:
+            self._entries[key] = (dict(response), expires)
+        return response
+
+    def get(self, symbol: Optional[str] = None, market: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Cached market status, calling ``fetch`` only when the cached answer expired."""
+        cached = self.lookup(symbol, market)
+        if cached is not None:
+            return cached
+        return self.store(self.fetch(symbol=symbol, market=market), symbol, market)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,269 @@
+"""
+Per-endpoint call metrics for the Traydner clients.
+
+Every network attempt records its endpoint, status code, latency and
+response size. JSON decoding time, retries and cache hits (coalesced GETs,
+market-status answers served locally) are counted separately, so a slow
+``/history`` can be told apart from a slow decode of a large one.
+
+    from shared.metrics import get_metrics
+    print(get_metrics().snapshot()["history"]["latency_ms"]["p99"])
+
+Setting ``TRAYDNER_METRICS_LOG=metrics.jsonl`` makes the process-wide
+registry append a snapshot to that file every minute (see
+``MetricsExporter``).
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from .endpoints import endpoint_name
+
+# Upper bounds in seconds, sqrt(2) apart from 10 us to ~80 s
+BUCKETS = tuple(1e-5 * 2 ** (k / 2) for k in range(47))
+QUANTILES = (0.5, 0.9, 0.99)
+
+METRICS_LOG_ENV = "TRAYDNER_METRICS_LOG"
+EXPORT_INTERVAL = 60.0
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are interpolated within a bucket."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: Sequence[float] = BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def copy(self) -> "Histogram":
+        other = Histogram(self.bounds)
+        other.counts = list(self.counts)
+        other.count, other.total, other.max = self.count, self.total, self.max
+        return other
+
+    def summary(self, scale: float = 1000.0) -> Dict[str, float]:
+        """count, mean, quantiles and max, with values multiplied by ``scale`` (ms by default)."""
+        out = {"count": self.count, "mean": scale * self.total / self.count if self.count else 0.0}
+        for q in QUANTILES:
+            out[f"p{int(q * 100)}"] = scale * self.quantile(q)
+        out["max"] = scale * self.max
+        return out
+
+
+class _EndpointMetrics:
+    __slots__ = ("latency", "decode", "status", "errors", "bytes", "retries", "cache_hits")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.decode = Histogram()
+        self.status: Dict[int, int] = defaultdict(int)
+        self.errors = 0
+        self.bytes = 0
+        self.retries = 0
+        self.cache_hits = 0
+
+
+class ClientMetrics:
+    """Thread-safe registry of per-endpoint counters and histograms."""
+
+    def __init__(self):
+        self._endpoints: Dict[str, _EndpointMetrics] = defaultdict(_EndpointMetrics)
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, endpoint: str, seconds: float, status: Optional[int] = None, size: int = 0) -> None:
+        """
+        Records one network attempt.
+
+        Args:
+            endpoint (str): Path or URL; only its last segment is used.
+            seconds (float): Time until the response body was read.
+            status (Optional[int]): HTTP status; None if the attempt raised
+                                    (timeout, connection error).
+            size (int): Response body bytes.
+        """
+        with self._lock:
+            entry = self._endpoints[endpoint_name(endpoint)]
+            entry.latency.observe(seconds)
+            entry.bytes += size
+            if status is None:
+                entry.errors += 1
+            else:
+                entry.status[status] += 1
+
+    def observe_decode(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self._endpoints[endpoint_name(endpoint)].decode.observe(seconds)
+
+    def retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._endpoints[endpoint_name(endpoint)].retries += 1
+
+    def cache_hit(self, endpoint: str) -> None:
+        """A call answered without a request of its own (coalesced or cached)."""
+        with self._lock:
+            self._endpoints[endpoint_name(endpoint)].cache_hits += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns per-endpoint metrics.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Endpoint name to ``requests``, ``errors``
+            (attempts without a response), ``status`` (code -> count), ``bytes``,
+            ``retries``, ``cache_hits``, and ``latency_ms``/``decode_ms``
+            summaries (count, mean, p50, p90, p99, max).
+        """
+        with self._lock:
+            return {
+                name: {
+                    "requests": e.latency.count,
+                    "errors": e.errors,
+                    "status": {str(code): n for code, n in sorted(e.status.items())},
+                    "bytes": e.bytes,
+                    "retries": e.retries,
+                    "cache_hits": e.cache_hits,
+                    "latency_ms": e.latency.summary(),
+                    "decode_ms": e.decode.summary(),
+                }
+                for name, e in sorted(self._endpoints.items())
+            }
+
+    def histograms(self) -> Dict[str, Dict[str, Histogram]]:
+        """Copies of the raw latency/decode histograms, for exporters that need buckets."""
+        with self._lock:
+            return {name: {"latency": e.latency.copy(), "decode": e.decode.copy()}
+                    for name, e in self._endpoints.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+            self.started = time.time()
+
+    def report(self) -> str:
+        """One line per endpoint: requests, p50/p99 latency, decode p99, bytes, retries, cache hits."""
+        lines = []
+        for name, e in self.snapshot().items():
+            lat, dec = e["latency_ms"], e["decode_ms"]
+            lines.append(f"{name:<14} {e['requests']:>6} req  p50 {lat['p50']:7.1f} ms  p99 {lat['p99']:7.1f} ms  "
+                         f"decode p99 {dec['p99']:6.2f} ms  {e['bytes'] / 1e6:7.2f} MB  "
+                         f"{e['retries']} retries  {e['cache_hits']} cache hits  {e['status']}")
+        return "\n".join(lines)
+
+
+def decode_json(response, metrics: Optional[ClientMetrics] = None) -> Any:
+    """``response.json()`` for a ``requests`` response, timing the decode."""
+    start = time.perf_counter()
+    data = response.json()
+    (metrics or get_metrics()).observe_decode(response.url, time.perf_counter() - start)
+    return data
+
+
+class MetricsExporter:
+    """
+    Periodically hands a snapshot to a sink: appended as a JSON line to a
+    file, or passed to a callable (e.g. to push to a dashboard).
+    """
+
+    def __init__(self,
+                 metrics: Optional[ClientMetrics] = None,
+                 path: Optional[str] = None,
+                 callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 interval: float = EXPORT_INTERVAL):
+        """
+        Args:
+            metrics (Optional[ClientMetrics]): Defaults to the process-wide registry.
+            path (Optional[str]): JSON-lines file to append ``{"ts", "endpoints"}`` to.
+            callback (Optional[Callable]): Called with the same record.
+            interval (float): Seconds between exports.
+        """
+        if path is None and callback is None:
+            raise ValueError("Either 'path' or 'callback' must be provided.")
+        self.metrics = metrics
+        self.path = Path(path) if path else None
+        self.callback = callback
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self) -> Dict[str, Any]:
+        record = {"ts": time.time(), "endpoints": (self.metrics or get_metrics()).snapshot()}
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        if self.callback is not None:
+            self.callback(record)
+        return record
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.export()
+            except Exception as e:
+                print(f"Metrics export failed: {e}")
+
+    def start(self) -> "MetricsExporter":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, flush: bool = True) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.export()
+
+
+_default_metrics: Optional[ClientMetrics] = None
+_default_exporter: Optional[MetricsExporter] = None
+_default_lock = threading.Lock()
+
+
+def get_metrics() -> ClientMetrics:
+    """
+    Returns the process-wide registry, creating it on first use (and starting
+    a file exporter if ``TRAYDNER_METRICS_LOG`` is set).
+    """
+    global _default_metrics, _default_exporter
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = ClientMetrics()
+            log_path = os.getenv(METRICS_LOG_ENV)
+            if log_path:
+                _default_exporter = MetricsExporter(_default_metrics, path=log_path).start()
+        return _default_metrics
@@ -0,0 +1,324 @@
+"""
+Optional Prometheus-style ``/metrics`` endpoint for long-running bots.
+
+    from shared.metrics_server import BotMetrics, serve_metrics
+
+    bot = BotMetrics("adi-aashima", loop_budget=60)
+    serve_metrics(bot)
+    while True:
+        with bot.iteration():
+            ...
+            bot.signal("BTC", "buy")
+            bot.trade("BTC", "buy")
+            bot.position("BTC", 1)
+
+Recording into ``BotMetrics`` is always cheap. ``serve_metrics`` only
+starts the HTTP server when ``METRICS_PORT`` is set (``METRICS_HOST``
+defaults to 127.0.0.1). A local Prometheus, or plain ``curl``, can then
+scrape:
+
+* loop iterations, duration histogram and overruns (iterations longer
+  than ``loop_budget``);
+* signals emitted, trades executed and open positions per symbol;
+* cumulative per-stage time from ``shared.profiling`` spans;
+* per-endpoint API latency/decode histograms, status codes, bytes, retries
+  and cache hits from ``shared.metrics``;
+* process memory, CPU time, thread count and uptime.
+
+The text format is written by hand, so ``prometheus_client`` is not needed.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import ClientMetrics, Histogram, get_metrics
+from .profiling import Profiler, Span, get_profiler
+
+PORT_ENV = "METRICS_PORT"
+HOST_ENV = "METRICS_HOST"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; bot loops range from sub-second polls to 15-minute cycles
+LOOP_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0)
+
+
+class BotMetrics:
+    """Loop, signal, trade and position counters for one bot (thread-safe)."""
+
+    def __init__(self, bot: str, loop_budget: Optional[float] = None):
+        """
+        Args:
+            bot (str): Label identifying the bot in every series.
+            loop_budget (Optional[float]): Seconds an iteration may take before
+                                           it counts as an overrun.
+        """
+        self.bot = bot
+        self.loop_budget = loop_budget
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.loop_seconds = Histogram(LOOP_BUCKETS)
+        self.overruns = 0
+        self.last_iteration = 0.0
+        self.signals: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.trades: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.positions: Dict[str, float] = {}
+        self.stages: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])  # calls, wall, cpu
+
+    @contextmanager
+    def iteration(self):
+        """Times one pass of the bot's loop."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_iteration(time.perf_counter() - start)
+
+    def record_iteration(self, seconds: float) -> None:
+        with self._lock:
+            self.loop_seconds.observe(seconds)
+            self.last_iteration = seconds
+            if self.loop_budget is not None and seconds > self.loop_budget:
+                self.overruns += 1
+
+    def signal(self, symbol: str, signal) -> None:
+        """Counts an emitted signal; None, 0 and "HOLD" are not signals."""
+        if signal in (None, 0, "HOLD", "hold"):
+            return
+        with self._lock:
+            self.signals[(symbol, str(signal).lower())] += 1
+
+    def trade(self, symbol: str, side: str) -> None:
+        with self._lock:
+            self.trades[(symbol, side.lower())] += 1
+
+    def position(self, symbol: str, size: float) -> None:
+        """Sets the open position (units, or +1/-1/0 for direction-only bots)."""
+        with self._lock:
+            self.positions[symbol] = size
+
+    def observe_span(self, span: Span) -> None:
+        """Profiler hook: accumulates stage time (symbols folded together)."""
+        with self._lock:
+            stage = self.stages[span.stage]
+            stage[0] += 1
+            stage[1] += span.wall
+            stage[2] += span.cpu
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: List[str] = []
+        self._declared = set()
+
+    def declare(self, name: str, kind: str, help_text: str) -> None:
+        if name not in self._declared:
+            self._declared.add(name)
+            self.lines.append(f"# HELP {name} {help_text}")
+            self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels) -> None:
+        self.lines.append(f"{name}{_labels(**labels)} {float(value):.10g}")
+
+    def histogram(self, name: str, hist: Histogram, scale: float = 1.0, **labels) -> None:
+        cumulative = 0
+        for bound, count in zip(hist.bounds, hist.counts):
+            cumulative += count
+            self.sample(f"{name}_bucket", cumulative, **labels, le=f"{bound * scale:.6g}")
+        self.sample(f"{name}_bucket", hist.count, **labels, le="+Inf")
+        self.sample(f"{name}_sum", hist.total * scale, **labels)
+        self.sample(f"{name}_count", hist.count, **labels)
+
+
+def _memory() -> Tuple[Optional[int], Optional[int]]:
+    """(current RSS, peak RSS) in bytes, whichever this platform can report."""
+    try:
+        import psutil  # optional; the only source on Windows
+        info = psutil.Process().memory_info()
+        return info.rss, getattr(info, "peak_wset", None)
+    except ImportError:
+        pass
+    current = peak = None
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+    return current, peak
+
+
+def render(bot: Optional[BotMetrics] = None, client: Optional[ClientMetrics] = None) -> str:
+    """The Prometheus text exposition of a bot's and the API client's metrics."""
+    out = _Writer()
+    name = bot.bot if bot is not None else "bot"
+
+    if bot is not None:
+        with bot._lock:
+            loop = bot.loop_seconds.copy()
+            overruns, last = bot.overruns, bot.last_iteration
+            signals, trades = dict(bot.signals), dict(bot.trades)
+            positions = dict(bot.positions)
+            stages = {k: list(v) for k, v in bot.stages.items()}
+
+        out.declare("bot_uptime_seconds", "gauge", "Seconds since the bot started.")
+        out.sample("bot_uptime_seconds", time.time() - bot.started, bot=name)
+        out.declare("bot_loop_duration_seconds", "histogram", "Duration of one loop iteration.")
+        out.histogram("bot_loop_duration_seconds", loop, bot=name)
+        out.declare("bot_loop_last_duration_seconds", "gauge", "Duration of the latest loop iteration.")
+        out.sample("bot_loop_last_duration_seconds", last, bot=name)
+        out.declare("bot_loop_overruns_total", "counter", "Iterations that took longer than the loop budget.")
+        out.sample("bot_loop_overruns_total", overruns, bot=name)
+        if bot.loop_budget is not None:
+            out.declare("bot_loop_budget_seconds", "gauge", "Time an iteration may take.")
+            out.sample("bot_loop_budget_seconds", bot.loop_budget, bot=name)
+        out.declare("bot_signals_total", "counter", "Trading signals emitted.")
+        for (symbol, signal), n in sorted(signals.items()):
+            out.sample("bot_signals_total", n, bot=name, symbol=symbol, signal=signal)
+        out.declare("bot_trades_total", "counter", "Trades executed.")
+        for (symbol, side), n in sorted(trades.items()):
+            out.sample("bot_trades_total", n, bot=name, symbol=symbol, side=side)
+        out.declare("bot_open_position", "gauge", "Open position per symbol.")
+        for symbol, size in sorted(positions.items()):
+            out.sample("bot_open_position", size, bot=name, symbol=symbol)
+        out.declare("bot_stage_seconds_total", "counter", "Wall time spent per loop stage.")
+        out.declare("bot_stage_cpu_seconds_total", "counter", "Thread CPU time spent per loop stage.")
+        out.declare("bot_stage_calls_total", "counter", "Times each loop stage ran.")
+        for stage, (calls, wall, cpu) in sorted(stages.items()):
+            out.sample("bot_stage_seconds_total", wall, bot=name, stage=stage)
+            out.sample("bot_stage_cpu_seconds_total", cpu, bot=name, stage=stage)
+            out.sample("bot_stage_calls_total", calls, bot=name, stage=stage)
+
+    if client is not None:
+        snapshot = client.snapshot()
+        histograms = client.histograms()
+        out.declare("traydner_request_duration_seconds", "histogram", "API request latency per endpoint.")
+        for endpoint in sorted(histograms):
+            out.histogram("traydner_request_duration_seconds", histograms[endpoint]["latency"],
+                          bot=name, endpoint=endpoint)
+        out.declare("traydner_decode_duration_seconds", "histogram", "JSON decode time per endpoint.")
+        for endpoint in sorted(histograms):
+            out.histogram("traydner_decode_duration_seconds", histograms[endpoint]["decode"],
+                          bot=name, endpoint=endpoint)
+        out.declare("traydner_responses_total", "counter", "API responses per endpoint and status code.")
+        for endpoint, e in snapshot.items():
+            for status, n in e["status"].items():
+                out.sample("traydner_responses_total", n, bot=name, endpoint=endpoint, status=status)
+        for metric, key, help_text in (
+                ("traydner_request_errors_total", "errors", "Attempts that got no response."),
+                ("traydner_response_bytes_total", "bytes", "Response body bytes."),
+                ("traydner_retries_total", "retries", "Retried requests."),
+                ("traydner_cache_hits_total", "cache_hits", "Calls answered without a request of their own.")):
+            out.declare(metric, "counter", help_text)
+            for endpoint, e in snapshot.items():
+                out.sample(metric, e[key], bot=name, endpoint=endpoint)
+
+    current, peak = _memory()
+    if current is not None:
+        out.declare("process_resident_memory_bytes", "gauge", "Resident memory size.")
+        out.sample("process_resident_memory_bytes", current, bot=name)
+    if peak is not None:
+        out.declare("process_peak_resident_memory_bytes", "gauge", "Peak resident memory size.")
+        out.sample("process_peak_resident_memory_bytes", peak, bot=name)
+    out.declare("process_cpu_seconds_total", "counter", "User and system CPU time.")
+    out.sample("process_cpu_seconds_total", time.process_time(), bot=name)
+    out.declare("process_threads", "gauge", "Live Python threads.")
+    out.sample("process_threads", threading.active_count(), bot=name)
+    return "\n".join(out.lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "MetricsServer"
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render(self.server.bot, self.server.client).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Serves ``render()`` on ``/metrics`` from a daemon thread."""
+
+    daemon_threads = True
+
+    def __init__(self, bot: Optional[BotMetrics] = None, client: Optional[ClientMetrics] = None,
+                 port: int = 9100, host: str = "127.0.0.1"):
+        super().__init__((host, port), _Handler)
+        self.bot = bot
+        self.client = client or get_metrics()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def serve_metrics(bot: BotMetrics,
+                  port: Optional[int] = None,
+                  host: Optional[str] = None,
+                  profiler: Optional[Profiler] = None) -> Optional[MetricsServer]:
+    """
+    Serves a bot's metrics (and the process's API metrics) if a port is configured.
+
+    Args:
+        bot (BotMetrics): The bot's counters.
+        port (Optional[int]): Port to listen on; defaults to ``METRICS_PORT``.
+                              Without either, nothing is served.
+        host (Optional[str]): Interface; defaults to ``METRICS_HOST``, then 127.0.0.1.
+        profiler (Optional[Profiler]): Whose spans become stage counters;
+                                       defaults to the process-wide profiler.
+
+    Returns:
+        Optional[MetricsServer]: The running server, or None.
+    """
+    port = port if port is not None else os.getenv(PORT_ENV)
+    if port is None or port == "":
+        return None
+    host = host or os.getenv(HOST_ENV) or "127.0.0.1"
+    try:
+        server = MetricsServer(bot, get_metrics(), int(port), host).start()
+    except OSError as e:
+        print(f"Could not start the metrics server on {host}:{port}: {e}")
+        return None
+    (profiler or get_profiler()).add_hook(bot.observe_span)
+    print(f"Serving metrics on {server.url}")
+    return server
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+A local stand-in for the Traydner API, for offline load and latency tests.
+
+Serves ``/api/remote/price``, ``/history``, ``/trade``, ``/balance`` and
+``/market_status`` with the same JSON shapes as production, from synthetic
+random-walk prices or from candles recorded by ``CandleStore``. Latency,
+error rate and 429 throttling are configurable, so the clients' retry,
+pooling and caching paths can be exercised without touching production.
+
+Run it, then point any client at it (see ``shared/endpoints.py``):
+
+    python shared/mock_server.py --port 8080 --latency-ms 40 --error-rate 0.01 --rate-limit 20
+    TRAYDNER_BASE_URL=http://127.0.0.1:8080 python adi-aashima/main.py
+
+Or in-process, e.g. from a benchmark:
+
+    with MockTraydnerServer(latency_ms=25) as base_url:
+        client = TraydnerAPI(api_key="test", base_url=base_url)
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared package
+from shared.candle_arrays import decode_history
+from shared.candle_store import RESOLUTION_SECONDS, MAX_LIMIT, CandleStore
+from shared import market_hours
+
+# symbol -> (market, starting price)
+DEFAULT_SYMBOLS = {
+    "BTC": ("crypto", 60_000.0),
+    "ETH": ("crypto", 3_000.0),
+    "SOL": ("crypto", 150.0),
+    "DOGE": ("crypto", 0.15),
+    "AAPL": ("stocks", 190.0),
+    "MSFT": ("stocks", 420.0),
+    "TSLA": ("stocks", 240.0),
+    "EUR": ("forex", 1.08),
+    "GBP": ("forex", 1.27),
+    "JPY": ("forex", 0.0067),
+}
+MARKETS = ("crypto", "stocks", "forex")
+MINUTE = 60
+
+
+class PriceSeries:
+    """
+    One symbol's 1-minute candles, extended lazily as the clock advances.
+
+    The candle of the current minute is still forming: its close moves
+    towards the minute's final close as the minute elapses, the way a live
+    feed's last candle does.
+    """
+
+    def __init__(self, symbol: str, start_price: float, origin: int, volatility: float, seed: int,
+                 recorded: Optional[Dict[str, np.ndarray]] = None):
+        self.symbol = symbol
+        self.origin = origin                      # timestamp of minute 0
+        self.volatility = volatility              # std of 1-minute log returns
+        self._rng = np.random.default_rng(seed)
+        if recorded is not None and len(recorded["close"]):
+            self.close = recorded["close"].astype(np.float64)
+            self.spread = np.abs(recorded["high"] - recorded["low"]) / 2
+            self.volume = np.nan_to_num(recorded["volume"], nan=0.0)
+            self.spread = np.nan_to_num(self.spread, nan=0.0)
+        else:
+            self.close = np.array([start_price])
+            self.spread = np.array([0.0])
+            self.volume = np.array([0.0])
+
+    def _extend(self, minutes: int) -> None:
+        """Makes sure candles exist up to minute index ``minutes`` (inclusive)."""
+        missing = minutes + 1 - len(self.close)
+        if missing <= 0:
+            return
+        steps = self._rng.normal(0.0, self.volatility, missing)
+        closes = self.close[-1] * np.exp(np.cumsum(steps))
+        spread = closes * self.volatility * np.abs(self._rng.normal(0.0, 1.0, missing))
+        volume = self._rng.gamma(2.0, 5.0, missing)
+        self.close = np.concatenate((self.close, closes))
+        self.spread = np.concatenate((self.spread, spread))
+        self.volume = np.concatenate((self.volume, volume))
+
+    def minute_index(self, now: float) -> int:
+        return int((now - self.origin) // MINUTE)
+
+    def price(self, now: float) -> float:
+        i = self.minute_index(now)
+        self._extend(i)
+        if i <= 0:
+            return float(self.close[0])
+        frac = ((now - self.origin) % MINUTE) / MINUTE
+        return float(self.close[i - 1] + frac * (self.close[i] - self.close[i - 1]))
+
+    def candles(self, now: float, resolution: str, start_ts: Optional[int], end_ts: Optional[int],
+                limit: int) -> list:
+        """Aggregates the 1-minute series into ``resolution`` bars (newest ``limit`` in range)."""
+        step = RESOLUTION_SECONDS[resolution]
+        current = self.minute_index(now)
+        self._extend(current)
+
+        # 1-minute OHLCV up to and including the forming minute
+        close = self.close[:current + 1].copy()
+        close[-1] = self.price(now)
+        open_ = np.concatenate((close[:1], close[:-1]))
+        high = np.maximum(open_, close) + self.spread[:current + 1]
+        low = np.minimum(open_, close) - self.spread[:current + 1]
+        volume = self.volume[:current + 1]
+        ts = self.origin + MINUTE * np.arange(current + 1, dtype=np.int64)
+
+        bucket = ts - ts % step
+        lo = np.searchsorted(bucket, start_ts - start_ts % step) if start_ts is not None else 0
+        hi = np.searchsorted(bucket, end_ts, side="right") if end_ts is not None else len(ts)
+        if lo >= hi:
+            return []
+        bucket = bucket[lo:hi]
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        if start_ts is None:
+            starts = starts[-limit:]
+        else:
+            starts = starts[:limit]
+        stop = starts[-1] + np.searchsorted(bucket[starts[-1]:], bucket[starts[-1]], side="right")
+        sl = slice(lo + starts[0], lo + stop)
+        rel = starts - starts[0]
+
+        bars_open = open_[sl][rel]
+        bars_close = close[sl][np.r_[rel[1:] - 1, stop - starts[0] - 1]]
+        bars_high = np.maximum.reduceat(high[sl], rel)
+        bars_low = np.minimum.reduceat(low[sl], rel)
+        bars_volume = np.add.reduceat(volume[sl], rel)
+        return [
+            {"timestamp": int(t), "open": float(o), "high": float(h), "low": float(l),
+             "close": float(c), "volume": float(v)}
+            for t, o, h, l, c, v in zip(bucket[starts], bars_open, bars_high, bars_low, bars_close, bars_volume)
+        ]
+
+
+class MockMarket:
+    """Prices, one simulated account and market hours behind the mock API."""
+
+    def __init__(self,
+                 symbols: Optional[Dict[str, Tuple[str, float]]] = None,
+                 history_days: float = 30.0,
+                 volatility: float = 0.0008,
+                 seed: int = 0,
+                 replay_dir: Optional[str] = None,
+                 starting_cash: float = 100_000.0,
+                 closed_markets: Tuple[str, ...] = (),
+                 trading_hours: bool = True):
+        self.symbols = dict(symbols or DEFAULT_SYMBOLS)
+        self.closed_markets = set(closed_markets)
+        self.trading_hours = trading_hours  # follow the market_hours calendar
+        self.starting_cash = starting_cash
+        self._lock = threading.Lock()
+
+        now = time.time()
+        minutes = int(history_days * 24 * 60)
+        self.series: Dict[str, PriceSeries] = {}
+        store = CandleStore(fetch_history=None, cache_dir=replay_dir, max_candles=10 ** 9) if replay_dir else None
+        for symbol, (_, start_price) in self.symbols.items():
+            recorded = None
+            if store is not None:
+                recorded = decode_history(store.candles(symbol, "1m"))
+            # Recorded candles are shifted so the last one is the current minute
+            count = len(recorded["close"]) if recorded is not None and len(recorded["close"]) else minutes
+            origin = int(now // MINUTE) * MINUTE - (count - 1) * MINUTE
+            seed_for = seed * 1_000_003 + zlib.crc32(symbol.encode())
+            self.series[symbol] = PriceSeries(symbol, start_price, origin, volatility, seed_for, recorded)
+            self.series[symbol]._extend(count - 1)
+        self.reset_account()
+
+    def reset_account(self) -> None:
+        with self._lock:
+            self.cash = self.starting_cash
+            self.holdings: Dict[str, Dict[str, float]] = {m: {} for m in MARKETS}
+
+    # ---------- Endpoint logic (each returns (status, body)) ---------- #
+
+    def price(self, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        symbol = params.get("symbol", "").upper()
+        if symbol not in self.series:
+            return 404, {"error": f"Unknown symbol: {symbol}"}
+        with self._lock:
+            return 200, {"symbol": symbol, "price": self.series[symbol].price(time.time())}
+
+    def history(self, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        symbol = params.get("symbol", "").upper()
+        resolution = params.get("resolution", "")
+        if symbol not in self.series:
+            return 404, {"error": f"Unknown symbol: {symbol}"}
+        if resolution not in RESOLUTION_SECONDS:
+            return 400, {"error": f"Unsupported resolution: {resolution}"}
+        try:
+            limit = min(max(int(params.get("limit", 500)), 1), MAX_LIMIT)
+            start_ts = int(float(params["start_ts"])) if "start_ts" in params else None
+            end_ts = int(float(params["end_ts"])) if "end_ts" in params else None
+        except ValueError:
+            return 400, {"error": "limit, start_ts and end_ts must be numbers"}
+        with self._lock:
+            history = self.series[symbol].candles(time.time(), resolution, start_ts, end_ts, limit)
+        return 200, {"symbol": symbol, "resolution": resolution, "count": len(history), "history": history}
+
+    def trade(self, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        symbol = params.get("symbol", "").upper()
+        side = params.get("side", "")
+        if symbol not in self.series:
+            return 404, {"error": f"Unknown symbol: {symbol}"}
+        if side not in ("buy", "sell"):
+            return 400, {"error": "side must be 'buy' or 'sell'"}
+        try:
+            quantity = float(params.get("quantity", ""))
+        except ValueError:
+            return 400, {"error": "quantity must be a number"}
+        market = self.symbols[symbol][0]
+        if quantity <= 0 or (market == "stocks" and not quantity.is_integer()):
+            return 400, {"error": "quantity must be positive (whole shares for stocks)"}
+        if not self._is_open(market):
+            return 400, {"error": f"The {market} market is closed"}
+
+        with self._lock:
+            price = self.series[symbol].price(time.time())
+            held = self.holdings[market].get(symbol, 0.0)
+            cost = price * quantity
+            if side == "buy":
+                if cost > self.cash:
+                    return 400, {"error": "Insufficient cash"}
+                self.cash -= cost
+                self.holdings[market][symbol] = held + quantity
+            else:
+                if quantity > held + 1e-12:
+                    return 400, {"error": "Insufficient holdings"}
+                self.cash += cost
+                self.holdings[market][symbol] = held - quantity
+            return 200, {"message": "Trade executed", "symbol": symbol, "side": side,
+                         "quantity": quantity, "price": price, "balance": self._balance()}
+
+    def balance(self, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        with self._lock:
+            return 200, {"balance": self._balance()}
+
+    def market_status(self, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        if "symbol" in params:
+            symbol = params["symbol"].upper()
+            if symbol not in self.symbols:
+                return 404, {"error": f"Unknown symbol: {symbol}"}
+            market = self.symbols[symbol][0]
+        else:
+            market = params.get("market", "")
+            if market == "stock":
+                market = "stocks"
+            if market not in MARKETS:
+                return 400, {"error": "Provide a symbol or a market (stock, crypto, forex)"}
+        return 200, {"isOpen": self._is_open(market)}
+
+    def _is_open(self, market: str) -> bool:
+        if market in self.closed_markets:
+            return False
+        return market_hours.is_open(market) if self.trading_hours else True
+
+    def _balance(self) -> Dict[str, Any]:
+        return {"cash": self.cash, **{m: {s: q for s, q in h.items() if q} for m, h in self.holdings.items()}}
+
+
+class Faults:
+    """Injected latency, server errors and 429s."""
+
+    def __init__(self,
+                 latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0,
+                 error_rate: float = 0.0,
+                 throttle_rate: float = 0.0,
+                 rate_limit: float = 0.0,
+                 retry_after: float = 1.0,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            latency_ms (float): Base delay added to every response.
+            jitter_ms (float): Extra delay drawn from an exponential with this mean,
+                               giving a long-tailed latency distribution.
+            error_rate (float): Fraction of requests answered with a 500.
+            throttle_rate (float): Fraction of requests answered with a 429 at random.
+            rate_limit (float): Requests per second allowed per API key over a
+                                sliding one-second window; excess gets a 429 (0 = off).
+            retry_after (float): Seconds sent in the ``Retry-After`` header of a 429.
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._recent: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        jitter = self._rng.expovariate(1.0 / self.jitter_ms) if self.jitter_ms > 0 else 0.0
+        return (self.latency_ms + jitter) / 1000.0
+
+    def reject(self, key: str) -> Optional[int]:
+        """Returns 429 or 500 if this request should fail, else None."""
+        with self._lock:
+            if self.rate_limit > 0:
+                now = time.monotonic()
+                recent = self._recent[key]
+                while recent and now - recent[0] >= 1.0:
+                    recent.popleft()
+                if len(recent) >= self.rate_limit:
+                    return 429
+                recent.append(now)
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like Cloud Run
+    # headers and body go out in separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40 ms) on every kept-alive request
+    disable_nagle_algorithm = True
+    server: "MockTraydnerServer"
+
+    ROUTES = {
+        ("GET", "/api/remote/price"): "price",
+        ("GET", "/api/remote/history"): "history",
+        ("POST", "/api/remote/trade"): "trade",
+        ("GET", "/api/remote/balance"): "balance",
+        ("GET", "/api/remote/market_status"): "market_status",
+    }
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = self.rfile.read(length)
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                try:
+                    params.update({k: str(v) for k, v in json.loads(body).items()})
+                except (ValueError, AttributeError):
+                    pass
+
+        route = self.ROUTES.get((method, url.path))
+        auth = self.headers.get("Authorization", "")
+        faults = self.server.faults
+        headers = {}
+        if url.path == "/mock/stats":
+            status, payload = 200, self.server.stats()
+        elif route is None:
+            status, payload = 404, {"error": "Not found"}
+        elif not auth.startswith("Bearer ") or not auth[7:].strip():
+            status, payload = 401, {"error": "Missing or invalid API key"}
+        else:
+            time.sleep(faults.delay())
+            failure = faults.reject(auth)
+            if failure == 429:
+                status, payload = 429, {"error": "Too many requests"}
+                headers["Retry-After"] = f"{faults.retry_after:g}"
+            elif failure == 500:
+                status, payload = 500, {"error": "Injected server error"}
+            else:
+                status, payload = getattr(self.server.market, route)(params)
+
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.record(url.path, status, time.perf_counter() - started)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class MockTraydnerServer(ThreadingHTTPServer):
+    """
+    The mock API as a threaded HTTP server.
+
+    Use ``start()``/``stop()`` or a ``with`` block (which yields the base URL)
+    to run it on a background thread; ``GET /mock/stats`` returns per-endpoint
+    request counts, status codes and mean service time.
+    """
+
+    daemon_threads = True
+    request_queue_size = 256  # the default backlog of 5 drops bursts of concurrent connects
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, market: Optional[MockMarket] = None,
+                 faults: Optional[Faults] = None, verbose: bool = False, **fault_kwargs):
+        super().__init__((host, port), _Handler)
+        self.market = market or MockMarket()
+        self.faults = faults or Faults(**fault_kwargs)
+        self.verbose = verbose
+        self._stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"requests": 0, "seconds": 0.0,
+                                                                       "status": defaultdict(int)})
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, path: str, status: int, seconds: float) -> None:
+        with self._stats_lock:
+            entry = self._stats[path]
+            entry["requests"] += 1
+            entry["seconds"] += seconds
+            entry["status"][status] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                path: {"requests": e["requests"],
+                       "avg_ms": 1000 * e["seconds"] / e["requests"] if e["requests"] else 0.0,
+                       "status": dict(e["status"])}
+                for path, e in self._stats.items()
+            }
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-traydner", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def handle_error(self, request, client_address) -> None:
+        # clients that hang up early (cancelled hedges, timeouts) are expected
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Traydner API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic prices and faults")
+    parser.add_argument("--history-days", type=float, default=30.0, help="synthetic history generated at start")
+    parser.add_argument("--volatility", type=float, default=0.0008, help="std of 1-minute log returns")
+    parser.add_argument("--replay", metavar="CACHE_DIR", help="serve recorded {SYMBOL}_1m.jsonl candles from here")
+    parser.add_argument("--closed", nargs="*", default=[], choices=MARKETS, help="markets reported closed")
+    parser.add_argument("--ignore-hours", action="store_true", help="report every market open at all times")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/second per API key (0 = off)")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    market = MockMarket(history_days=args.history_days, volatility=args.volatility, seed=args.seed,
+                        replay_dir=args.replay, closed_markets=tuple(args.closed), trading_hours=not args.ignore_hours)
+    faults = Faults(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                    throttle_rate=args.throttle_rate, rate_limit=args.rate_limit,
+                    retry_after=args.retry_after, seed=args.seed)
+    server = MockTraydnerServer(args.host, args.port, market=market, faults=faults, verbose=args.verbose)
+    print(f"Mock Traydner API on {server.base_url} (set TRAYDNER_BASE_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Lightweight stage timing for the trading loops.
+
+Wrap each stage of a cycle in a span:
+
+    from shared.profiling import get_profiler
+    profiler = get_profiler()
+
+    with profiler.span("candles", symbol):
+        df = fetch_candles(symbol)
+
+Each span records wall time and the thread's CPU time. Their ratio tells
+where a stage's time goes. Wall time with little CPU is waiting on the
+network. Wall time that is mostly CPU is local work (pandas, indicators,
+JSON). Aggregates are kept per (stage, symbol). ``summary()`` returns them
+and ``report()`` formats them as a table. Hooks added with ``add_hook``
+receive every finished span, e.g. to forward them to a tracer.
+
+Spans may nest; a parent's time includes its children's.
+"""
+
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class Span:
+    """A finished span, as passed to hooks."""
+
+    __slots__ = ("stage", "symbol", "start", "wall", "cpu", "error")
+
+    def __init__(self, stage: str, symbol: Optional[str], start: float, wall: float, cpu: float, error: bool):
+        self.stage = stage
+        self.symbol = symbol
+        self.start = start      # Unix time
+        self.wall = wall        # seconds
+        self.cpu = cpu          # seconds of this thread's CPU time
+        self.error = error      # the block raised
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _Stats:
+    __slots__ = ("count", "wall", "cpu", "max", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+
+class Profiler:
+    """Thread-safe span aggregator; ``enabled=False`` turns spans into no-ops."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._stats: Dict[Tuple[str, Optional[str]], _Stats] = defaultdict(_Stats)
+        self._hooks: List[Callable[[Span], None]] = []
+        self._lock = threading.Lock()
+        self.since = time.time()
+
+    def add_hook(self, hook: Callable[[Span], None]) -> None:
+        """Calls ``hook(span)`` after every span; hooks must be fast and must not raise."""
+        self._hooks.append(hook)
+
+    @contextmanager
+    def span(self, stage: str, symbol: Optional[str] = None):
+        """
+        Times the enclosed block as ``stage`` (optionally for ``symbol``).
+
+        Args:
+            stage (str): Stage name, e.g. "candles" or "signal".
+            symbol (Optional[str]): Symbol the work was for; None for shared work.
+        """
+        if not self.enabled:
+            yield
+            return
+        start_time = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(Span(stage, symbol, start_time,
+                             time.perf_counter() - wall_start, time.thread_time() - cpu_start, error))
+
+    def timed(self, stage: str):
+        """Decorator form of ``span`` (no symbol)."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, span: Span) -> None:
+        """Adds a span measured elsewhere (also what ``span`` calls)."""
+        with self._lock:
+            stats = self._stats[(span.stage, span.symbol)]
+            stats.count += 1
+            stats.wall += span.wall
+            stats.cpu += span.cpu
+            stats.errors += span.error
+            if span.wall > stats.max:
+                stats.max = span.wall
+        for hook in self._hooks:
+            hook(span)
+
+    def summary(self, by_symbol: bool = True, reset: bool = False) -> Dict[str, Any]:
+        """
+        Returns the aggregates since the last reset.
+
+        Args:
+            by_symbol (bool): Keep one row per (stage, symbol); otherwise symbols
+                              are folded into one row per stage.
+            reset (bool): Start a new aggregation window afterwards.
+
+        Returns:
+            Dict[str, Any]: ``seconds`` (window length) and ``stages``, a list of
+            rows with ``stage``, ``symbol``, ``count``, ``total_ms``, ``mean_ms``,
+            ``max_ms``, ``cpu_ms``, ``cpu_share`` (CPU / wall) and ``errors``,
+            slowest total first.
+        """
+        with self._lock:
+            items = list(self._stats.items())
+            since = self.since
+            if reset:
+                self._stats.clear()
+                self.since = time.time()
+
+        merged: Dict[Tuple[str, Optional[str]], _Stats] = defaultdict(_Stats)
+        for (stage, symbol), s in items:
+            m = merged[(stage, symbol if by_symbol else None)]
+            m.count += s.count
+            m.wall += s.wall
+            m.cpu += s.cpu
+            m.errors += s.errors
+            m.max = max(m.max, s.max)
+
+        rows = [{
+            "stage": stage,
+            "symbol": symbol,
+            "count": s.count,
+            "total_ms": 1000 * s.wall,
+            "mean_ms": 1000 * s.wall / s.count,
+            "max_ms": 1000 * s.max,
+            "cpu_ms": 1000 * s.cpu,
+            "cpu_share": min(s.cpu / s.wall, 1.0) if s.wall > 0 else 0.0,
+            "errors": s.errors,
+        } for (stage, symbol), s in merged.items()]
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return {"seconds": time.time() - since, "stages": rows}
+
+    def report(self, by_symbol: bool = False, reset: bool = False) -> str:
+        """The summary as a table; a low CPU share means the stage waits on I/O."""
+        summary = self.summary(by_symbol=by_symbol, reset=reset)
+        lines = [f"{'stage':<14} {'symbol':<8} {'count':>6} {'total ms':>10} {'mean ms':>9} "
+                 f"{'max ms':>9} {'cpu %':>6} {'errors':>6}"]
+        for r in summary["stages"]:
+            lines.append(f"{r['stage']:<14} {r['symbol'] or '-':<8} {r['count']:>6} {r['total_ms']:>10.1f} "
+                         f"{r['mean_ms']:>9.2f} {r['max_ms']:>9.1f} {100 * r['cpu_share']:>6.0f} {r['errors']:>6}")
+        return "\n".join(lines)
+
+
+_default_profiler: Optional[Profiler] = None
+_default_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """Returns the process-wide profiler, creating it on first use."""
+    global _default_profiler
+    with _default_lock:
+        if _default_profiler is None:
+            _default_profiler = Profiler()
+        return _default_profiler
@@ -0,0 +1,413 @@
+"""
+Client-side rate limiting, retries and priority lanes for the Traydner API.
+
+All clients in a process share one ``RateLimiter`` (see ``get_limiter``),
+made of a global token bucket plus optional per-endpoint buckets. That way
+a history backfill cannot use up the request budget the bots need for
+prices and trades.
+
+Callers queue in priority lanes (``TRADE`` < ``NORMAL`` < ``BULK``). While a
+more urgent caller is waiting, less urgent callers hold back. The bulk lane
+also cannot spend the last ``bulk_reserve`` of the global burst. So a trade
+never waits behind backfill requests that already drained the bucket.
+
+On a 429 or 5xx response, the request is retried with jittered exponential
+backoff. Connection errors are retried too, but only for GETs. A
+``Retry-After`` header pauses the whole limiter for that long. A 429 also
+halves the global rate, which then climbs back additively on every success.
+"""
+
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .endpoints import endpoint_name
+from .metrics import ClientMetrics, get_metrics
+
+# Priority lanes, most urgent first
+TRADE = 0
+NORMAL = 1
+BULK = 2
+LANE_NAMES = ("trade", "normal", "bulk")
+
+DEFAULT_RATE = 20.0        # requests per second across all endpoints
+DEFAULT_BURST = 40
+# endpoint name -> (requests per second, burst)
+ENDPOINT_LIMITS: Dict[str, Tuple[float, int]] = {"history": (5.0, 10)}
+# Endpoints that always use a more urgent lane than the caller's
+ENDPOINT_LANES = {"trade": TRADE}
+BULK_RESERVE = 0.25        # fraction of the global burst the bulk lane may not spend
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_lane: contextvars.ContextVar = contextvars.ContextVar("traydner_lane", default=None)
+
+
+@contextmanager
+def lane(priority: int):
+    """
+    Runs the enclosed API calls in the given lane, e.g. ``with lane(BULK): backfill(...)``.
+
+    The lane is held in a context variable, so it applies to calls made from
+    this thread (or task). Worker threads must enter it themselves.
+    """
+    token = _lane.set(priority)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def lane_for(endpoint: str) -> int:
+    """The caller's lane (``NORMAL`` by default), raised for endpoints in ``ENDPOINT_LANES``."""
+    current = _lane.get()
+    current = NORMAL if current is None else current
+    return min(current, ENDPOINT_LANES.get(endpoint_name(endpoint), current))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills at ``rate`` tokens per second up to ``burst``; a rate <= 0 means unlimited."""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.clock = clock
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, now: float, floor: float = 0.0) -> float:
+        """Seconds until a token is available without dropping below ``floor``."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        missing = min(floor, self.burst - 1) + 1 - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1
+
+
+class RateLimiter:
+    """
+    Global and per-endpoint token buckets with priority lanes and adaptive slow-down.
+
+    Thread-safe. ``acquire`` blocks the calling thread and ``acquire_async``
+    awaits, so blocking and asyncio clients can share one limiter.
+    """
+
+    def __init__(self,
+                 rate: float = DEFAULT_RATE,
+                 burst: int = DEFAULT_BURST,
+                 endpoint_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 bulk_reserve: float = BULK_RESERVE,
+                 min_rate: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate (float): Requests per second across all endpoints (<= 0 = unlimited).
+            burst (int): Requests that may start back-to-back after an idle period.
+            endpoint_limits (Optional[Dict[str, Tuple[float, int]]]): Extra
+                (rate, burst) limits keyed by endpoint name; defaults to
+                ``ENDPOINT_LIMITS`` (none when ``rate`` <= 0).
+            bulk_reserve (float): Fraction of ``burst`` kept for the trade and
+                                  normal lanes.
+            min_rate (Optional[float]): Floor for the adaptive slow-down after
+                                        429s (default: ``rate / 8``).
+        """
+        if endpoint_limits is None:
+            endpoint_limits = ENDPOINT_LIMITS if rate > 0 else {}
+        self.base_rate = rate
+        self.min_rate = rate / 8 if min_rate is None else min_rate
+        self.bulk_reserve = bulk_reserve
+        self.clock = clock
+        self._global = TokenBucket(rate, burst, clock)
+        self._endpoints = {name: TokenBucket(r, b, clock) for name, (r, b) in endpoint_limits.items()}
+        self._waiting = [0] * len(LANE_NAMES)
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+        self.granted = [0] * len(LANE_NAMES)
+        self.waited = [0.0] * len(LANE_NAMES)
+        self.throttled = 0
+        self.retries = 0
+
+    @property
+    def rate(self) -> float:
+        """The current global rate (below ``base_rate`` while recovering from 429s)."""
+        return self._global.rate
+
+    def _try_acquire(self, name: str, priority: int) -> float:
+        """Takes the tokens if the caller may go now; otherwise returns how long to wait."""
+        now = self.clock()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if any(self._waiting[:priority]):
+            # a more urgent lane is queued; it is woken first
+            return 1.0 / self._global.rate if self._global.rate > 0 else 0.01
+        floor = self.bulk_reserve * self._global.burst if priority == BULK else 0.0
+        bucket = self._endpoints.get(name)
+        wait = max(self._global.wait_time(now, floor), bucket.wait_time(now) if bucket else 0.0)
+        if wait > 0:
+            return wait
+        self._global.take()
+        if bucket:
+            bucket.take()
+        return 0.0
+
+    def acquire(self, endpoint: str, priority: Optional[int] = None) -> float:
+        """
+        Blocks until a request to ``endpoint`` may start.
+
+        Args:
+            endpoint (str): Path or URL; only its last segment is used.
+            priority (Optional[int]): Lane; defaults to ``lane_for(endpoint)``.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        name = endpoint_name(endpoint)
+        priority = lane_for(name) if priority is None else priority
+        start = self.clock()
+        queued = False
+        with self._cond:
+            try:
+                while True:
+                    wait = self._try_acquire(name, priority)
+                    if wait <= 0:
+                        break
+                    if not queued:
+                        self._waiting[priority] += 1
+                        queued = True
+                    self._cond.wait(wait)
+            finally:
+                if queued:
+                    self._waiting[priority] -= 1
+                    self._cond.notify_all()
+            return self._granted(priority, start)
+
+    async def acquire_async(self, endpoint: str, priority: Optional[int] = None) -> float:
+        """``acquire`` for coroutines: waits with ``asyncio.sleep`` instead of blocking."""
+        name = endpoint_name(endpoint)
+        priority = lane_for(name) if priority is None else priority
+        start = self.clock()
+        queued = False
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_acquire(name, priority)
+                    if wait <= 0:
+                        return self._granted(priority, start)
+                    if not queued:
+                        self._waiting[priority] += 1
+                        queued = True
+                await asyncio.sleep(wait)
+        finally:
+            if queued:
+                with self._cond:
+                    self._waiting[priority] -= 1
+                    self._cond.notify_all()
+
+    def _granted(self, priority: int, start: float) -> float:
+        waited = self.clock() - start
+        self.granted[priority] += 1
+        self.waited[priority] += waited
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Holds back every lane for ``seconds`` (e.g. a server's ``Retry-After``)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+    def record_retry(self) -> None:
+        """Counts one retried request."""
+        with self._cond:
+            self.retries += 1
+
+    def on_response(self, status: int, retry_after: Optional[float] = None) -> None:
+        """
+        Adapts to the server: a 429 halves the global rate and empties the
+        bucket, ``Retry-After`` pauses everyone, and each success restores
+        1/20 of the configured rate.
+        """
+        with self._cond:
+            bucket = self._global
+            if status == 429:
+                self.throttled += 1
+                if bucket.rate > 0:
+                    bucket.rate = max(self.min_rate, bucket.rate / 2)
+                    bucket.tokens = min(bucket.tokens, 0.0)
+            elif status < 400 and 0 < bucket.rate < self.base_rate:
+                bucket.rate = min(self.base_rate, bucket.rate + self.base_rate / 20)
+            if retry_after:
+                self._paused_until = max(self._paused_until, self.clock() + retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        """Grants and average wait per lane, 429s seen, retries and the current rate."""
+        with self._cond:
+            return {
+                "rate": self._global.rate,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "lanes": {
+                    lane_name: {
+                        "granted": self.granted[i],
+                        "avg_wait_ms": 1000 * self.waited[i] / self.granted[i] if self.granted[i] else 0.0,
+                    }
+                    for i, lane_name in enumerate(LANE_NAMES)
+                },
+            }
+
+
+class RetryPolicy:
+    """
+    Which failures to retry, and how long to back off between attempts.
+
+    429s are always safe to retry (the server did not process the request).
+    Other retryable statuses and connection errors are retried only for
+    idempotent methods, so a trade is never submitted twice.
+    """
+
+    def __init__(self,
+                 retries: int = 3,
+                 base_delay: float = 0.25,
+                 max_delay: float = 20.0,
+                 statuses=RETRY_STATUSES,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            retries (int): Extra attempts after the first.
+            base_delay (float): Backoff cap for the first retry; doubles per attempt.
+            max_delay (float): Upper bound on any backoff. A longer ``Retry-After``
+                               is not waited out: the response is returned as-is.
+            statuses: HTTP statuses worth retrying.
+        """
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = frozenset(statuses)
+        self._rng = random.Random(seed)
+
+    def should_retry(self, method: str, attempt: int, status: Optional[int] = None) -> bool:
+        """``status`` None means the request failed with a connection error."""
+        if attempt >= self.retries:
+            return False
+        if status == 429:
+            return True
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        return idempotent and (status is None or status in self.statuses)
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Backoff before retry number ``attempt + 1``: the server's ``Retry-After``
+        if it sent one, otherwise "full jitter" (uniform between 0 and
+        ``base_delay * 2**attempt``). Returns None if the wait exceeds ``max_delay``.
+        """
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def request_with_retries(send: Callable[[], Any],
+                         method: str,
+                         endpoint: str,
+                         limiter: Optional[RateLimiter] = None,
+                         policy: Optional[RetryPolicy] = None,
+                         priority: Optional[int] = None,
+                         metrics: Optional[ClientMetrics] = None) -> Any:
+    """
+    Runs ``send()`` under the rate limiter, retrying per ``policy``.
+
+    Args:
+        send (Callable): Issues the request and returns a ``requests``-style
+                         response (``status_code``, ``headers``); it must not
+                         raise for the status itself.
+        method (str): HTTP method, used to decide what is safe to retry.
+        endpoint (str): Path or URL, for the per-endpoint bucket and lane.
+        limiter (Optional[RateLimiter]): Defaults to ``get_limiter()``.
+        policy (Optional[RetryPolicy]): Defaults to ``RetryPolicy()``.
+        priority (Optional[int]): Lane override.
+        metrics (Optional[ClientMetrics]): Where retries are counted; defaults
+                                           to ``get_metrics()``.
+
+    Returns:
+        The last response. Error statuses are left to the caller, after the
+        retries are used up.
+    """
+    limiter = limiter or get_limiter()
+    policy = policy or _default_policy
+    attempt = 0
+    while True:
+        limiter.acquire(endpoint, priority)
+        try:
+            response = send()
+        except OSError:
+            # requests' ConnectionError and Timeout are OSErrors
+            if not policy.should_retry(method, attempt):
+                raise
+            delay = policy.delay(attempt)
+        else:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            limiter.on_response(response.status_code, retry_after)
+            if not policy.should_retry(method, attempt, response.status_code):
+                return response
+            delay = policy.delay(attempt, retry_after)
+            if delay is None:
+                return response
+        limiter.record_retry()
+        (metrics or get_metrics()).retry(endpoint)
+        attempt += 1
+        time.sleep(delay)
+
+
+_default_policy = RetryPolicy()
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    """Returns the process-wide limiter, creating it with defaults on first use."""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
+
+
+def configure_limiter(**kwargs) -> RateLimiter:
+    """
+    Replaces the process-wide limiter with one built from ``kwargs``.
+
+    Call this once at startup, before any client makes a request. Accepts
+    the same keyword arguments as ``RateLimiter``; ``rate=0`` disables
+    client-side limiting.
+    """
+    global _default_limiter
+    with _default_lock:
+        _default_limiter = RateLimiter(**kwargs)
+        return _default_limiter
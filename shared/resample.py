@@ -0,0 +1,136 @@
+"""
+Derive coarser candles (5m, 15m, 1h, 4h, D, ...) from a finer series.
+
+Strategies on the same symbol used to download each resolution separately.
+``resample`` instead aggregates one cached 1m series into any multiple of
+it. Bars are aligned to the Unix epoch, like the API's own (weeks to
+Mondays). Each bucket boundary is found once and every column is reduced
+with ``np.ufunc.reduceat``:
+
+* open: first value in the bucket;
+* high: maximum (``fmax``, so NaNs from missing fields are skipped);
+* low: minimum (``fmin``);
+* close: last value;
+* volume: sum.
+
+``Resampler`` keeps the result between calls. Each update only
+re-aggregates the base candles from the start of its newest (possibly
+still forming) bar onward, so refreshing a timeframe costs O(new candles).
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from .candle_arrays import FIELDS
+from .ring_buffer import RingBuffer
+
+WEEK = 7 * 24 * 60 * 60
+# 1970-01-01 was a Thursday; weekly bars start on Mondays.
+WEEK_ORIGIN = 4 * 24 * 60 * 60
+
+
+def origin_for(seconds: int) -> int:
+    """Bucket alignment offset for a bar length (non-zero only for weeks)."""
+    return WEEK_ORIGIN if seconds % WEEK == 0 else 0
+
+
+def resample(columns: Dict[str, np.ndarray], seconds: int, origin: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Aggregates candle columns into ``seconds``-long bars.
+
+    Args:
+        columns (Dict[str, np.ndarray]): Sorted columns as from ``decode_history``;
+                                         ``timestamp`` (Unix seconds) and ``close``
+                                         are required, missing columns are NaN.
+        seconds (int): Bar length; should be a multiple of the input's.
+        origin (Optional[int]): Bucket alignment; see ``origin_for``.
+
+    Returns:
+        Dict[str, np.ndarray]: ``FIELDS`` columns, one row per non-empty bucket,
+        timestamped with the bucket start. The last bar may be partial.
+    """
+    origin = origin_for(seconds) if origin is None else origin
+    ts = np.asarray(columns["timestamp"], dtype=np.int64)
+    if not len(ts):
+        return {f: np.empty(0, dtype=np.int64 if f == "timestamp" else np.float64) for f in FIELDS}
+
+    buckets = (ts - origin) // seconds
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.append(starts[1:], len(ts)) - 1
+
+    close = np.asarray(columns["close"], dtype=np.float64)
+    nan = np.full(len(ts), np.nan)
+    open_ = np.asarray(columns.get("open", nan), dtype=np.float64)
+    high = np.asarray(columns.get("high", nan), dtype=np.float64)
+    low = np.asarray(columns.get("low", nan), dtype=np.float64)
+    volume = np.nan_to_num(np.asarray(columns.get("volume", nan), dtype=np.float64))
+
+    return {
+        "timestamp": buckets[starts] * seconds + origin,
+        "open": open_[starts],
+        # fmax/fmin skip NaN, so a missing high/low falls back to the closes
+        "high": np.fmax(np.fmax.reduceat(high, starts), np.fmax.reduceat(close, starts)),
+        "low": np.fmin(np.fmin.reduceat(low, starts), np.fmin.reduceat(close, starts)),
+        "close": close[ends],
+        "volume": np.add.reduceat(volume, starts),
+    }
+
+
+class Resampler:
+    """Incrementally maintained bars of one resolution, derived from a finer series."""
+
+    def __init__(self, seconds: int, max_bars: int = 5000, origin: Optional[int] = None):
+        """
+        Args:
+            seconds (int): Bar length.
+            max_bars (int): Bars kept; older ones are dropped.
+            origin (Optional[int]): Bucket alignment; see ``origin_for``.
+        """
+        self.seconds = seconds
+        self.origin = origin_for(seconds) if origin is None else origin
+        self.bars = RingBuffer(max_bars, FIELDS, dtypes={"timestamp": np.int64})
+
+    def __len__(self) -> int:
+        return len(self.bars)
+
+    def resume_from(self) -> Optional[int]:
+        """
+        Start of the newest bar: the next ``update`` must include every base
+        candle from here on (None before the first update).
+        """
+        return self.bars.last("timestamp") if len(self.bars) else None
+
+    def update(self, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Folds base candles from ``resume_from()`` onward into the bars.
+
+        The newest bar is rebuilt from the candles given, so they must cover it
+        completely; candles may also revise it (a still-forming base candle).
+
+        Returns:
+            int: Bars added (not counting the rebuilt newest one).
+
+        Raises:
+            ValueError: If the candles start before the newest bar (older bars
+                        cannot be revised; start a new ``Resampler``).
+        """
+        new = resample(columns, self.seconds, self.origin)
+        n = len(new["timestamp"])
+        if not n:
+            return 0
+        resume = self.resume_from()
+        first = 0
+        if resume is not None:
+            if new["timestamp"][0] < resume:
+                raise ValueError("update starts before the newest bar; older bars cannot be revised")
+            if new["timestamp"][0] == resume:
+                self.bars.update_last(**{f: new[f][0] for f in FIELDS})
+                first = 1
+        self.bars.extend({f: new[f][first:] for f in FIELDS})
+        return n - first
+
+    def columns(self, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Copies of the newest ``limit`` bars (all if None), oldest first."""
+        start = -limit if limit else 0
+        return {f: self.bars.column(f)[start:].copy() for f in FIELDS}
@@ -0,0 +1,99 @@
+"""
+Fixed-size columnar ring buffer whose window is always one contiguous slice.
+
+Each column is allocated at twice the capacity, and every row is written
+twice: at ``i`` and at ``i + capacity``. The most recent ``capacity`` rows
+are then always the slice ``[start, start + capacity)``. ``column()`` can
+return that slice as a NumPy view, with no copy and no wrap-around
+handling. Appends and in-place updates of the newest row are O(1) and never
+allocate.
+"""
+
+from typing import Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+class RingBuffer:
+    """The last ``capacity`` rows of named numeric columns."""
+
+    def __init__(self, capacity: int, fields: Sequence[str],
+                 dtypes: Optional[Mapping[str, type]] = None):
+        """
+        Args:
+            capacity (int): Rows kept; older rows are overwritten.
+            fields (Sequence[str]): Column names.
+            dtypes (Optional[Mapping[str, type]]): Per-column dtype; float64 by default.
+        """
+        if capacity <= 0:
+            raise ValueError("'capacity' must be positive.")
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        dtypes = dtypes or {}
+        self._data: Dict[str, np.ndarray] = {
+            f: np.zeros(2 * capacity, dtype=dtypes.get(f, np.float64)) for f in self.fields
+        }
+        self._count = 0     # rows ever appended
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def _start(self) -> int:
+        return self._count % self.capacity if self._count > self.capacity else 0
+
+    def append(self, **values) -> None:
+        """Adds a row; missing columns are 0."""
+        i = self._count % self.capacity
+        for f, column in self._data.items():
+            column[i] = column[i + self.capacity] = values.get(f, 0)
+        self._count += 1
+
+    def extend(self, columns: Mapping[str, Iterable]) -> None:
+        """Appends several rows given as equal-length columns (missing columns are 0)."""
+        arrays = {f: np.asarray(v) for f, v in columns.items()}
+        n = len(next(iter(arrays.values()))) if arrays else 0
+        if n > self.capacity:   # only the last ``capacity`` rows would survive
+            self._count += n - self.capacity
+            arrays = {f: a[-self.capacity:] for f, a in arrays.items()}
+            n = self.capacity
+        if not n:
+            return
+        # The block fills slots i.. up to the end of the first half, then wraps to 0;
+        # both halves of the double-write layout get the same slices.
+        cap, i = self.capacity, self._count % self.capacity
+        first = min(n, cap - i)
+        for f, column in self._data.items():
+            values = arrays.get(f, 0)
+            if np.ndim(values):
+                head, tail = values[:first], values[first:]
+            else:
+                head = tail = values
+            column[i:i + first] = column[i + cap:i + cap + first] = head
+            column[:n - first] = column[cap:cap + n - first] = tail
+        self._count += n
+
+    def update_last(self, **values) -> None:
+        """Overwrites columns of the newest row."""
+        if not self._count:
+            raise IndexError("update_last on an empty buffer")
+        i = (self._count - 1) % self.capacity
+        for f, value in values.items():
+            column = self._data[f]
+            column[i] = column[i + self.capacity] = value
+
+    def last(self, field: str):
+        """The newest row's value in ``field``."""
+        if not self._count:
+            raise IndexError("last on an empty buffer")
+        return self._data[field][(self._count - 1) % self.capacity].item()
+
+    def column(self, field: str) -> np.ndarray:
+        """Oldest-first view of one column (no copy; later writes show through, so copy to keep it)."""
+        start = self._start()
+        return self._data[field][start:start + len(self)]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {f: self.column(f) for f in self.fields}
+
+    def clear(self) -> None:
+        self._count = 0
@@ -0,0 +1,156 @@
+"""
+Write-ahead journal for per-symbol bot state.
+
+Rewriting all of ``state.json`` after every change costs O(state). It is
+not atomic, so a crash mid-write leaves a truncated file. ``StateJournal``
+instead appends each change as one JSON line to ``state.json.journal``:
+
+    {"k": "BTC", "v": {"position": 1, "entry_price": 64000.0}}
+
+Every ``snapshot_every`` records, the whole state is compacted into
+``state.json``. The snapshot is written to a temporary file, fsynced and
+``os.replace``d over the old one, and the journal is then truncated.
+Records hold absolute field values, so replaying one twice is harmless. A
+crash between the replace and the truncate therefore loses nothing.
+
+Each record is written to the OS immediately, so it survives a crash of
+the process. ``fsync`` runs at most every ``fsync_interval`` seconds, so a
+power loss can lose at most that window of updates.
+
+On startup ``load`` reads the snapshot and replays the journal. A torn last
+line (the process died mid-write) is cut off. The snapshot keeps the plain
+``{symbol: {...}}`` layout of the old ``state.json``.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_SEPARATORS = (",", ":")
+
+
+def _fsync_dir(path: Path) -> None:
+    """Makes a rename in ``path`` durable (POSIX only; a no-op elsewhere)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class StateJournal:
+    """Thread-safe journaled ``{key: {field: value}}`` state."""
+
+    def __init__(self,
+                 path: str,
+                 state: Optional[Dict[str, Dict[str, Any]]] = None,
+                 snapshot_every: int = 1000,
+                 fsync_interval: float = 1.0):
+        """
+        Args:
+            path (str): Snapshot file; the journal is ``path + ".journal"``.
+            state (Optional[Dict]): Dict to load into and keep updated (e.g. the
+                                    bot's defaults); a new one if omitted.
+            snapshot_every (int): Journal records between compactions.
+            fsync_interval (float): Minimum seconds between fsyncs of the journal;
+                                    0 fsyncs every update.
+        """
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + ".journal")
+        self.state = state if state is not None else {}
+        self.snapshot_every = snapshot_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.RLock()
+        self._journal = None
+        self._records = 0
+        self._last_fsync = 0.0
+        self._dirty = False
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Merges the snapshot and the replayed journal into ``state`` and returns it."""
+        with self._lock:
+            try:
+                with open(self.path) as f:
+                    for key, fields in json.load(f).items():
+                        self.state.setdefault(key, {}).update(fields)
+            except FileNotFoundError:
+                pass
+            self._records = self._replay()
+            return self.state
+
+    def _replay(self) -> int:
+        records = good = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    self.state.setdefault(record["k"], {}).update(record["v"])
+                    good += len(line)
+                    records += 1
+                torn = f.seek(0, os.SEEK_END) > good
+        except FileNotFoundError:
+            return 0
+        if torn:
+            print(f"State journal: dropping a torn record at the end of {self.journal_path}")
+            os.truncate(self.journal_path, good)
+        return records
+
+    def update(self, key: str, changes: Dict[str, Any]) -> None:
+        """Applies ``changes`` to ``state[key]`` and journals them."""
+        line = (json.dumps({"k": key, "v": changes}, separators=_SEPARATORS) + "\n").encode("utf-8")
+        with self._lock:
+            self.state.setdefault(key, {}).update(changes)
+            if self._journal is None:
+                self._journal = open(self.journal_path, "ab")
+            self._journal.write(line)
+            self._journal.flush()
+            self._dirty = True
+            self._records += 1
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self.sync()
+            if self._records >= self.snapshot_every:
+                self.snapshot()
+
+    def sync(self) -> None:
+        """fsyncs journal records written so far."""
+        with self._lock:
+            if self._journal is not None and self._dirty:
+                os.fsync(self._journal.fileno())
+                self._dirty = False
+            self._last_fsync = time.monotonic()
+
+    def snapshot(self) -> None:
+        """Compacts the state into the snapshot file and empties the journal."""
+        with self._lock:
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            _fsync_dir(self.path.parent.resolve())
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = open(self.journal_path, "wb")   # truncates
+            self._records = 0
+            self._dirty = False
+
+    def close(self) -> None:
+        """Writes a final snapshot and closes the journal."""
+        with self._lock:
+            self.snapshot()
+            self._journal.close()
+            self._journal = None
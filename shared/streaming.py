@@ -0,0 +1,293 @@
+"""
+Incremental (streaming) indicators with O(1) work per new value.
+
+Every indicator supports two operations:
+
+* ``update(...)`` appends a new observation (a new candle or tick).
+* ``revise(...)`` replaces the most recent observation, for a candle that is
+  still forming and whose close keeps changing between polls.
+
+This lets a live strategy feed each poll's newest candle without
+recomputing over the whole lookback window.
+"""
+
+import math
+from typing import Optional, Sequence, Callable
+
+
+def feed_candles(timestamps: Sequence[int],
+                 last_ts: Optional[int],
+                 update: Callable[[int], None],
+                 revise: Callable[[int], None]) -> Optional[int]:
+    """
+    Pushes the not-yet-seen tail of a candle series into streaming indicators.
+
+    Candles newer than ``last_ts`` are passed to ``update`` and the candle at
+    ``last_ts`` itself (still forming when it was last seen) to ``revise``;
+    both callbacks receive the candle's index in ``timestamps``.
+
+    Args:
+        timestamps (Sequence[int]): Candle timestamps, oldest first.
+        last_ts (Optional[int]): Timestamp of the newest candle already fed.
+        update (Callable[[int], None]): Called for each new candle.
+        revise (Callable[[int], None]): Called for the re-fetched last candle.
+
+    Returns:
+        Optional[int]: The new ``last_ts``.
+    """
+    for i, ts in enumerate(timestamps):
+        if last_ts is None or ts > last_ts:
+            update(i)
+            last_ts = ts
+        elif ts == last_ts:
+            revise(i)
+    return last_ts
+
+
+class RollingStats:
+    """
+    Rolling mean and population variance over the last ``period`` values.
+
+    Uses the sliding-window form of Welford's algorithm, which stays
+    numerically stable for large prices (e.g. BTC) with a small spread.
+    """
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("period must be >= 1")
+        self.period = period
+        self._window = [0.0] * period
+        self._head = 0          # slot the next value is written to
+        self.count = 0          # values currently in the window (<= period)
+        self.mean = 0.0
+        self._m2 = 0.0          # sum of squared deviations from the mean
+
+    @property
+    def ready(self) -> bool:
+        return self.count == self.period
+
+    @property
+    def last(self) -> Optional[float]:
+        return self._window[(self._head - 1) % self.period] if self.count else None
+
+    @property
+    def variance(self) -> float:
+        return max(self._m2, 0.0) / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def update(self, value: float) -> float:
+        """Adds a value (evicting the oldest once full) and returns the mean."""
+        if self.count < self.period:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+        else:
+            self._replace(self._window[self._head], value)
+        self._window[self._head] = value
+        self._head = (self._head + 1) % self.period
+        return self.mean
+
+    def revise(self, value: float) -> float:
+        """Replaces the most recent value and returns the mean."""
+        if not self.count:
+            return self.update(value)
+        slot = (self._head - 1) % self.period
+        self._replace(self._window[slot], value)
+        self._window[slot] = value
+        return self.mean
+
+    def _replace(self, old: float, new: float) -> None:
+        old_mean = self.mean
+        self.mean += (new - old) / self.count
+        self._m2 += (new - old) * (new - self.mean + old - old_mean)
+
+
+class Bollinger:
+    """Bollinger Bands: rolling mean +/- ``k`` population standard deviations."""
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        self.k = k
+        self.stats = RollingStats(period)
+
+    @property
+    def ready(self) -> bool:
+        return self.stats.ready
+
+    @property
+    def middle(self) -> float:
+        return self.stats.mean
+
+    @property
+    def upper(self) -> float:
+        return self.stats.mean + self.k * self.stats.std
+
+    @property
+    def lower(self) -> float:
+        return self.stats.mean - self.k * self.stats.std
+
+    def update(self, close: float) -> float:
+        return self.stats.update(close)
+
+    def revise(self, close: float) -> float:
+        return self.stats.revise(close)
+
+
+class EMA:
+    """
+    Exponential moving average seeded with the first value.
+
+    Matches ``pandas.Series.ewm(span=period, adjust=False).mean()``.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self.value: Optional[float] = None
+        self._prev: Optional[float] = None   # value before the latest update
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    def update(self, x: float) -> float:
+        self._prev = self.value
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        self.count += 1
+        return self.value
+
+    def revise(self, x: float) -> float:
+        if not self.count:
+            return self.update(x)
+        self.value = x if self._prev is None else self.alpha * x + (1 - self.alpha) * self._prev
+        return self.value
+
+
+class RSI:
+    """
+    Relative Strength Index over ``period`` price changes.
+
+    ``method="simple"`` averages gains and losses over a rolling window (the
+    textbook Cutler RSI used by ``MomentumTrader``); ``method="wilder"`` seeds
+    with that average and then applies Wilder's smoothing.
+    """
+
+    def __init__(self, period: int = 14, method: str = "wilder"):
+        if method not in ("simple", "wilder"):
+            raise ValueError("method must be 'simple' or 'wilder'")
+        self.period = period
+        self.method = method
+        self._gains = RollingStats(period)
+        self._losses = RollingStats(period)
+        self.changes = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._close: Optional[float] = None        # latest close
+        self._prev_close: Optional[float] = None   # close before the latest one
+        self._prev_avgs = (0.0, 0.0)               # Wilder averages before the latest change
+
+    @property
+    def ready(self) -> bool:
+        return self.changes >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        if not self.ready:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+    def update(self, close: float) -> Optional[float]:
+        self._prev_close, self._close = self._close, close
+        if self._prev_close is None:
+            return None
+        self.changes += 1
+        self._apply(close - self._prev_close, revise=False)
+        return self.value
+
+    def revise(self, close: float) -> Optional[float]:
+        if self._prev_close is None:
+            self._close = close
+            return None
+        self._close = close
+        self._apply(close - self._prev_close, revise=True)
+        return self.value
+
+    def _apply(self, change: float, revise: bool) -> None:
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        if revise:
+            self._gains.revise(gain)
+            self._losses.revise(loss)
+        else:
+            self._gains.update(gain)
+            self._losses.update(loss)
+
+        if not revise:
+            self._prev_avgs = (self.avg_gain, self.avg_loss)
+        if self.method == "simple" or self.changes <= self.period:
+            self.avg_gain = self._gains.mean
+            self.avg_loss = self._losses.mean
+        else:
+            prev_gain, prev_loss = self._prev_avgs
+            n = self.period
+            self.avg_gain = (prev_gain * (n - 1) + gain) / n
+            self.avg_loss = (prev_loss * (n - 1) + loss) / n
+
+
+class ATR:
+    """
+    Average True Range with Wilder smoothing.
+
+    The first value is the mean of the first ``period`` true ranges, matching
+    ``ta.volatility.AverageTrueRange``.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.count = 0
+        self.value: Optional[float] = None
+        self._tr_sum = 0.0
+        self._close: Optional[float] = None
+        self._prev_close: Optional[float] = None
+        self._prev_state = (None, 0.0)   # (value, tr_sum) before the latest update
+        self._last_tr = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        self._prev_close, self._close = self._close, close
+        self._prev_state = (self.value, self._tr_sum)
+        self.count += 1
+        self._apply(self._true_range(high, low))
+        return self.value
+
+    def revise(self, high: float, low: float, close: float) -> Optional[float]:
+        if not self.count:
+            return self.update(high, low, close)
+        self._close = close
+        self.value, self._tr_sum = self._prev_state
+        self._apply(self._true_range(high, low))
+        return self.value
+
+    def _true_range(self, high: float, low: float) -> float:
+        if self._prev_close is None:
+            return high - low
+        return max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+
+    def _apply(self, tr: float) -> None:
+        n = self.period
+        if self.count < n:
+            self._tr_sum += tr
+        elif self.count == n:
+            self._tr_sum += tr
+            self.value = self._tr_sum / n
+        else:
+            self.value = (self.value * (n - 1) + tr) / n
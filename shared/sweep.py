@@ -0,0 +1,264 @@
+"""
+Parallel hyperparameter sweeps over cached candle history.
+
+A ``StrategyFamily`` describes one strategy's signal rule as a function of
+its parameters. ``run_sweep`` evaluates many parameter sets with the
+vectorized backtester across a process pool:
+
+* the candle arrays are sent to each worker once (pool initializer), not
+  once per task;
+* parameter sets are grouped by ``StrategyFamily.group_key`` so those that
+  share an indicator run in the same task, and each worker memoizes
+  indicator arrays in a bounded ``IndicatorCache``, so e.g. a Bollinger
+  band for one ``mean_period`` is computed once for every multiplier tried;
+* only the summary stats come back from the workers.
+
+Results are returned ranked and can be printed with ``format_table`` or
+written with ``save_csv``.
+"""
+
+import csv
+import itertools
+import os
+import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .backtest import run_backtest
+
+# Indicator arrays kept per worker before the oldest are evicted
+CACHE_BYTES = 256 * 1024 * 1024
+
+STAT_COLUMNS = ["total_return", "sharpe", "max_drawdown", "round_trips", "win_rate", "exposure"]
+
+
+class StrategyFamily:
+    """
+    One strategy's signal rule, parameterized for a sweep.
+
+    Subclasses must be defined at module level so they can be pickled to the
+    worker processes.
+    """
+
+    name = "strategy"
+
+    def group_key(self, params: Dict[str, Any]) -> Hashable:
+        """Parameter sets with equal keys share indicator work and are evaluated together."""
+        return ()
+
+    def signals(self, candles: Dict[str, np.ndarray], params: Dict[str, Any], cache: "IndicatorCache") -> np.ndarray:
+        """Returns +1 BUY, -1 SELL, 0 HOLD per bar for one parameter set."""
+        raise NotImplementedError
+
+    def backtest_kwargs(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Extra ``run_backtest`` arguments for a parameter set (e.g. stop-loss)."""
+        return {}
+
+
+class IndicatorCache:
+    """A per-worker LRU of indicator arrays, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns the cached value for ``key``, computing and storing it on a miss."""
+        if key in self._items:
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+        self.misses += 1
+        value = compute()
+        self._items[key] = value
+        self.nbytes += _nbytes(value)
+        while self.nbytes > self.max_bytes and len(self._items) > 1:
+            _, old = self._items.popitem(last=False)
+            self.nbytes -= _nbytes(old)
+        return value
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+
+# ---------- Parameter spaces ---------- #
+
+def grid(space: Mapping[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Every combination of the given parameter values.
+
+    Example:
+        grid({"mean_period": [10, 20], "std_dev_multiplier": [1.5, 2.0]})
+        -> 4 parameter sets
+    """
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_search(space: Mapping[str, Any], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    ``n`` random parameter sets (duplicates removed).
+
+    Each entry in ``space`` is either a list of choices or a ``(low, high)``
+    tuple: integer bounds draw integers in [low, high], float bounds draw
+    uniformly.
+    """
+    rng = random.Random(seed)
+    seen = set()
+    out = []
+    for _ in range(n):
+        params = {}
+        for name, spec in space.items():
+            if isinstance(spec, tuple) and len(spec) == 2:
+                low, high = spec
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(list(spec))
+        key = tuple(params.items())
+        if key not in seen:
+            seen.add(key)
+            out.append(params)
+    return out
+
+
+# ---------- Worker side ---------- #
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(family: StrategyFamily, candles: Dict[str, np.ndarray], backtest_kwargs: Dict[str, Any]) -> None:
+    _worker.update(family=family, candles=candles, backtest_kwargs=backtest_kwargs, cache=IndicatorCache())
+
+
+def _evaluate(param_sets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    family = _worker["family"]
+    candles = _worker["candles"]
+    cache = _worker["cache"]
+    rows = []
+    for params in param_sets:
+        kwargs = dict(_worker["backtest_kwargs"], **family.backtest_kwargs(params))
+        signals = family.signals(candles, params, cache)
+        stats = run_backtest(candles["timestamp"], candles["close"], signals, **kwargs)["stats"]
+        rows.append({**params, **stats})
+    return rows
+
+
+def _tasks(family: StrategyFamily, param_sets: Iterable[Dict[str, Any]], n_tasks: int) -> List[List[Dict[str, Any]]]:
+    """Splits parameter sets into about ``n_tasks`` tasks without separating a group needlessly."""
+    groups: Dict[Hashable, List[Dict[str, Any]]] = {}
+    for params in param_sets:
+        groups.setdefault(family.group_key(params), []).append(params)
+
+    total = sum(len(g) for g in groups.values())
+    size = max(1, -(-total // max(1, n_tasks)))
+    tasks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    for members in groups.values():
+        # Large groups are cut into task-sized pieces; small ones are packed together
+        for i in range(0, len(members), size):
+            piece = members[i:i + size]
+            if current and len(current) + len(piece) > size:
+                tasks.append(current)
+                current = []
+            current.extend(piece)
+    if current:
+        tasks.append(current)
+    return tasks
+
+
+# ---------- Driver ---------- #
+
+def run_sweep(family: StrategyFamily,
+              param_sets: Sequence[Dict[str, Any]],
+              candles: Dict[str, np.ndarray],
+              processes: Optional[int] = None,
+              sort_by: str = "sharpe",
+              ascending: bool = False,
+              **backtest_kwargs) -> List[Dict[str, Any]]:
+    """
+    Backtests every parameter set and returns the results ranked.
+
+    Args:
+        family (StrategyFamily): The strategy being tuned.
+        param_sets (Sequence[Dict[str, Any]]): From ``grid`` or ``random_search``.
+        candles (Dict[str, np.ndarray]): Columns from ``decode_history`` (needs
+                                         ``timestamp`` and ``close``, plus any
+                                         field the family reads).
+        processes (Optional[int]): Worker processes; defaults to all cores.
+                                   1 runs in the calling process.
+        sort_by (str): Stat column to rank by.
+        ascending (bool): Rank smallest first (e.g. for ``max_drawdown``).
+        **backtest_kwargs: Passed to ``run_backtest`` for every set (quantity,
+                           fee_rate, allow_short, resolution, ...).
+
+    Returns:
+        List[Dict[str, Any]]: One row per parameter set (parameters + stats),
+        best first, each with a 1-based ``rank``.
+    """
+    processes = processes or os.cpu_count() or 1
+    # A few tasks per worker keeps the pool balanced when groups differ in cost
+    tasks = _tasks(family, param_sets, processes * 4)
+
+    if processes == 1:
+        _init_worker(family, candles, backtest_kwargs)
+        chunks = [_evaluate(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(family, candles, backtest_kwargs)) as pool:
+            chunks = list(pool.map(_evaluate, tasks))
+
+    rows = [row for chunk in chunks for row in chunk]
+    rows.sort(key=lambda r: (np.isnan(r[sort_by]), r[sort_by] if ascending else -r[sort_by]))
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    return rows
+
+
+def format_table(rows: Sequence[Dict[str, Any]], top: int = 20, columns: Optional[Sequence[str]] = None) -> str:
+    """Formats the best ``top`` rows as a fixed-width text table."""
+    if not rows:
+        return "(no results)"
+    if columns is None:
+        params = _param_names(rows[0])
+        columns = ["rank"] + [k for k in rows[0] if k in params] + STAT_COLUMNS
+
+    def cell(value: Any) -> str:
+        if isinstance(value, float):
+            return f"{value:.4f}"
+        return str(value)
+
+    body = [[cell(row.get(c, "")) for c in columns] for row in rows[:top]]
+    widths = [max(len(c), *(len(r[i]) for r in body)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.rjust(w) for c, w in zip(columns, widths)),
+             "  ".join("-" * w for w in widths)]
+    lines += ["  ".join(v.rjust(w) for v, w in zip(r, widths)) for r in body]
+    return "\n".join(lines)
+
+
+def _param_names(row: Dict[str, Any]) -> set:
+    stats = set(STAT_COLUMNS) | {"rank", "fills", "fees", "final_equity"}
+    return {k for k in row if k not in stats}
+
+
+def save_csv(rows: Sequence[Dict[str, Any]], path: str) -> None:
+    """Writes all result rows to a CSV file."""
+    if not rows:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["rank"] + [k for k in rows[0] if k != "rank"])
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,268 @@
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .endpoints import Timeout, timeout_for
+from .hedging import Hedger, get_hedger, hedgeable
+from .metrics import ClientMetrics, get_metrics
+from .rate_limit import RateLimiter, RetryPolicy, get_limiter, request_with_retries
+
+# Connection setup happens on the thread that issues the request, so the
+# timed connections below report into thread-local counters that
+# PooledTransport.request() reads before and after each call.
+_local = threading.local()
+
+
+class _TimedConnectMixin:
+    """Times connect() (TCP connect plus the TLS handshake for HTTPS)."""
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _local.connects = getattr(_local, "connects", 0) + 1
+        _local.connect_seconds = getattr(_local, "connect_seconds", 0.0) + (time.perf_counter() - start)
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class PooledTransport:
+    """
+    A keep-alive HTTP transport shared by the blocking Traydner clients.
+
+    Wraps a single ``requests.Session`` whose connection pool is sized
+    explicitly, so repeated polls reuse an open TCP/TLS connection instead of
+    paying a new handshake every time. Time spent establishing connections
+    is tracked separately from time spent on the request itself; see
+    ``stats()`` and ``report()``.
+
+    Requests pass through the rate limiter (``shared.rate_limit``) and are
+    retried with backoff on 429s, 5xx responses and connection errors. Each
+    endpoint has its own timeout (``shared.endpoints.ENDPOINT_TIMEOUTS``),
+    and GETs slower than their endpoint's p95 are hedged (``shared.hedging``).
+    """
+
+    def __init__(self,
+                 pool_size: int = 10,
+                 per_host_connections: int = 10,
+                 connect_timeout: float = 3.05,
+                 read_timeout: float = 15.0,
+                 pool_block: bool = False,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 timeouts: Optional[Dict[str, Timeout]] = None,
+                 hedger: Optional[Hedger] = None,
+                 hedge: bool = True,
+                 metrics: Optional[ClientMetrics] = None):
+        """
+        Initializes the transport.
+
+        Args:
+            pool_size (int): Number of per-host connection pools to keep.
+            per_host_connections (int): Connections kept open per host. Set this
+                                        to at least the number of threads that
+                                        call the API concurrently.
+            connect_timeout (float): Seconds allowed to establish a connection, for
+                                     endpoints without their own timeout.
+            read_timeout (float): Seconds allowed between bytes of the response, for
+                                  endpoints without their own timeout.
+            pool_block (bool): If True, callers wait for a free connection when
+                               the per-host limit is reached instead of opening
+                               a throwaway one.
+            rate_limiter (Optional[RateLimiter]): Defaults to the process-wide
+                                                  limiter (``get_limiter()``).
+            retry_policy (Optional[RetryPolicy]): Defaults to ``RetryPolicy()``.
+            timeouts (Optional[Dict[str, Timeout]]): Per-endpoint (connect, read)
+                                                     timeouts on top of
+                                                     ``ENDPOINT_TIMEOUTS``, keyed
+                                                     by name (e.g. "history").
+            hedger (Optional[Hedger]): Defaults to the process-wide hedger.
+            hedge (bool): Set to False to never hedge GETs.
+            metrics (Optional[ClientMetrics]): Per-endpoint latency, status and
+                                               byte counters; defaults to the
+                                               process-wide registry.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = _PooledAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=per_host_connections,
+            pool_block=pool_block,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.timeouts = timeouts
+        self.hedger = (hedger or get_hedger()) if hedge else None
+        self.metrics = metrics or get_metrics()
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "new_connections": 0,
+            "handshake_seconds": 0.0,
+            "request_seconds": 0.0,
+        }
+
+    def request(self,
+                method: str,
+                url: str,
+                headers: Optional[Dict[str, str]] = None,
+                params: Optional[Dict[str, Any]] = None,
+                timeout: Optional[Timeout] = None) -> requests.Response:
+        """
+        Sends a request over the pooled session, rate limited and retried.
+
+        Args:
+            method (str): HTTP method (e.g., "GET", "POST").
+            url (str): Absolute URL.
+            headers (Optional[Dict[str, str]]): Extra request headers.
+            params (Optional[Dict[str, Any]]): Query parameters.
+            timeout (Optional[Timeout]): Overrides the endpoint's
+                                         (connect, read) timeout.
+
+        Returns:
+            requests.Response: The raw response (the last attempt's, if it was
+            retried); status is not checked here.
+        """
+        if timeout is None:
+            timeout = timeout_for(url, self.timeout, self.timeouts)
+
+        def send() -> requests.Response:
+            return self._send(method, url, headers, params, timeout)
+
+        attempt = send
+        if self.hedger is not None and hedgeable(method, params):
+            # the hedge is a real request, so it takes its own rate-limit token
+            limiter = self.rate_limiter or get_limiter()
+            attempt = lambda: self.hedger.call(url, send, on_hedge=lambda: limiter.acquire(url))
+        return request_with_retries(attempt, method, url, self.rate_limiter, self.retry_policy,
+                                    metrics=self.metrics)
+
+    def _send(self, method, url, headers, params, timeout) -> requests.Response:
+        """One attempt, with connection and timing accounting."""
+        connects_before = getattr(_local, "connects", 0)
+        connect_seconds_before = getattr(_local, "connect_seconds", 0.0)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.session.request(method, url, headers=headers, params=params, timeout=timeout)
+            return response
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if response is not None:
+                self.metrics.observe(url, elapsed, response.status_code, len(response.content))
+            else:
+                self.metrics.observe(url, elapsed)
+            handshake = getattr(_local, "connect_seconds", 0.0) - connect_seconds_before
+            with self._lock:
+                self._stats["requests"] += 1
+                self._stats["new_connections"] += getattr(_local, "connects", 0) - connects_before
+                self._stats["handshake_seconds"] += handshake
+                self._stats["request_seconds"] += elapsed - handshake
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns connection-reuse and timing counters.
+
+        ``handshake_seconds`` covers TCP connect plus TLS negotiation for new
+        connections; ``request_seconds`` is everything else (sending the
+        request and waiting for the response).
+        """
+        with self._lock:
+            s = dict(self._stats)
+        requests_made = s["requests"]
+        new = s["new_connections"]
+        s["reused_connections"] = max(requests_made - new, 0)
+        s["avg_handshake_ms"] = 1000 * s["handshake_seconds"] / new if new else 0.0
+        s["avg_request_ms"] = 1000 * s["request_seconds"] / requests_made if requests_made else 0.0
+        if self.hedger is not None:
+            s["hedging"] = self.hedger.stats()
+        return s
+
+    def report(self) -> str:
+        """Returns a one-line human readable summary of ``stats()``."""
+        s = self.stats()
+        return (f"{s['requests']} requests, {s['new_connections']} new connections "
+                f"({s['reused_connections']} reused), handshake avg {s['avg_handshake_ms']:.1f} ms "
+                f"(total {s['handshake_seconds']:.2f}s), request avg {s['avg_request_ms']:.1f} ms, "
+                f"{s['errors']} errors" + _hedge_summary(s.get("hedging")))
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def _hedge_summary(hedging: Optional[Dict[str, Dict[str, float]]]) -> str:
+    if not hedging:
+        return ""
+    hedged = sum(e["hedged"] for e in hedging.values())
+    total = sum(e["requests"] for e in hedging.values())
+    wins = sum(e["hedge_wins"] for e in hedging.values())
+    return f", {hedged}/{total} GETs hedged ({wins} hedges answered first)"
+
+
+_default_transport: Optional[PooledTransport] = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> PooledTransport:
+    """Returns the process-wide transport, creating it with defaults on first use."""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = PooledTransport()
+        return _default_transport
+
+
+def configure_transport(**kwargs) -> PooledTransport:
+    """
+    Replaces the process-wide transport with one built from ``kwargs``.
+
+    Call this once at startup, before any client makes a request. Accepts
+    the same keyword arguments as ``PooledTransport``.
+    """
+    global _default_transport
+    with _default_lock:
+        if _default_transport is not None:
+            _default_transport.close()
+        _default_transport = PooledTransport(**kwargs)
+        return _default_transport
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from shared.hedging import Hedger, hedgeable
+from shared.rate_limit import BULK, NORMAL, lane, lane_for
+
+
+def slow(seconds, value):
+    def fn():
+        time.sleep(seconds)
+        return value
+    return fn
+
+
+def test_fast_calls_are_not_hedged():
+    hedger = Hedger(initial_delay=0.5)
+    assert hedger.call("/price", lambda: 1) == 1
+    assert hedger.stats()["price"]["hedged"] == 0
+
+
+def test_slow_call_is_hedged_and_the_faster_answer_wins():
+    hedger = Hedger(initial_delay=0.05)
+    answers = iter([slow(1.0, "first"), slow(0.0, "hedge")])
+    start = time.perf_counter()
+    assert hedger.call("/price", lambda: next(answers)()) == "hedge"
+    assert time.perf_counter() - start < 0.5
+    stats = hedger.stats()["price"]
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_hedge_budget_caps_hedges():
+    hedger = Hedger(initial_delay=0.01, max_hedge_ratio=0.0)
+    for _ in range(8):
+        hedger.call("/price", slow(0.03, 1))
+    assert hedger.stats()["price"]["hedged"] == 5     # only the start-up allowance
+
+
+def test_hedge_runs_in_the_callers_lane():
+    hedger = Hedger(initial_delay=0.02)
+    seen = []
+    with lane(BULK):
+        hedger.call("/history", slow(0.2, 1), on_hedge=lambda: seen.append(lane_for("/history")))
+    assert seen == [BULK]
+    assert lane_for("/history") == NORMAL
+
+
+def test_busy_pool_runs_calls_inline_without_queueing():
+    hedger = Hedger(initial_delay=0.05, max_workers=2)
+    stuck = [threading.Thread(target=hedger.call, args=("/history", slow(1.0, 1))) for _ in range(2)]
+    for t in stuck:
+        t.start()
+    time.sleep(0.1)
+    start = time.perf_counter()
+    assert hedger.call("/price", lambda: 2) == 2
+    assert time.perf_counter() - start < 0.05
+    assert hedger.stats()["price"]["hedge_wins"] == 0
+    for t in stuck:
+        t.join()
+
+
+def test_bulk_downloads_are_not_hedgeable():
+    assert hedgeable("GET", {"limit": 3})
+    assert not hedgeable("GET", {"limit": 5000})
+    assert not hedgeable("POST", {"limit": 3})
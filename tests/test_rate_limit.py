@@ -0,0 +1,110 @@
+import threading
+import time
+
+from shared.metrics import ClientMetrics
+from shared.rate_limit import BULK, NORMAL, TRADE, RateLimiter, RetryPolicy, lane, lane_for, request_with_retries
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+
+
+def test_trade_lane_goes_before_a_bulk_caller_that_queued_first():
+    limiter = RateLimiter(rate=5.0, burst=1, endpoint_limits={})
+    limiter.acquire("/price")   # drain the bucket
+    order = []
+
+    def take(priority):
+        limiter.acquire("/history", priority)
+        order.append(priority)
+
+    bulk = threading.Thread(target=take, args=(BULK,))
+    bulk.start()
+    time.sleep(0.05)
+    trade = threading.Thread(target=take, args=(TRADE,))
+    trade.start()
+    bulk.join(2)
+    trade.join(2)
+    assert order == [TRADE, BULK]
+
+
+def test_bulk_lane_cannot_spend_the_reserve():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1.0, burst=4, endpoint_limits={}, bulk_reserve=0.25, clock=clock)
+    granted = 0
+    while limiter._try_acquire("history", BULK) == 0:
+        granted += 1
+    assert granted == 3
+    assert limiter._try_acquire("price", NORMAL) == 0
+
+
+def test_lane_context_and_endpoint_override():
+    assert lane_for("/price") == NORMAL
+    with lane(BULK):
+        assert lane_for("/history") == BULK
+        assert lane_for("/api/remote/trade") == TRADE
+    assert lane_for("/history") == NORMAL
+
+
+def test_429_halves_the_rate_and_successes_restore_it():
+    limiter = RateLimiter(rate=20.0, burst=10, endpoint_limits={}, clock=FakeClock())
+    limiter.on_response(429)
+    assert limiter.rate == 10.0
+    limiter.on_response(429)
+    assert limiter.rate == 5.0
+    for _ in range(20):
+        limiter.on_response(200)
+    assert limiter.rate == 20.0
+    assert limiter.stats()["throttled"] == 2
+
+
+def test_retry_after_pauses_every_lane():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=0, burst=1, clock=clock)
+    limiter.on_response(429, retry_after=3.0)
+    assert limiter._try_acquire("trade", TRADE) == 3.0
+    clock.now = 3.0
+    assert limiter._try_acquire("trade", TRADE) == 0
+
+
+def test_request_with_retries_retries_429_then_returns_success():
+    limiter = RateLimiter(rate=0, burst=1)
+    responses = [FakeResponse(429, "0"), FakeResponse(503), FakeResponse(200)]
+    response = request_with_retries(lambda: responses.pop(0), "GET", "/price", limiter,
+                                    RetryPolicy(retries=3, base_delay=0.0), metrics=ClientMetrics())
+    assert response.status_code == 200
+    assert limiter.stats()["retries"] == 2
+
+
+def test_trades_are_not_retried_on_server_errors():
+    limiter = RateLimiter(rate=0, burst=1)
+    calls = []
+
+    def send():
+        calls.append(1)
+        return FakeResponse(503)
+
+    response = request_with_retries(send, "POST", "/trade", limiter, RetryPolicy(retries=3, base_delay=0.0),
+                                    metrics=ClientMetrics())
+    assert response.status_code == 503
+    assert len(calls) == 1
+
+
+def test_concurrent_retries_are_all_counted():
+    limiter = RateLimiter(rate=0, burst=1)
+    threads = [threading.Thread(target=lambda: [limiter.record_retry() for _ in range(1000)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert limiter.stats()["retries"] == 8000
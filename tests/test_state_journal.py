@@ -0,0 +1,60 @@
+import json
+
+from shared.state_journal import StateJournal
+
+
+def reopen(path):
+    journal = StateJournal(str(path))
+    journal.load()
+    return journal
+
+
+def test_updates_survive_a_restart_without_a_snapshot(tmp_path):
+    path = tmp_path / "state.json"
+    journal = StateJournal(str(path), fsync_interval=0)
+    journal.load()
+    journal.update("BTC", {"position": 1, "entry_price": 100.0})
+    journal.update("BTC", {"entry_price": 101.0})
+    journal.update("ETH", {"position": 0})
+    assert not path.exists()
+    assert reopen(path).state == {"BTC": {"position": 1, "entry_price": 101.0}, "ETH": {"position": 0}}
+
+
+def test_torn_last_record_is_dropped_and_truncated(tmp_path):
+    path = tmp_path / "state.json"
+    journal = StateJournal(str(path))
+    journal.load()
+    journal.update("BTC", {"position": 1})
+    journal.sync()
+    with open(journal.journal_path, "ab") as f:
+        f.write(b'{"k": "BTC", "v": {"posi')     # the process died mid-write
+    size = journal.journal_path.stat().st_size
+
+    restored = reopen(path)
+    assert restored.state == {"BTC": {"position": 1}}
+    assert journal.journal_path.stat().st_size < size
+    restored.update("BTC", {"position": 0})
+    assert reopen(path).state == {"BTC": {"position": 0}}
+
+
+def test_snapshot_compacts_and_replay_on_top_is_idempotent(tmp_path):
+    path = tmp_path / "state.json"
+    journal = StateJournal(str(path), snapshot_every=3)
+    journal.load()
+    for i in range(4):
+        journal.update("BTC", {"position": i})
+    assert json.loads(path.read_text()) == {"BTC": {"position": 2}}
+    assert journal.journal_path.read_text().count("\n") == 1
+
+    # a crash between the snapshot replace and the journal truncate replays records twice
+    with open(journal.journal_path, "a") as f:
+        f.write(json.dumps({"k": "BTC", "v": {"position": 3}}) + "\n")
+    assert reopen(path).state == {"BTC": {"position": 3}}
+
+
+def test_load_merges_into_defaults(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text(json.dumps({"BTC": {"position": 1}}))
+    state = {"BTC": {"position": 0, "entry_price": None}, "SOL": {"position": 0}}
+    StateJournal(str(path), state).load()
+    assert state == {"BTC": {"position": 1, "entry_price": None}, "SOL": {"position": 0}}